@@ -0,0 +1,311 @@
+"""Headless benchmarks for the hot paths, run against synthetic Mods trees.
+
+    python -m benchmarks.run_benchmarks --files 10k 50k
+    python -m benchmarks.run_benchmarks --files 10k --save-baseline benchmarks/baseline.json
+    python -m benchmarks.run_benchmarks --files 10k --baseline benchmarks/baseline.json
+
+Each case is timed ``--repeat`` times and compared on its median. With a
+baseline, the run exits with status 1 if any case got slower than the
+baseline by more than ``--threshold`` (and by at least ``--min-delta``
+seconds, so millisecond cases do not flap).
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import random
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Callable
+
+if __package__ in (None, ""):  # Allows running this file directly.
+    sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from benchmarks.synthetic_tree import apply_delta, generate_tree, parse_count
+from pro.core.db_service import DBService
+from pro.core.download_meta_service import DownloadMetaService
+from pro.core.file_index_service import FileIndexService
+from pro.core.migrations import MIGRATIONS
+from pro.core.op_log_service import OpLogService
+
+RESULTS_VERSION = 1
+DEFAULT_OUTPUT = Path(__file__).resolve().parent / "results" / "latest.json"
+
+
+@dataclass
+class CaseResult:
+    runs: list[float]
+    items: int = 0
+
+    def to_json(self) -> dict:
+        median = statistics.median(self.runs)
+        result = {"median": median, "min": min(self.runs), "runs": self.runs}
+        if self.items:
+            result["items"] = self.items
+            result["per_second"] = self.items / median if median else None
+        return result
+
+
+@dataclass
+class Bench:
+    repeat: int
+    results: dict[str, CaseResult] = field(default_factory=dict)
+
+    def measure(
+        self,
+        name: str,
+        fn: Callable[[], object],
+        setup: Callable[[], None] | None = None,
+        items: int = 0,
+    ) -> None:
+        runs = []
+        for _ in range(self.repeat):
+            if setup is not None:
+                setup()
+            started = time.perf_counter()
+            fn()
+            runs.append(time.perf_counter() - started)
+        self.results[name] = CaseResult(runs, items)
+        print(f"  {name:<32} {statistics.median(runs) * 1000:10.1f} ms", flush=True)
+
+
+def _open_db(path: Path) -> DBService:
+    db = DBService(path, MIGRATIONS)
+    db.initialize()
+    return db
+
+
+def bench_scan(
+    bench: Bench, root: Path, work: Path, files: int, size_scale: float
+) -> DBService:
+    """Cold, unchanged and small-delta scans; returns the database of the last one."""
+    state: dict[str, object] = {"serial": 0}
+
+    def fresh_db() -> None:
+        state["serial"] += 1
+        db = _open_db(work / f"cold_{state['serial']}.db")
+        index = FileIndexService(db)
+        index.ensure_schema()
+        state["db"], state["index"] = db, index
+
+    bench.measure(
+        "scan.cold",
+        lambda: state["index"].scan(root, mode="full"),
+        setup=fresh_db,
+        items=files,
+    )
+    index: FileIndexService = state["index"]
+    bench.measure("scan.warm_full", lambda: index.scan(root, mode="full"), items=files)
+    bench.measure(
+        "scan.warm_incremental", lambda: index.scan(root, mode="incremental"), items=files
+    )
+
+    def mutate() -> None:
+        state["serial"] += 1
+        apply_delta(root, seed=state["serial"], size_scale=size_scale)
+
+    bench.measure(
+        "scan.delta_incremental",
+        lambda: index.scan(root, mode="incremental"),
+        setup=mutate,
+        items=files,
+    )
+    bench.measure("scan.delta_full", lambda: index.scan(root, mode="full"), setup=mutate)
+    return state["db"]
+
+
+def bench_queries(bench: Bench, db: DBService, files: int) -> None:
+    index = FileIndexService(db)
+    middle = index.page(sort="file_name", limit=files // 2)[-1]
+    bench.measure("db.page_first", lambda: index.page(sort="file_name"))
+    bench.measure(
+        "db.page_deep",
+        lambda: index.page(sort="file_name", after=(middle[1], middle[0])),
+    )
+    bench.measure("db.page_by_size_desc", lambda: index.page(sort="size", descending=True))
+    bench.measure("db.count_filtered", lambda: index.count_files("Hair"))
+    bench.measure("db.page_filtered", lambda: index.page(filter_text="Recolors"))
+    bench.measure(
+        "db.ext_summary",
+        lambda: db.query(
+            """
+            SELECT ext, COUNT(*), SUM(size) FROM file_index
+            WHERE status != 'missing' GROUP BY ext
+            """
+        ),
+    )
+    ids = [row[0] for row in db.query("SELECT id FROM file_index ORDER BY random() LIMIT 1000")]
+    bench.measure(
+        "db.point_lookups_1000",
+        lambda: [db.query_one("SELECT * FROM file_index WHERE id = ?", (i,)) for i in ids],
+        items=len(ids),
+    )
+
+
+def bench_op_log(bench: Bench, work: Path, files: int) -> None:
+    db = _open_db(work / "op_log.db")
+    op_log = OpLogService(db)
+    count = min(files, 50_000)
+    items = [
+        {"file_id": i, "src": f"/mods/a/{i}.package", "dst": f"/parked/a/{i}.package"}
+        for i in range(count)
+    ]
+    bench.measure(
+        "op_log.record_batch",
+        lambda: op_log.record_batch("disable", {"group": "bench"}, items),
+        items=count,
+    )
+    op_id = op_log.recent(limit=1)[0].op_id
+    bench.measure(
+        "op_log.iter_items",
+        lambda: sum(1 for _ in op_log.iter_items(op_id)),
+        items=count,
+    )
+    bench.measure(
+        "op_log.record_single_100",
+        lambda: [op_log.record("scan", {"n": i}) for i in range(100)],
+        items=100,
+    )
+
+
+def _link_text(rng: random.Random, count: int) -> str:
+    lines = []
+    for i in range(count):
+        item_id = rng.randrange(1_000_000, 1_200_000)
+        kind = rng.random()
+        if kind < 0.7:
+            url = (
+                "https://www.thesimsresource.com/downloads/details/category/sims4-hair/"
+                f"title/hair-{item_id}/id/{item_id}/"
+            )
+        elif kind < 0.9:
+            url = f"https://www.patreon.com/posts/mod-{item_id}?utm_source=copy"
+        else:
+            url = f"https://simfileshare.net/download/{item_id}/Mod_{item_id}.package"
+        lines.append(f"{i + 1}. Some title for {item_id} — {url}")
+    return "\n".join(lines)
+
+
+def bench_download_meta(bench: Bench, db: DBService, files: int) -> None:
+    service = DownloadMetaService(db)
+    rng = random.Random(7)
+    count = min(files, 20_000)
+    text = _link_text(rng, count)
+    batch = service.parse_text(text)
+    # About a third of the links count as already downloaded.
+    with db.transaction() as conn:
+        conn.executemany(
+            """
+            INSERT OR IGNORE INTO downloads (url, item_id, file_name, status)
+            VALUES (?, ?, ?, 'success')
+            """,
+            [
+                (meta.download_url, meta.item_id, f"{meta.item_id}.package")
+                for meta in batch.links[::3]
+            ],
+        )
+    bench.measure("download_meta.parse_text", lambda: service.parse_text(text), items=count)
+    bench.measure(
+        "download_meta.check", lambda: service.check(batch.links), items=len(batch.links)
+    )
+
+
+def run_size(files: int, args: argparse.Namespace) -> dict:
+    print(f"{files} files", flush=True)
+    work = Path(tempfile.mkdtemp(prefix="simstoolbox-bench-", dir=args.workdir))
+    try:
+        started = time.perf_counter()
+        stats = generate_tree(work / "Mods", files, seed=args.seed, size_scale=args.size_scale)
+        print(
+            f"  generated {stats.files} files in {stats.dirs} folders"
+            f" ({time.perf_counter() - started:.1f} s)",
+            flush=True,
+        )
+        bench = Bench(repeat=args.repeat)
+        db = bench_scan(bench, stats.root, work, files, args.size_scale)
+        bench_queries(bench, db, files)
+        bench_op_log(bench, work, files)
+        bench_download_meta(bench, db, files)
+        return {name: result.to_json() for name, result in bench.results.items()}
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+def compare(current: dict, baseline: dict, threshold: float, min_delta: float) -> list[str]:
+    """Cases in ``current`` slower than in ``baseline`` beyond the allowed margin."""
+    regressions = []
+    for size, cases in current["sizes"].items():
+        base_cases = baseline.get("sizes", {}).get(size, {})
+        for name, result in cases.items():
+            base = base_cases.get(name)
+            if base is None:
+                continue
+            now, before = result["median"], base["median"]
+            if now > before * (1 + threshold) and now - before >= min_delta:
+                regressions.append(
+                    f"{size} {name}: {before * 1000:.1f} ms -> {now * 1000:.1f} ms"
+                    f" (+{(now / before - 1) * 100:.0f}%)"
+                )
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--files", nargs="+", default=["10k"], help="tree sizes, e.g. 10k 50k 200k"
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--size-scale", type=float, default=1.0)
+    parser.add_argument("--workdir", type=Path, default=None, help="where trees are generated")
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT)
+    parser.add_argument("--baseline", type=Path, default=None)
+    parser.add_argument("--save-baseline", type=Path, default=None)
+    parser.add_argument(
+        "--threshold", type=float, default=0.25, help="allowed slowdown (0.25 = 25%%)"
+    )
+    parser.add_argument("--min-delta", type=float, default=0.005, help="seconds")
+    args = parser.parse_args(argv)
+
+    results = {
+        "version": RESULTS_VERSION,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "seed": args.seed,
+        "repeat": args.repeat,
+        "sizes": {},
+    }
+    for text in args.files:
+        files = parse_count(text)
+        results["sizes"][str(files)] = run_size(files, args)
+
+    for path in (args.output, args.save_baseline):
+        if path is not None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(json.dumps(results, indent=2), encoding="utf-8")
+            print(f"wrote {path}")
+
+    if args.baseline is None:
+        return 0
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+    regressions = compare(results, baseline, args.threshold, args.min_delta)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    if not regressions:
+        print(f"no regressions against {args.baseline}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
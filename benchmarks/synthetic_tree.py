@@ -0,0 +1,136 @@
+"""Reproducible synthetic Mods trees for the benchmarks.
+
+Files get realistic sizes through ``truncate``, so they take no disk space on
+filesystems with sparse files; pass ``size_scale`` below 1 elsewhere. Only the
+scan's view of the tree (names, nesting, sizes, mtimes) is realistic; file
+contents are zeros.
+"""
+
+from __future__ import annotations
+
+import os
+import random
+from dataclasses import dataclass
+from pathlib import Path
+
+# Fixed so the same seed yields the same quick_sig values on every run.
+BASE_MTIME = 1_700_000_000
+FILES_PER_CREATOR = 60
+# (extension, weight, median size, max size)
+FILE_MIX = (
+    (".package", 85, 300 << 10, 64 << 20),
+    (".ts4script", 8, 40 << 10, 2 << 20),
+    (".txt", 4, 2 << 10, 64 << 10),
+    (".png", 2, 200 << 10, 4 << 20),
+    (".cfg", 1, 1 << 10, 16 << 10),
+)
+WORDS = (
+    "Hair", "Top", "Dress", "Shoes", "Sofa", "Lamp", "Kitchen", "Eyes", "Skin", "Brows",
+    "Necklace", "Tattoo", "Pose", "Trait", "Career", "Tuning", "Override", "Fix", "Set",
+)
+
+
+@dataclass(frozen=True)
+class TreeStats:
+    root: Path
+    files: int
+    dirs: int
+    bytes: int
+
+
+@dataclass(frozen=True)
+class DeltaStats:
+    touched: int
+    added: int
+    removed: int
+    moved: int
+
+
+def _size(rng: random.Random, median: int, limit: int, scale: float) -> int:
+    return max(0, int(min(rng.lognormvariate(0, 1.2) * median, limit) * scale))
+
+
+def _write(path: Path, size: int, mtime: float) -> None:
+    with open(path, "wb") as handle:
+        handle.truncate(size)
+    os.utime(path, (mtime, mtime))
+
+
+def _file_name(rng: random.Random, index: int) -> str:
+    extensions = [entry[0] for entry in FILE_MIX]
+    weights = [entry[1] for entry in FILE_MIX]
+    ext = rng.choices(extensions, weights)[0]
+    word = rng.choice(WORDS)
+    return f"{word}_{index:06d}_v{rng.randint(1, 9)}{ext}"
+
+
+def _size_for(rng: random.Random, name: str, scale: float) -> int:
+    for ext, _, median, limit in FILE_MIX:
+        if name.endswith(ext):
+            return _size(rng, median, limit, scale)
+    return 0
+
+
+def generate_tree(root: Path, files: int, seed: int = 0, size_scale: float = 1.0) -> TreeStats:
+    """Create ``files`` files below ``root``, nested the way downloaded CC usually is.
+
+    About a fifth sit directly in a creator folder, most one level below it
+    (a set), and the rest two levels down.
+    """
+    rng = random.Random(seed)
+    root.mkdir(parents=True, exist_ok=True)
+    dirs: set[Path] = set()
+    total_bytes = 0
+    creators = max(1, files // FILES_PER_CREATOR)
+    for index in range(files):
+        creator = rng.randrange(creators)
+        folder = root / f"Creator{creator:04d}"
+        depth = rng.random()
+        if depth > 0.2:
+            folder = folder / f"{WORDS[creator % len(WORDS)]}Set{rng.randrange(3)}"
+        if depth > 0.8:
+            folder = folder / rng.choice(("Recolors", "Optional"))
+        if folder not in dirs:
+            folder.mkdir(parents=True, exist_ok=True)
+            dirs.add(folder)
+        name = _file_name(rng, index)
+        size = _size_for(rng, name, size_scale)
+        _write(folder / name, size, BASE_MTIME + index)
+        total_bytes += size
+    return TreeStats(root=root, files=files, dirs=len(dirs), bytes=total_bytes)
+
+
+def apply_delta(
+    root: Path, seed: int, fraction: float = 0.005, size_scale: float = 1.0
+) -> DeltaStats:
+    """Touch, add, remove and move a small share of the files, like a day of downloads."""
+    rng = random.Random(seed)
+    paths = sorted(path for path in root.rglob("*") if path.is_file())
+    if not paths:
+        return DeltaStats(0, 0, 0, 0)
+    count = max(1, int(len(paths) * fraction))
+    picked = rng.sample(paths, min(len(paths), count * 3))
+    touched, removed, moved = picked[:count], picked[count : count * 2], picked[count * 2 :]
+    now = BASE_MTIME + 10_000_000 + seed
+    for path in touched:
+        _write(path, path.stat().st_size + 1024, now)
+    for path in removed:
+        path.unlink()
+    for path in moved:
+        target = path.parent.parent / f"moved_{seed}_{path.name}"
+        os.replace(path, target)
+    folder = root / f"New_{seed}"
+    folder.mkdir(exist_ok=True)
+    for index in range(count):
+        name = _file_name(rng, index)
+        _write(folder / name, _size_for(rng, name, size_scale), now)
+    return DeltaStats(touched=len(touched), added=count, removed=len(removed), moved=len(moved))
+
+
+def parse_count(text: str) -> int:
+    """``10k`` → 10000, ``200k`` → 200000, ``1m`` → 1000000."""
+    text = text.strip().lower()
+    multiplier = {"k": 1_000, "m": 1_000_000}.get(text[-1:], 1)
+    if multiplier != 1:
+        text = text[:-1]
+    return int(float(text) * multiplier)
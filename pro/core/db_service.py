@@ -1,9 +1,16 @@
 from __future__ import annotations
 
 import sqlite3
+import threading
+import time
+import weakref
+from contextlib import contextmanager
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Iterable
+from typing import Callable, Iterable, Iterator
+
+# (span name, sql, perf_counter start, seconds)
+StatementHook = Callable[[str, str, float, float], None]
 
 
 @dataclass(frozen=True)
@@ -12,54 +19,232 @@ class Migration:
     sql: str
 
 
+DEFAULT_PRAGMAS: dict[str, str | int] = {
+    "synchronous": "NORMAL",
+    "cache_size": -65536,
+    "mmap_size": 268435456,
+    # Scan staging tables hold one row per file; keep them out of the heap.
+    "temp_store": "FILE",
+    "busy_timeout": 5000,
+}
+
+
+class _Reader:
+    """Holds a thread's read connection in the thread-local; dies with the thread."""
+
+    __slots__ = ("conn", "__weakref__")
+
+    def __init__(self, conn: sqlite3.Connection) -> None:
+        self.conn = conn
+
+
+def _close_reader(
+    lock: threading.Lock, readers: list[sqlite3.Connection], conn: sqlite3.Connection
+) -> None:
+    with lock:
+        if conn not in readers:
+            # Already closed by DBService.close().
+            return
+        readers.remove(conn)
+    conn.close()
+
+
 class DBService:
-    def __init__(self, db_path: Path, migrations: Iterable[Migration]) -> None:
+    """SQLite access with one shared writer and a read connection per thread.
+
+    Writes go through ``transaction()`` (or the legacy ``execute``/``commit``
+    helpers), which serialise on the writer lock. Reads from any thread use
+    ``query()``/``reader()`` and, thanks to WAL, never wait for a writer.
+
+    A statement hook, when installed, is told how long each ``query`` and
+    ``execute`` took and how long each transaction waited for and held the
+    writer; statements run on a transaction's connection are not seen
+    one by one.
+    """
+
+    def __init__(
+        self,
+        db_path: Path,
+        migrations: Iterable[Migration],
+        pragmas: dict[str, str | int] | None = None,
+    ) -> None:
         self._db_path = db_path
         self._migrations = sorted(migrations, key=lambda m: m.version)
+        self._pragmas = dict(DEFAULT_PRAGMAS if pragmas is None else pragmas)
         self._conn: sqlite3.Connection | None = None
+        self._write_lock = threading.RLock()
+        self._tx_depth = 0
+        self._local = threading.local()
+        self._readers: list[sqlite3.Connection] = []
+        self._readers_lock = threading.Lock()
+        self._statement_hook: StatementHook | None = None
 
     @property
     def connection(self) -> sqlite3.Connection:
         if self._conn is None:
-            self._db_path.parent.mkdir(parents=True, exist_ok=True)
-            self._conn = sqlite3.connect(self._db_path)
-            self._conn.row_factory = sqlite3.Row
+            with self._write_lock:
+                if self._conn is None:
+                    conn = self._connect()
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    self._conn = conn
         return self._conn
 
+    def reader(self) -> sqlite3.Connection:
+        holder = getattr(self._local, "reader", None)
+        if holder is None:
+            # The writer creates the file and switches it to WAL first.
+            _ = self.connection
+            conn = self._connect()
+            conn.execute("PRAGMA query_only=ON")
+            holder = self._local.reader = _Reader(conn)
+            with self._readers_lock:
+                self._readers.append(conn)
+            # Pool threads come and go; close their reader when the thread exits.
+            weakref.finalize(holder, _close_reader, self._readers_lock, self._readers, conn)
+        return holder.conn
+
     def close(self) -> None:
-        if self._conn is not None:
-            self._conn.close()
-            self._conn = None
+        with self._readers_lock:
+            readers = list(self._readers)
+            self._readers.clear()
+        for conn in readers:
+            conn.close()
+        self._local = threading.local()
+        with self._write_lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def set_statement_hook(self, hook: StatementHook | None) -> None:
+        self._statement_hook = hook
 
     def initialize(self) -> None:
-        conn = self.connection
-        conn.execute(
-            """
-            CREATE TABLE IF NOT EXISTS schema_migrations (
-                version INTEGER PRIMARY KEY
-            )
-            """
-        )
-        existing_versions = {
-            row["version"] for row in conn.execute("SELECT version FROM schema_migrations")
-        }
-        for migration in self._migrations:
-            if migration.version in existing_versions:
-                continue
-            conn.executescript(migration.sql)
+        with self._write_lock:
+            conn = self.connection
             conn.execute(
-                "INSERT INTO schema_migrations (version) VALUES (?)",
-                (migration.version,),
+                """
+                CREATE TABLE IF NOT EXISTS schema_migrations (
+                    version INTEGER PRIMARY KEY
+                )
+                """
             )
-        conn.commit()
+            existing_versions = {
+                row["version"] for row in conn.execute("SELECT version FROM schema_migrations")
+            }
+            for migration in self._migrations:
+                if migration.version in existing_versions:
+                    continue
+                conn.executescript(migration.sql)
+                conn.execute(
+                    "INSERT INTO schema_migrations (version) VALUES (?)",
+                    (migration.version,),
+                )
+            conn.commit()
 
-    def execute(self, sql: str, params: tuple | dict | None = None) -> sqlite3.Cursor:
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        hook = self._statement_hook
+        if hook is None:
+            with self._transaction() as conn:
+                yield conn
+            return
+        waited = time.perf_counter()
+        with self._write_lock:
+            if self._tx_depth:
+                # The outer transaction on this thread is already being timed.
+                with self._transaction() as conn:
+                    yield conn
+                return
+            started = time.perf_counter()
+            hook("db.write_wait", "", waited, started - waited)
+            try:
+                with self._transaction() as conn:
+                    yield conn
+            finally:
+                hook("db.transaction", "", started, time.perf_counter() - started)
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        with self._write_lock:
+            conn = self.connection
+            outermost = self._tx_depth == 0
+            if outermost and not conn.in_transaction:
+                conn.execute("BEGIN IMMEDIATE")
+            self._tx_depth += 1
+            try:
+                yield conn
+            except BaseException:
+                self._tx_depth -= 1
+                if outermost:
+                    conn.rollback()
+                raise
+            else:
+                self._tx_depth -= 1
+                if outermost:
+                    conn.commit()
+
+    def query(self, sql: str, params: tuple | dict | None = None) -> list[sqlite3.Row]:
+        if self._statement_hook is not None:
+            args = (sql,) if params is None else (sql, params)
+            return self._traced(
+                "db.query", sql, self.reader().execute, args, sqlite3.Cursor.fetchall
+            )
         if params is None:
-            return self.connection.execute(sql)
-        return self.connection.execute(sql, params)
+            return self.reader().execute(sql).fetchall()
+        return self.reader().execute(sql, params).fetchall()
+
+    def query_one(self, sql: str, params: tuple | dict | None = None) -> sqlite3.Row | None:
+        if self._statement_hook is not None:
+            args = (sql,) if params is None else (sql, params)
+            return self._traced(
+                "db.query", sql, self.reader().execute, args, sqlite3.Cursor.fetchone
+            )
+        if params is None:
+            return self.reader().execute(sql).fetchone()
+        return self.reader().execute(sql, params).fetchone()
+
+    def ensure_columns(self, table: str, columns: dict[str, str]) -> list[str]:
+        with self.transaction() as conn:
+            existing = {row["name"] for row in conn.execute(f"PRAGMA table_info({table})")}
+            added = [name for name in columns if name not in existing]
+            for name in added:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {columns[name]}")
+        return added
+
+    def execute(self, sql: str, params: tuple | dict | None = None) -> sqlite3.Cursor:
+        args = (sql,) if params is None else (sql, params)
+        with self._write_lock:
+            if self._statement_hook is not None:
+                return self._traced("db.execute", sql, self.connection.execute, args)
+            return self.connection.execute(*args)
 
     def executemany(self, sql: str, params_seq: Iterable[tuple]) -> sqlite3.Cursor:
-        return self.connection.executemany(sql, params_seq)
+        with self._write_lock:
+            if self._statement_hook is not None:
+                return self._traced(
+                    "db.execute", sql, self.connection.executemany, (sql, params_seq)
+                )
+            return self.connection.executemany(sql, params_seq)
 
     def commit(self) -> None:
-        self.connection.commit()
+        with self._write_lock:
+            if self._tx_depth == 0:
+                self.connection.commit()
+
+    def _traced(self, name: str, sql: str, call: Callable, args: tuple, fetch=None):
+        hook = self._statement_hook
+        started = time.perf_counter()
+        try:
+            result = call(*args)
+            return result if fetch is None else fetch(result)
+        finally:
+            if hook is not None:
+                hook(name, sql, started, time.perf_counter() - started)
+
+    def _connect(self) -> sqlite3.Connection:
+        self._db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self._db_path, check_same_thread=False, timeout=30)
+        conn.row_factory = sqlite3.Row
+        for name, value in self._pragmas.items():
+            conn.execute(f"PRAGMA {name}={value}")
+        return conn
@@ -1,7 +1,36 @@
 from __future__ import annotations
 
+import json
+import os
+import re
 from dataclasses import dataclass
-from urllib.parse import urlparse
+from urllib.parse import parse_qsl, unquote, urlencode, urlsplit, urlunsplit
+
+from .db_service import DBService
+
+# Stops at whitespace, quotes, angle brackets and CJK punctuation that copy tools
+# leave glued to a link.
+URL_PATTERN = re.compile(r"https?://[^\s<>\"'`\u3000-\u303f\uff08\uff09\uff0c\uff1b]+", re.I)
+TRAILING_PUNCTUATION = ".,;:!?)]}>”’"
+TSR_HOST = "thesimsresource.com"
+TSR_ITEM_PATTERNS = (
+    re.compile(r"/id/(\d+)(?:/|$)"),
+    re.compile(r"/downloads/(\d+)(?:/|$)"),
+)
+TSR_DOWNLOAD_URL = "https://www.thesimsresource.com/downloads/download/itemId/{item_id}"
+EXTERNAL_SOURCES = {
+    "patreon.com": "patreon",
+    "curseforge.com": "curseforge",
+    "simfileshare.net": "simfileshare",
+    "mediafire.com": "mediafire",
+    "drive.google.com": "google_drive",
+    "dropbox.com": "dropbox",
+    "mega.nz": "mega",
+    "tumblr.com": "tumblr",
+    "modthesims.info": "modthesims",
+}
+MOD_EXTENSIONS = {".package", ".ts4script", ".zip", ".rar", ".7z"}
+TRACKING_PARAMS = ("utm_", "fbclid", "gclid")
 
 
 @dataclass(frozen=True)
@@ -9,11 +38,152 @@ class DownloadMeta:
     url: str
     domain: str
     item_id: str | None
+    kind: str = "external"
+    source: str = "other"
+    file_name: str | None = None
+
+    @property
+    def download_url(self) -> str:
+        if self.kind == "tsr" and self.item_id:
+            return TSR_DOWNLOAD_URL.format(item_id=self.item_id)
+        return self.url
+
+
+@dataclass(frozen=True)
+class LinkBatch:
+    links: list[DownloadMeta]
+    repeated: int
+    ignored: int
+
+
+@dataclass(frozen=True)
+class LinkStatus:
+    """``state`` is new, failed, downloaded, removed or in_library."""
+
+    meta: DownloadMeta
+    state: str
+    file_path: str | None = None
+
+
+def normalize_url(url: str) -> str:
+    url = url.rstrip(TRAILING_PUNCTUATION)
+    parts = urlsplit(url)
+    host = (parts.hostname or "").lower()
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+    query = parts.query
+    if "utm_" in query or "clid" in query:
+        query = urlencode(
+            [
+                (key, value)
+                for key, value in parse_qsl(query, keep_blank_values=True)
+                if not key.lower().startswith(TRACKING_PARAMS)
+            ]
+        )
+    return urlunsplit((parts.scheme.lower(), host, parts.path or "/", query, ""))
+
+
+def _source(host: str) -> str:
+    for suffix, source in EXTERNAL_SOURCES.items():
+        if host == suffix or host.endswith(f".{suffix}"):
+            return source
+    return "other"
 
 
 class DownloadMetaService:
+    def __init__(self, db: DBService) -> None:
+        self._db = db
+
     def parse(self, url: str) -> DownloadMeta:
-        parsed = urlparse(url)
-        domain = parsed.netloc
-        item_id = parsed.path.strip("/").split("/")[-1] or None
-        return DownloadMeta(url=url, domain=domain, item_id=item_id)
+        url = normalize_url(url)
+        host = urlsplit(url).hostname or ""
+        if host == TSR_HOST or host.endswith(f".{TSR_HOST}"):
+            for pattern in TSR_ITEM_PATTERNS:
+                match = pattern.search(url)
+                if match:
+                    item_id = match.group(1)
+                    return DownloadMeta(
+                        url=f"https://www.{TSR_HOST}/downloads/{item_id}",
+                        domain=host,
+                        item_id=item_id,
+                        kind="tsr",
+                        source="tsr",
+                    )
+            # Category and browse pages carry no item.
+            return DownloadMeta(url=url, domain=host, item_id=None, kind="tsr_page", source="tsr")
+        name = os.path.basename(unquote(urlsplit(url).path))
+        if os.path.splitext(name)[1].lower() not in MOD_EXTENSIONS:
+            name = None
+        return DownloadMeta(
+            url=url, domain=host, item_id=None, source=_source(host), file_name=name
+        )
+
+    def parse_text(self, text: str) -> LinkBatch:
+        """Every usable link in pasted ``text``, normalized and in first-seen order."""
+        seen: dict[str, DownloadMeta] = {}
+        repeated = ignored = 0
+        for match in URL_PATTERN.finditer(text):
+            meta = self.parse(match.group(0))
+            if meta.kind == "tsr_page":
+                ignored += 1
+                continue
+            key = meta.download_url
+            if key in seen:
+                repeated += 1
+            else:
+                seen[key] = meta
+        return LinkBatch(links=list(seen.values()), repeated=repeated, ignored=ignored)
+
+    def check(self, links: list[DownloadMeta]) -> list[LinkStatus]:
+        """Dedup ``links`` against past downloads and the file index in two queries."""
+        if not links:
+            return []
+        urls = json.dumps([meta.download_url for meta in links])
+        item_ids = json.dumps([meta.item_id for meta in links if meta.item_id])
+        records = self._db.query(
+            """
+            SELECT url, item_id, file_name, file_path, sha1, status FROM downloads
+            WHERE url IN (SELECT value FROM json_each(?))
+                OR item_id IN (SELECT value FROM json_each(?))
+            """,
+            (urls, item_ids),
+        )
+        by_url = {row["url"]: row for row in records}
+        by_item = {}
+        # An item fetched through several links counts as downloaded if any succeeded.
+        for row in sorted(records, key=lambda row: row["status"] == "success"):
+            if row["item_id"]:
+                by_item[row["item_id"]] = row
+        names = {row["file_name"] for row in records if row["file_name"]}
+        names.update(meta.file_name for meta in links if meta.file_name)
+        hashes = {row["sha1"] for row in records if row["sha1"]}
+        present = self._db.query(
+            """
+            SELECT abs_path, file_name, sha1 FROM file_index
+            WHERE status != 'missing'
+                AND (
+                    file_name COLLATE NOCASE IN (SELECT value FROM json_each(?))
+                    OR sha1 IN (SELECT value FROM json_each(?))
+                )
+            """,
+            (json.dumps(sorted(names)), json.dumps(sorted(hashes))),
+        )
+        path_by_name = {row["file_name"].casefold(): row["abs_path"] for row in present}
+        path_by_hash = {row["sha1"]: row["abs_path"] for row in present if row["sha1"]}
+
+        statuses = []
+        for meta in links:
+            record = by_item.get(meta.item_id) or by_url.get(meta.download_url)
+            if record is None:
+                path = path_by_name.get(meta.file_name.casefold()) if meta.file_name else None
+                state = "in_library" if path else "new"
+            elif record["status"] != "success":
+                path, state = None, "failed"
+            else:
+                # Found by content first, so a renamed or moved file still counts.
+                path = path_by_hash.get(record["sha1"]) or path_by_name.get(
+                    (record["file_name"] or "").casefold()
+                )
+                state = "downloaded" if path else "removed"
+            statuses.append(LinkStatus(meta=meta, state=state, file_path=path))
+        return statuses
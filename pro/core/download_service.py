@@ -0,0 +1,464 @@
+from __future__ import annotations
+
+import hashlib
+import http.client
+import os
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Callable
+from urllib.parse import unquote, urljoin, urlsplit
+
+from .db_service import DBService
+from .event_bus import EventBus
+
+CHUNK_SIZE = 256 * 1024
+MAX_REDIRECTS = 5
+PROGRESS_INTERVAL = 0.25
+RETRYABLE_STATUS = frozenset({408, 425, 429, 500, 502, 503, 504})
+REDIRECT_STATUS = frozenset({301, 302, 303, 307, 308})
+USER_AGENT = "SimsToolboxPro/0.1"
+
+
+class DownloadError(Exception):
+    def __init__(self, message: str, retryable: bool = False) -> None:
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class DownloadCancelled(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class DownloadRequest:
+    url: str
+    dest_dir: str
+    file_name: str | None = None
+    item_id: str | None = None
+    headers: tuple[tuple[str, str], ...] = ()
+
+
+@dataclass(frozen=True)
+class DownloadResult:
+    url: str
+    status: str
+    file_path: str | None = None
+    file_name: str | None = None
+    file_size: int = 0
+    sha1: str | None = None
+    error: str | None = None
+    resumed_from: int = 0
+    attempts: int = 1
+
+
+def parse_content_disposition(value: str | None) -> str | None:
+    """File name from a Content-Disposition header, preferring RFC 5987 ``filename*``."""
+    if not value:
+        return None
+    plain = None
+    for part in value.split(";"):
+        key, _, raw = part.strip().partition("=")
+        key = key.strip().lower()
+        raw = raw.strip()
+        if key == "filename*":
+            # e.g. UTF-8''PS_MouthCorners03.package
+            name = unquote(raw.split("''", 1)[-1].strip('"'))
+            if name:
+                return os.path.basename(name)
+        elif key == "filename" and raw:
+            plain = raw.strip('"')
+    return os.path.basename(plain) if plain else None
+
+
+def _reserve_path(directory: str, name: str) -> str:
+    """Create an empty file under a free variant of ``name`` and return its path.
+
+    Creating it with O_EXCL claims the name, so concurrent downloads of the
+    same file name cannot pick the same path; the caller replaces it.
+    """
+    stem, ext = os.path.splitext(name)
+    candidate = os.path.join(directory, name)
+    counter = 1
+    while True:
+        try:
+            os.close(os.open(candidate, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666))
+            return candidate
+        except FileExistsError:
+            candidate = os.path.join(directory, f"{stem} ({counter}){ext}")
+            counter += 1
+
+
+class ConnectionPool:
+    """Keeps idle keep-alive connections per (scheme, host, port)."""
+
+    def __init__(self, timeout: float = 30.0, max_idle_per_host: int = 4) -> None:
+        self._timeout = timeout
+        self._max_idle = max_idle_per_host
+        self._idle: dict[tuple[str, str, int], list[http.client.HTTPConnection]] = {}
+        self._lock = threading.Lock()
+        self.created = 0
+
+    def acquire(self, key: tuple[str, str, int]) -> http.client.HTTPConnection:
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                return idle.pop()
+            self.created += 1
+        scheme, host, port = key
+        if scheme == "https":
+            return http.client.HTTPSConnection(host, port, timeout=self._timeout)
+        return http.client.HTTPConnection(host, port, timeout=self._timeout)
+
+    def release(
+        self, key: tuple[str, str, int], conn: http.client.HTTPConnection, reusable: bool
+    ) -> None:
+        if reusable:
+            with self._lock:
+                idle = self._idle.setdefault(key, [])
+                if len(idle) < self._max_idle:
+                    idle.append(conn)
+                    return
+        conn.close()
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for conn in connections:
+                conn.close()
+
+
+class DownloadService:
+    """Downloads queued URLs with a per-host concurrency limit.
+
+    Bodies stream into a ``.part`` file next to the destination while SHA-1
+    is computed on the fly; an interrupted file resumes with a Range request.
+    Finished downloads are recorded in ``downloads`` (and their hash copied to
+    a matching ``file_index`` row), then published as ``download.finished``.
+    """
+
+    def __init__(
+        self,
+        db: DBService,
+        event_bus: EventBus,
+        max_workers: int = 4,
+        per_host: int = 2,
+        retries: int = 3,
+        backoff: float = 1.0,
+        timeout: float = 30.0,
+    ) -> None:
+        self._db = db
+        self._event_bus = event_bus
+        self._max_workers = max(1, max_workers)
+        self._per_host = max(1, per_host)
+        self._retries = retries
+        self._backoff = backoff
+        self._pool = ConnectionPool(timeout=timeout)
+        self._condition = threading.Condition()
+        self._pending: deque[tuple[DownloadRequest, Future]] = deque()
+        self._active: Counter[str] = Counter()
+        self._workers: list[threading.Thread] = []
+        self._stop = threading.Event()
+        self._cancelled: set[str] = set()
+
+    @property
+    def pool(self) -> ConnectionPool:
+        return self._pool
+
+    def submit(self, request: DownloadRequest) -> Future:
+        future: Future = Future()
+        with self._condition:
+            self._cancelled.discard(request.url)
+            self._pending.append((request, future))
+            if len(self._workers) < self._max_workers:
+                worker = threading.Thread(target=self._work, name="downloader", daemon=True)
+                self._workers.append(worker)
+                worker.start()
+            self._condition.notify_all()
+        return future
+
+    def pending_count(self) -> int:
+        with self._condition:
+            return len(self._pending) + sum(self._active.values())
+
+    def cancel(self, url: str) -> None:
+        """Drop ``url`` from the queue or stop it mid-transfer, keeping the partial file."""
+        with self._condition:
+            self._cancelled.add(url)
+            dropped = [job for job in self._pending if job[0].url == url]
+            for job in dropped:
+                self._pending.remove(job)
+        for request, future in dropped:
+            future.cancel()
+            self._event_bus.publish("download.cancelled", {"url": request.url})
+
+    def close(self) -> None:
+        self._stop.set()
+        with self._condition:
+            pending, self._pending = list(self._pending), deque()
+            self._condition.notify_all()
+        for _, future in pending:
+            future.cancel()
+        for worker in self._workers:
+            worker.join(timeout=5)
+        self._pool.close()
+
+    def fetch(
+        self, request: DownloadRequest, should_stop: Callable[[], bool] | None = None
+    ) -> DownloadResult:
+        """Download one request now, retrying transient failures with backoff."""
+        if should_stop is None:
+
+            def should_stop() -> bool:
+                return self._stop.is_set() or request.url in self._cancelled
+
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                result = self._attempt(request, attempt, should_stop)
+            except DownloadCancelled:
+                return self._cancelled_result(request, attempt)
+            except (DownloadError, OSError, http.client.HTTPException) as exc:
+                if should_stop():
+                    return self._cancelled_result(request, attempt)
+                if not getattr(exc, "retryable", True) or attempt > self._retries:
+                    result = DownloadResult(
+                        request.url, "failed", error=str(exc) or type(exc).__name__,
+                        attempts=attempt,
+                    )
+                    self._record(request, result)
+                    return result
+                if self._wait(self._backoff * 2 ** (attempt - 1), should_stop):
+                    return self._cancelled_result(request, attempt)
+                continue
+            self._record(request, result)
+            return result
+
+    def _wait(self, delay: float, should_stop: Callable[[], bool]) -> bool:
+        """Sleep for the retry backoff; True if stopped meanwhile."""
+        deadline = time.monotonic() + delay
+        while not should_stop():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            self._stop.wait(min(remaining, 0.2))
+        return True
+
+    def _cancelled_result(self, request: DownloadRequest, attempt: int) -> DownloadResult:
+        self._event_bus.publish("download.cancelled", {"url": request.url})
+        return DownloadResult(request.url, "cancelled", attempts=attempt)
+
+    def _work(self) -> None:
+        while True:
+            with self._condition:
+                while True:
+                    if self._stop.is_set():
+                        return
+                    job = next(
+                        (
+                            job
+                            for job in self._pending
+                            if self._active[self._host(job[0].url)] < self._per_host
+                        ),
+                        None,
+                    )
+                    if job is not None:
+                        self._pending.remove(job)
+                        host = self._host(job[0].url)
+                        self._active[host] += 1
+                        break
+                    self._condition.wait()
+            request, future = job
+            try:
+                if future.set_running_or_notify_cancel():
+                    try:
+                        future.set_result(self.fetch(request))
+                    except Exception as exc:  # noqa: BLE001
+                        future.set_exception(exc)
+            finally:
+                with self._condition:
+                    self._active[host] -= 1
+                    self._condition.notify_all()
+
+    @staticmethod
+    def _host(url: str) -> str:
+        return (urlsplit(url).hostname or "").lower()
+
+    @staticmethod
+    def _part_path(request: DownloadRequest) -> str:
+        digest = hashlib.sha1(request.url.encode("utf-8")).hexdigest()[:16]
+        return os.path.join(request.dest_dir, f".{digest}.part")
+
+    def _attempt(
+        self, request: DownloadRequest, attempt: int, should_stop: Callable[[], bool]
+    ) -> DownloadResult:
+        os.makedirs(request.dest_dir, exist_ok=True)
+        part = self._part_path(request)
+        offset = os.path.getsize(part) if os.path.exists(part) else 0
+        url = request.url
+        for _ in range(MAX_REDIRECTS + 1):
+            parts = urlsplit(url)
+            scheme = parts.scheme.lower()
+            if scheme not in ("http", "https") or not parts.hostname:
+                raise DownloadError(f"不支持的链接: {url}")
+            key = (scheme, parts.hostname, parts.port or (443 if scheme == "https" else 80))
+            headers = {"User-Agent": USER_AGENT, **dict(request.headers)}
+            if offset:
+                headers["Range"] = f"bytes={offset}-"
+            target = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+            conn = self._pool.acquire(key)
+            try:
+                conn.request("GET", target, headers=headers)
+                response = conn.getresponse()
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                raise
+            status = response.status
+            if status in REDIRECT_STATUS or status == 416 or status not in (200, 206):
+                response.read()
+                self._pool.release(key, conn, not response.will_close)
+                if status in REDIRECT_STATUS:
+                    url = urljoin(url, response.getheader("Location", ""))
+                    continue
+                if status == 416:
+                    # The partial file no longer matches the resource; start over.
+                    os.unlink(part)
+                    raise DownloadError("HTTP 416", retryable=True)
+                raise DownloadError(f"HTTP {status}", retryable=status in RETRYABLE_STATUS)
+            start = offset if status == 206 else 0
+            if status == 206 and not (response.getheader("Content-Range") or "").startswith(
+                f"bytes {offset}-"
+            ):
+                start = -1
+            try:
+                if start < 0:
+                    raise DownloadError("Content-Range 与续传位置不符", retryable=True)
+                result = self._stream(request, response, part, start, url, should_stop)
+            except BaseException:
+                conn.close()
+                if start < 0 and os.path.exists(part):
+                    os.unlink(part)
+                raise
+            self._pool.release(key, conn, not response.will_close)
+            return DownloadResult(**{**asdict(result), "attempts": attempt})
+        raise DownloadError("重定向次数过多")
+
+    def _stream(
+        self,
+        request: DownloadRequest,
+        response: http.client.HTTPResponse,
+        part: str,
+        start: int,
+        url: str,
+        should_stop: Callable[[], bool],
+    ) -> DownloadResult:
+        digest = hashlib.sha1()
+        if start:
+            # Resuming: the bytes already on disk are hashed once, here.
+            with open(part, "rb") as existing:
+                while chunk := existing.read(CHUNK_SIZE):
+                    digest.update(chunk)
+        length = response.getheader("Content-Length")
+        expected = int(length) if length and length.isdigit() else None
+        received = 0
+        last_report = 0.0
+        with open(part, "ab" if start else "wb") as handle:
+            while True:
+                if should_stop():
+                    raise DownloadCancelled()
+                chunk = response.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                handle.write(chunk)
+                digest.update(chunk)
+                received += len(chunk)
+                now = time.monotonic()
+                if now - last_report >= PROGRESS_INTERVAL:
+                    last_report = now
+                    total = start + expected if expected is not None else None
+                    self._event_bus.publish(
+                        "download.progress",
+                        {"items": {request.url: (start + received, total)}},
+                    )
+        if expected is not None and received != expected:
+            raise DownloadError(f"连接中断: {received}/{expected} 字节", retryable=True)
+        name = (
+            parse_content_disposition(response.getheader("Content-Disposition"))
+            or request.file_name
+            or os.path.basename(unquote(urlsplit(url).path))
+            or f"{request.item_id or 'download'}.bin"
+        )
+        final = _reserve_path(request.dest_dir, name)
+        try:
+            os.replace(part, final)
+        except OSError:
+            os.unlink(final)
+            raise
+        return DownloadResult(
+            url=request.url,
+            status="success",
+            file_path=final,
+            file_name=os.path.basename(final),
+            file_size=start + received,
+            sha1=digest.hexdigest(),
+            resumed_from=start,
+        )
+
+    def _record(self, request: DownloadRequest, result: DownloadResult) -> None:
+        now = datetime.now().isoformat(timespec="seconds")
+        quick_sig = None
+        if result.file_path:
+            stat = os.stat(result.file_path)
+            quick_sig = f"{stat.st_size}:{stat.st_mtime}"
+        with self._db.transaction() as conn:
+            conn.execute(
+                """
+                INSERT INTO downloads (
+                    url, domain, item_id, file_name, file_path, file_size, sha1, quick_sig,
+                    status, error, downloaded_at
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(url) DO UPDATE SET
+                    domain = excluded.domain,
+                    item_id = COALESCE(excluded.item_id, downloads.item_id),
+                    file_name = COALESCE(excluded.file_name, downloads.file_name),
+                    file_path = COALESCE(excluded.file_path, downloads.file_path),
+                    file_size = excluded.file_size,
+                    sha1 = COALESCE(excluded.sha1, downloads.sha1),
+                    quick_sig = COALESCE(excluded.quick_sig, downloads.quick_sig),
+                    status = excluded.status,
+                    error = excluded.error,
+                    downloaded_at = excluded.downloaded_at
+                """,
+                (
+                    request.url,
+                    self._host(request.url),
+                    request.item_id,
+                    result.file_name,
+                    result.file_path,
+                    result.file_size,
+                    result.sha1,
+                    quick_sig,
+                    result.status,
+                    result.error,
+                    now,
+                ),
+            )
+            if result.sha1 is not None:
+                # The watcher may already have indexed the file; the hash is known.
+                conn.execute(
+                    """
+                    UPDATE file_index SET sha1 = ?, sha1_sig = quick_sig
+                    WHERE abs_path = ? AND quick_sig = ?
+                    """,
+                    (result.sha1, result.file_path, quick_sig),
+                )
+        payload = {**asdict(result), "item_id": request.item_id}
+        if result.status == "success":
+            self._event_bus.publish("download.finished", payload)
+        else:
+            self._event_bus.publish("download.failed", payload)
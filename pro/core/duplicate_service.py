@@ -0,0 +1,347 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime
+
+from .db_service import DBService
+from .hash_service import PARTIAL_SPAN, partial_sha1, sha1_file
+from .task_service import TaskContext
+
+
+@dataclass(frozen=True)
+class DuplicateSummary:
+    checked_sizes: int
+    checked_names: int
+    partial_hashed: int
+    full_hashed: int
+    cancelled: bool = False
+
+
+@dataclass(frozen=True)
+class DuplicateGroup:
+    kind: str
+    group_key: str
+    size: int
+    paths: list[str]
+
+
+class DuplicateService:
+    def __init__(self, db: DBService) -> None:
+        self._db = db
+
+    def ensure_schema(self) -> None:
+        self._db.ensure_columns(
+            "file_index",
+            {"partial_hash": "TEXT", "partial_sig": "TEXT", "dup_sig": "TEXT"},
+        )
+        with self._db.transaction() as conn:
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_file_index_size ON file_index(size)")
+            conn.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_file_index_name
+                ON file_index(file_name COLLATE NOCASE)
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS duplicates (
+                    file_id INTEGER,
+                    kind TEXT,
+                    group_key TEXT,
+                    size INTEGER,
+                    detected_at TEXT,
+                    PRIMARY KEY (file_id, kind)
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_duplicates_group ON duplicates(kind, group_key)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_duplicates_size ON duplicates(size)")
+
+    def refresh(self, context: TaskContext | None = None) -> DuplicateSummary:
+        """Re-check only the size and name groups touched since the last run."""
+        now = datetime.now().isoformat(timespec="seconds")
+        dirty_sizes = sorted(
+            row[0]
+            for row in self._db.query(
+                """
+                SELECT size FROM file_index
+                WHERE status != 'missing' AND dup_sig IS NOT quick_sig
+                UNION
+                SELECT d.size FROM duplicates d JOIN file_index f ON f.id = d.file_id
+                WHERE f.status = 'missing' OR f.dup_sig IS NOT f.quick_sig
+                """
+            )
+            if row[0] is not None
+        )
+        dirty_names = [
+            row[0]
+            for row in self._db.query(
+                """
+                SELECT lower(file_name) FROM file_index
+                WHERE status != 'missing' AND dup_sig IS NOT quick_sig
+                UNION
+                SELECT d.group_key FROM duplicates d JOIN file_index f ON f.id = d.file_id
+                WHERE d.kind = 'name_conflict'
+                    AND (f.status = 'missing' OR f.dup_sig IS NOT f.quick_sig)
+                """
+            )
+        ]
+        writes: dict[str, list[tuple]] = {"partial": [], "sha1": []}
+        partial_hashed, full_hashed, cancelled = self._refresh_names(
+            dirty_names, now, writes, context
+        )
+        if cancelled:
+            # dup_sig is only advanced by the size pass, so every name stays dirty.
+            return DuplicateSummary(
+                checked_sizes=0,
+                checked_names=len(dirty_names),
+                partial_hashed=partial_hashed,
+                full_hashed=full_hashed,
+                cancelled=True,
+            )
+
+        shared_sizes = {
+            row[0]
+            for row in self._db.query(
+                """
+                SELECT size FROM file_index
+                WHERE status != 'missing' AND size > 0
+                GROUP BY size HAVING COUNT(*) > 1
+                """
+            )
+        }
+        processed: list[int] = []
+        inserts: list[tuple] = []
+        for index, size in enumerate(dirty_sizes):
+            if context is not None and index % 100 == 0:
+                context.report("重复检测", index, len(dirty_sizes))
+                if context.cancelled:
+                    cancelled = True
+                    break
+            if size in shared_sizes:
+                groups, partial_count, full_count = self._size_groups(size, writes)
+                partial_hashed += partial_count
+                full_hashed += full_count
+                inserts.extend(
+                    (file_id, sha1, size, now) for sha1, ids in groups for file_id in ids
+                )
+            processed.append(size)
+            if len(processed) >= 500:
+                self._store_size_groups(processed, inserts, writes)
+                processed, inserts = [], []
+        self._store_size_groups(processed, inserts, writes)
+        return DuplicateSummary(
+            checked_sizes=len(dirty_sizes),
+            checked_names=len(dirty_names),
+            partial_hashed=partial_hashed,
+            full_hashed=full_hashed,
+            cancelled=cancelled,
+        )
+
+    def groups(self, kind: str | None = None) -> list[DuplicateGroup]:
+        sql = """
+            SELECT d.kind, d.group_key, f.size, f.abs_path
+            FROM duplicates d JOIN file_index f ON f.id = d.file_id
+            WHERE f.status != 'missing'
+        """
+        params: tuple = ()
+        if kind is not None:
+            sql += " AND d.kind = ?"
+            params = (kind,)
+        sql += " ORDER BY d.kind, d.group_key, f.abs_path"
+        result: dict[tuple[str, str], DuplicateGroup] = {}
+        for row in self._db.query(sql, params):
+            key = (row["kind"], row["group_key"])
+            group = result.get(key)
+            if group is None:
+                group = result[key] = DuplicateGroup(
+                    kind=row["kind"], group_key=row["group_key"], size=row["size"], paths=[]
+                )
+            group.paths.append(row["abs_path"])
+        return [group for group in result.values() if len(group.paths) > 1]
+
+    def counts(self) -> dict[str, int]:
+        return {
+            row["kind"]: row["groups"]
+            for row in self._db.query(
+                "SELECT kind, COUNT(DISTINCT group_key) AS groups FROM duplicates GROUP BY kind"
+            )
+        }
+
+    def _size_groups(
+        self, size: int, writes: dict[str, list[tuple]]
+    ) -> tuple[list[tuple[str, list[int]]], int, int]:
+        rows = self._db.query(
+            """
+            SELECT id, abs_path, quick_sig, partial_hash, partial_sig, sha1, sha1_sig
+            FROM file_index WHERE size = ? AND status != 'missing'
+            """,
+            (size,),
+        )
+        partial_hashed = full_hashed = 0
+        by_partial: dict[str, list] = defaultdict(list)
+        if size <= PARTIAL_SPAN:
+            # The partial hash would read the whole file anyway.
+            by_partial[""] = list(rows)
+            rows = []
+        for row in rows:
+            partial = row["partial_hash"]
+            if row["partial_sig"] != row["quick_sig"] or partial is None:
+                partial = self._hash_row(row, partial_sha1, "partial", writes)
+                partial_hashed += 1
+            if partial is not None:
+                by_partial[partial].append(row)
+        groups: list[tuple[str, list[int]]] = []
+        for candidates in by_partial.values():
+            if len(candidates) < 2:
+                continue
+            by_sha1: dict[str, list[int]] = defaultdict(list)
+            for row in candidates:
+                sha1 = row["sha1"]
+                if row["sha1_sig"] != row["quick_sig"] or sha1 is None:
+                    sha1 = self._hash_row(row, sha1_file, "sha1", writes)
+                    full_hashed += 1
+                if sha1 is not None:
+                    by_sha1[sha1].append(row["id"])
+            groups.extend((sha1, ids) for sha1, ids in by_sha1.items() if len(ids) > 1)
+        return groups, partial_hashed, full_hashed
+
+    def _store_size_groups(
+        self, sizes: list[int], inserts: list[tuple], writes: dict[str, list[tuple]]
+    ) -> None:
+        if not sizes:
+            return
+        params = [(size,) for size in sizes]
+        with self._db.transaction() as conn:
+            # Hashes first: the dup_sig update below marks these rows as checked.
+            self._write_hashes(conn, writes)
+            conn.executemany(
+                "DELETE FROM duplicates WHERE kind = 'same_hash' AND size = ?", params
+            )
+            conn.executemany(
+                """
+                INSERT INTO duplicates (file_id, kind, group_key, size, detected_at)
+                VALUES (?, 'same_hash', ?, ?, ?)
+                """,
+                inserts,
+            )
+            conn.executemany(
+                """
+                UPDATE file_index SET dup_sig = quick_sig
+                WHERE size = ? AND dup_sig IS NOT quick_sig
+                """,
+                params,
+            )
+
+    def _refresh_names(
+        self,
+        names: list[str],
+        now: str,
+        writes: dict[str, list[tuple]],
+        context: TaskContext | None = None,
+    ) -> tuple[int, int, bool]:
+        """Rebuild the name conflicts of ``names``; returns (partial, full, cancelled).
+
+        Copies of one name that differ in size conflict outright. Same-size
+        copies are compared by partial hash first and only fully hashed when
+        those match. Unreadable files are left out of the comparison.
+        """
+        if not names:
+            return 0, 0, False
+        shared_names = {
+            row[0]
+            for row in self._db.query(
+                """
+                SELECT lower(file_name) FROM file_index WHERE status != 'missing'
+                GROUP BY lower(file_name) HAVING COUNT(*) > 1
+                """
+            )
+        }
+        partial_hashed = full_hashed = 0
+        checked: list[str] = []
+        inserts: list[tuple] = []
+        for index, name in enumerate(names):
+            if context is not None and index % 100 == 0:
+                context.report("重名检测", index, len(names))
+                if context.cancelled:
+                    return partial_hashed, full_hashed, True
+            checked.append(name)
+            if name not in shared_names:
+                continue
+            rows = self._db.query(
+                """
+                SELECT id, abs_path, size, quick_sig, partial_hash, partial_sig, sha1, sha1_sig
+                FROM file_index
+                WHERE file_name = ? COLLATE NOCASE AND status != 'missing'
+                """,
+                (name,),
+            )
+            conflict = len({row["size"] for row in rows}) > 1
+            if not conflict:
+                readable = list(rows)
+                if rows[0]["size"] > PARTIAL_SPAN:
+                    partials: dict[int, str] = {}
+                    for row in rows:
+                        partial = row["partial_hash"]
+                        if row["partial_sig"] != row["quick_sig"] or partial is None:
+                            partial = self._hash_row(row, partial_sha1, "partial", writes)
+                            partial_hashed += 1
+                        if partial is not None:
+                            partials[row["id"]] = partial
+                    readable = [row for row in rows if row["id"] in partials]
+                    conflict = len(set(partials.values())) > 1
+                if not conflict:
+                    hashes = set()
+                    for row in readable:
+                        sha1 = row["sha1"]
+                        if row["sha1_sig"] != row["quick_sig"] or sha1 is None:
+                            sha1 = self._hash_row(row, sha1_file, "sha1", writes)
+                            full_hashed += 1
+                        if sha1 is not None:
+                            hashes.add(sha1)
+                    conflict = len(hashes) > 1
+            if conflict:
+                inserts.extend((row["id"], name, row["size"], now) for row in rows)
+        with self._db.transaction() as conn:
+            self._write_hashes(conn, writes)
+            conn.executemany(
+                "DELETE FROM duplicates WHERE kind = 'name_conflict' AND group_key = ?",
+                [(name,) for name in checked],
+            )
+            conn.executemany(
+                """
+                INSERT INTO duplicates (file_id, kind, group_key, size, detected_at)
+                VALUES (?, 'name_conflict', ?, ?, ?)
+                """,
+                inserts,
+            )
+        return partial_hashed, full_hashed, False
+
+    @staticmethod
+    def _hash_row(row, hasher, column: str, writes: dict[str, list[tuple]]) -> str | None:
+        """Hash one file; the result is queued in ``writes`` for the next batch commit."""
+        try:
+            value = hasher(row["abs_path"])
+        except OSError:
+            return None
+        writes[column].append((value, row["quick_sig"], row["id"], row["quick_sig"]))
+        return value
+
+    @staticmethod
+    def _write_hashes(conn, writes: dict[str, list[tuple]]) -> None:
+        conn.executemany(
+            """
+            UPDATE file_index SET partial_hash = ?, partial_sig = ?
+            WHERE id = ? AND quick_sig = ?
+            """,
+            writes["partial"],
+        )
+        conn.executemany(
+            "UPDATE file_index SET sha1 = ?, sha1_sig = ? WHERE id = ? AND quick_sig = ?",
+            writes["sha1"],
+        )
+        writes["partial"].clear()
+        writes["sha1"].clear()
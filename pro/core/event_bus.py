@@ -1,11 +1,20 @@
 from __future__ import annotations
 
-from collections import defaultdict
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from typing import Any, Callable, DefaultDict, Iterable
 
+from .tracing import TRACER
+
 
 EventCallback = Callable[[str, dict[str, Any]], None]
+Reducer = Callable[[dict[str, Any], dict[str, Any]], dict[str, Any]]
+Dispatcher = Callable[[Callable[[], None]], None]
+
+DELIVERY_MODES = ("inline", "worker", "gui")
 
 
 @dataclass(frozen=True)
@@ -14,14 +23,232 @@ class Event:
     payload: dict[str, Any]
 
 
+@dataclass(frozen=True)
+class HandlerStats:
+    handler: str
+    mode: str
+    calls: int
+    coalesced: int
+    errors: int
+    total_ms: float
+    max_ms: float
+    last_error: str = ""
+
+    @property
+    def mean_ms(self) -> float:
+        return self.total_ms / self.calls if self.calls else 0.0
+
+
+def _latest(old: dict[str, Any], new: dict[str, Any]) -> dict[str, Any]:
+    return new
+
+
+def _handler_name(callback: EventCallback) -> str:
+    owner = getattr(callback, "__self__", None)
+    name = getattr(callback, "__qualname__", None) or repr(callback)
+    if owner is not None and "." not in name:
+        name = f"{type(owner).__name__}.{name}"
+    return f"{getattr(callback, '__module__', '') or ''}:{name}"
+
+
+class Subscription:
+    """One callback's queue of deliveries.
+
+    Deliveries to a subscription run one at a time and in publish order,
+    whichever thread they run on. A coalescing subscription keeps only one
+    pending payload per event name until it next runs.
+    """
+
+    def __init__(
+        self,
+        callback: EventCallback,
+        mode: str,
+        reducer: Reducer | None,
+    ) -> None:
+        self.callback = callback
+        self.mode = mode
+        self.reducer = reducer
+        self.name = _handler_name(callback)
+        self.active = True
+        self._lock = threading.Lock()
+        self._queue: deque[Event] = deque()
+        self._merged: dict[str, dict[str, Any]] = {}
+        self._scheduled = False
+        self._calls = 0
+        self._coalesced = 0
+        self._errors = 0
+        self._total = 0.0
+        self._max = 0.0
+        self._last_error = ""
+
+    def offer(self, event: Event) -> bool:
+        """Queue ``event``; returns True if a drain has to be scheduled."""
+        with self._lock:
+            if self.reducer is not None:
+                pending = self._merged.get(event.name)
+                if pending is None:
+                    self._queue.append(Event(event.name, {}))
+                    self._merged[event.name] = event.payload
+                else:
+                    self._merged[event.name] = self.reducer(pending, event.payload)
+                    self._coalesced += 1
+            else:
+                self._queue.append(event)
+            if self._scheduled:
+                return False
+            self._scheduled = True
+            return True
+
+    def drain(self) -> None:
+        while True:
+            with self._lock:
+                if not self._queue or not self.active:
+                    self._queue.clear()
+                    self._merged.clear()
+                    self._scheduled = False
+                    return
+                event = self._queue.popleft()
+                if self.reducer is not None:
+                    event = Event(event.name, self._merged.pop(event.name))
+            try:
+                self.deliver(event)
+            except Exception:  # noqa: BLE001
+                # Recorded in the stats; a queued handler has nobody to raise to.
+                pass
+
+    def deliver(self, event: Event) -> None:
+        started = time.perf_counter()
+        try:
+            self.callback(event.name, event.payload)
+        except Exception as exc:
+            with self._lock:
+                self._errors += 1
+                self._last_error = f"{event.name}: {exc!r}"
+            raise
+        finally:
+            finished = time.perf_counter()
+            if TRACER.enabled:
+                TRACER.record(
+                    self.name, "event", started, finished - started, {"event": event.name}
+                )
+            elapsed = (finished - started) * 1000
+            with self._lock:
+                self._calls += 1
+                self._total += elapsed
+                self._max = max(self._max, elapsed)
+
+    def stats(self) -> HandlerStats:
+        with self._lock:
+            return HandlerStats(
+                handler=self.name,
+                mode=self.mode,
+                calls=self._calls,
+                coalesced=self._coalesced,
+                errors=self._errors,
+                total_ms=self._total,
+                max_ms=self._max,
+                last_error=self._last_error,
+            )
+
+
 class EventBus:
-    def __init__(self) -> None:
-        self._listeners: DefaultDict[str, list[EventCallback]] = defaultdict(list)
+    """Delivers events to subscribers inline, on a worker pool or on the GUI thread.
+
+    ``gui`` subscribers run through the dispatcher installed with
+    ``set_gui_dispatcher``; until one is installed they run inline. Passing
+    ``coalesce=True`` (latest payload wins) or a reducer folds a burst of one
+    event into a single delivery.
+    """
 
-    def subscribe(self, event_names: Iterable[str], callback: EventCallback) -> None:
-        for name in event_names:
-            self._listeners[name].append(callback)
+    def __init__(self, max_workers: int = 2) -> None:
+        self._listeners: DefaultDict[str, list[Subscription]] = defaultdict(list)
+        self._subscriptions: list[Subscription] = []
+        self._lock = threading.Lock()
+        self._max_workers = max_workers
+        self._executor: ThreadPoolExecutor | None = None
+        self._dispatcher: Dispatcher | None = None
+        self._closed = False
+
+    def subscribe(
+        self,
+        event_names: Iterable[str],
+        callback: EventCallback,
+        mode: str = "inline",
+        coalesce: bool | Reducer = False,
+    ) -> Subscription:
+        if mode not in DELIVERY_MODES:
+            raise ValueError(f"unknown delivery mode: {mode}")
+        if callable(coalesce):
+            reducer: Reducer | None = coalesce
+        else:
+            reducer = _latest if coalesce else None
+        if reducer is not None and mode == "inline":
+            raise ValueError("inline subscribers cannot coalesce")
+        subscription = Subscription(callback, mode, reducer)
+        with self._lock:
+            for name in event_names:
+                self._listeners[name].append(subscription)
+            self._subscriptions.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscription.active = False
+        with self._lock:
+            for listeners in self._listeners.values():
+                if subscription in listeners:
+                    listeners.remove(subscription)
+            if subscription in self._subscriptions:
+                self._subscriptions.remove(subscription)
+
+    def set_gui_dispatcher(self, dispatcher: Dispatcher | None) -> None:
+        """Install the hook that runs a callable on the GUI thread."""
+        self._dispatcher = dispatcher
 
     def publish(self, name: str, payload: dict[str, Any]) -> None:
-        for callback in list(self._listeners.get(name, [])):
-            callback(name, payload)
+        with self._lock:
+            listeners = list(self._listeners.get(name, ()))
+        event = Event(name, payload)
+        for subscription in listeners:
+            mode = subscription.mode
+            if mode == "gui" and self._dispatcher is None:
+                mode = "inline"
+            if mode == "inline":
+                subscription.deliver(event)
+            elif mode == "worker" and self._closed:
+                # Shutting down: nothing would stop a new pool again.
+                continue
+            elif subscription.offer(event):
+                if mode == "gui":
+                    self._dispatcher(subscription.drain)
+                else:
+                    executor = self._worker()
+                    if executor is not None:
+                        executor.submit(subscription.drain)
+
+    def stats(self) -> list[HandlerStats]:
+        """Per-handler timings, slowest total first."""
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        return sorted(
+            (subscription.stats() for subscription in subscriptions),
+            key=lambda stats: stats.total_ms,
+            reverse=True,
+        )
+
+    def close(self) -> None:
+        """Stop the worker pool; later worker deliveries are dropped."""
+        with self._lock:
+            self._closed = True
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _worker(self) -> ThreadPoolExecutor | None:
+        with self._lock:
+            if self._closed:
+                return None
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self._max_workers, thread_name_prefix="event-bus"
+                )
+            return self._executor
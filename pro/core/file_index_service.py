@@ -1,10 +1,32 @@
 from __future__ import annotations
 
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
+from typing import Collection, Iterator
 
 from .db_service import DBService
+from .fs_walker import FsWalker, KnownDir, WalkBatch
+from .hash_service import partial_sha1
+from .task_service import TaskContext
+from .tracing import TRACER
+
+
+# Columns the file table can be ordered by, with the expression that matches
+# their index so keyset paging never sorts in memory.
+SORT_KEYS = {
+    "file_name": "file_name COLLATE NOCASE",
+    "rel_path": "rel_path",
+    "ext": "ext",
+    "size": "size",
+    "mtime": "mtime",
+    "status": "status",
+}
+PAGE_COLUMNS = ("id", "file_name", "rel_path", "ext", "size", "mtime", "status", "abs_path")
 
 
 @dataclass(frozen=True)
@@ -13,115 +35,590 @@ class ScanSummary:
     added: int
     changed: int
     removed: int
+    mode: str = "full"
+    cancelled: bool = False
+    moved: int = 0
+
+
+_STAGING_TABLES = ("scan_seen", "scan_dirs", "scan_new", "scan_gone", "scan_moves")
 
 
 class FileIndexService:
-    def __init__(self, db: DBService) -> None:
+    def __init__(self, db: DBService, walker: FsWalker | None = None) -> None:
         self._db = db
+        self._walker = walker or FsWalker()
+        self._scan_lock = threading.Lock()
 
     def ensure_schema(self) -> None:
-        self._db.execute(
-            """
-            CREATE TABLE IF NOT EXISTS file_index (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                abs_path TEXT UNIQUE,
-                rel_path TEXT,
-                file_name TEXT,
-                ext TEXT,
-                size INTEGER,
-                mtime REAL,
-                quick_sig TEXT,
-                sha1 TEXT,
-                first_seen_at TEXT,
-                last_seen_at TEXT,
-                status TEXT,
-                source TEXT
+        with self._db.transaction() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS file_index (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    abs_path TEXT UNIQUE,
+                    rel_path TEXT,
+                    file_name TEXT,
+                    ext TEXT,
+                    size INTEGER,
+                    mtime REAL,
+                    quick_sig TEXT,
+                    sha1 TEXT,
+                    first_seen_at TEXT,
+                    last_seen_at TEXT,
+                    status TEXT,
+                    source TEXT
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_file_index_abs_path ON file_index(abs_path)"
+            )
+            if self._db.ensure_columns("file_index", {"dir_path": "TEXT"}):
+                conn.execute(
+                    """
+                    UPDATE file_index
+                    SET dir_path = rtrim(abs_path, replace(abs_path, ?, ''))
+                    """,
+                    (os.sep,),
+                )
+                conn.execute(
+                    "UPDATE file_index SET dir_path = substr(dir_path, 1, length(dir_path) - 1)"
+                )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_file_index_dir_path ON file_index(dir_path)"
+            )
+            self._db.ensure_columns(
+                "file_index",
+                {
+                    "inode": "INTEGER",
+                    "device": "INTEGER",
+                    "partial_hash": "TEXT",
+                    "partial_sig": "TEXT",
+                    "dup_sig": "TEXT",
+                },
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_file_index_inode ON file_index(inode)")
+            for column in ("rel_path", "ext", "size", "mtime", "status"):
+                conn.execute(
+                    f"CREATE INDEX IF NOT EXISTS idx_file_index_{column} ON file_index({column})"
+                )
+            conn.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_file_index_name
+                ON file_index(file_name COLLATE NOCASE)
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS dir_index (
+                    path TEXT PRIMARY KEY,
+                    parent_path TEXT,
+                    mtime REAL,
+                    child_count INTEGER,
+                    subdir_count INTEGER,
+                    last_scanned_at TEXT
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_dir_index_parent_path ON dir_index(parent_path)"
             )
-            """
-        )
-        self._db.execute("CREATE INDEX IF NOT EXISTS idx_file_index_abs_path ON file_index(abs_path)")
-        self._db.commit()
 
-    def scan(self, root: Path, source: str = "external") -> ScanSummary:
+    def scan(
+        self,
+        root: Path,
+        source: str = "external",
+        mode: str = "full",
+        context: TaskContext | None = None,
+        dirs: Collection[str] | None = None,
+    ) -> ScanSummary:
+        """Sync ``file_index`` with the files below ``root``.
+
+        ``dirs`` restricts an incremental scan to those directories and any
+        changes beneath them, for callers that already know where to look.
+        """
+        if mode not in ("full", "incremental"):
+            raise ValueError(f"Unknown scan mode: {mode}")
+        if dirs is not None and mode != "incremental":
+            raise ValueError("Directory-limited scans must be incremental")
         root = root.expanduser()
         now = datetime.now().isoformat(timespec="seconds")
+        # Staging tables live on the shared writer connection, so only one
+        # scan may use them at a time.
+        with self._scan_lock:
+            known_dirs = self._known_dirs(root) if mode == "incremental" else None
+            expected = None
+            if mode == "full":
+                expected = self._db.query_one(
+                    "SELECT COUNT(*) FROM file_index WHERE status != 'missing'"
+                )[0]
+            cancelled = False
+            walked = 0
+            self._create_staging()
+            try:
+                if context is not None:
+                    context.report("遍历", 0, expected)
+                with TRACER.span("scan.walk", "scan", mode=mode):
+                    for batch in self._walker.walk(root, known_dirs, dirs):
+                        self._stage_batch(batch)
+                        walked += len(batch.files)
+                        if context is not None:
+                            total = max(expected, walked) if expected else None
+                            context.report("遍历", walked, total)
+                            if context.cancelled:
+                                cancelled = True
+                                break
+                TRACER.count("scan.files", walked)
+                if context is not None:
+                    context.report("比对", walked)
+                # A cancelled walk only knows the directories it has listed, so
+                # missing files are resolved the incremental way.
+                apply_mode = "incremental" if cancelled else mode
+                with TRACER.span("scan.diff", "scan"):
+                    moves = self._confirm_moves(self._move_candidates(apply_mode))
+                with TRACER.span("scan.commit", "scan"), self._db.transaction() as conn:
+                    added, changed, removed, moved = self._apply_staging(
+                        conn, root, source, apply_mode, now, moves
+                    )
+                    if context is not None:
+                        context.report("提交", walked)
+            finally:
+                self._drop_staging()
+        return ScanSummary(
+            root=root,
+            added=added,
+            changed=changed,
+            removed=removed,
+            mode=mode,
+            cancelled=cancelled,
+            moved=moved,
+        )
 
-        existing = {
-            row["abs_path"]: row
-            for row in self._db.execute(
-                "SELECT abs_path, size, mtime FROM file_index"
-            ).fetchall()
-        }
-        seen: set[str] = set()
-        added = changed = 0
-
-        for path in root.rglob("*"):
-            if not path.is_file():
-                continue
-            abs_path = str(path)
-            rel_path = str(path.relative_to(root))
-            stat = path.stat()
-            quick_sig = f"{stat.st_size}:{stat.st_mtime}"
-            seen.add(abs_path)
-            existing_row = existing.get(abs_path)
-            if existing_row is None:
-                added += 1
-                self._db.execute(
-                    """
-                    INSERT INTO file_index (
-                        abs_path, rel_path, file_name, ext, size, mtime, quick_sig,
-                        sha1, first_seen_at, last_seen_at, status, source
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """,
-                    (
-                        abs_path,
-                        rel_path,
-                        path.name,
-                        path.suffix,
-                        stat.st_size,
-                        stat.st_mtime,
-                        quick_sig,
-                        None,
-                        now,
-                        now,
-                        "normal",
-                        source,
-                    ),
+    @contextmanager
+    def scans_paused(self) -> Iterator[None]:
+        """Hold off scans, including the watcher's, while files are moved on purpose."""
+        with self._scan_lock:
+            yield
+
+    def count_files(self, filter_text: str = "") -> int:
+        where, params = self._page_filter(filter_text)
+        return self._db.query_one(f"SELECT COUNT(*) FROM file_index WHERE {where}", params)[0]
+
+    def page(
+        self,
+        sort: str = "file_name",
+        descending: bool = False,
+        filter_text: str = "",
+        after: tuple | None = None,
+        limit: int = 200,
+    ) -> list[tuple]:
+        """Return up to ``limit`` rows ordered by ``sort`` and ``id``, as tuples
+        in ``PAGE_COLUMNS`` order.
+
+        ``after`` is the ``(sort value, id)`` of the last row already shown. The
+        query seeks past it through the sort index instead of using OFFSET, so
+        every page costs the same however deep the user has scrolled.
+        """
+        key = SORT_KEYS[sort]
+        direction, beyond = ("DESC", "<") if descending else ("ASC", ">")
+        columns = ", ".join(PAGE_COLUMNS)
+        where, params = self._page_filter(filter_text)
+        if after is None:
+            sql = f"""
+                SELECT {columns} FROM file_index WHERE {where}
+                ORDER BY {key} {direction}, id {direction} LIMIT ?
+            """
+            rows = self._db.query(sql, params + (limit,))
+        else:
+            # Row-value comparisons only use the first index column, so the
+            # rest of the current key's run and the keys past it are separate seeks.
+            value, last_id = after
+            sql = f"""
+                SELECT * FROM (
+                    SELECT {columns} FROM file_index
+                    WHERE {where} AND {key} = ? AND id {beyond} ?
+                    ORDER BY id {direction} LIMIT ?
                 )
-            elif existing_row["size"] != stat.st_size or existing_row["mtime"] != stat.st_mtime:
-                changed += 1
-                self._db.execute(
-                    """
-                    UPDATE file_index
-                    SET rel_path = ?, file_name = ?, ext = ?, size = ?, mtime = ?,
-                        quick_sig = ?, last_seen_at = ?, status = ?
-                    WHERE abs_path = ?
-                    """,
-                    (
-                        rel_path,
-                        path.name,
-                        path.suffix,
-                        stat.st_size,
-                        stat.st_mtime,
-                        quick_sig,
-                        now,
-                        "changed",
-                        abs_path,
-                    ),
+                UNION ALL
+                SELECT * FROM (
+                    SELECT {columns} FROM file_index
+                    WHERE {where} AND {key} {beyond} ?
+                    ORDER BY {key} {direction}, id {direction} LIMIT ?
                 )
-            else:
-                self._db.execute(
-                    "UPDATE file_index SET last_seen_at = ?, status = ? WHERE abs_path = ?",
-                    (now, "normal", abs_path),
+                ORDER BY {key} {direction}, id {direction}
+                LIMIT ?
+            """
+            rows = self._db.query(
+                sql, params + (value, last_id, limit) + params + (value, limit, limit)
+            )
+        return [tuple(row) for row in rows]
+
+    @staticmethod
+    def _page_filter(filter_text: str) -> tuple[str, tuple]:
+        where = "status != 'missing'"
+        params: tuple = ()
+        text = filter_text.strip()
+        if text:
+            for char in ("\\", "%", "_"):
+                text = text.replace(char, "\\" + char)
+            pattern = f"%{text}%"
+            where += " AND (file_name LIKE ? ESCAPE '\\' OR rel_path LIKE ? ESCAPE '\\')"
+            params = (pattern, pattern)
+        return where, params
+
+    def _create_staging(self) -> None:
+        with self._db.transaction() as conn:
+            conn.execute(
+                """
+                CREATE TEMP TABLE IF NOT EXISTS scan_seen (
+                    abs_path TEXT PRIMARY KEY,
+                    dir_path TEXT,
+                    rel_path TEXT,
+                    file_name TEXT,
+                    ext TEXT,
+                    size INTEGER,
+                    mtime REAL,
+                    quick_sig TEXT,
+                    inode INTEGER,
+                    device INTEGER
+                ) WITHOUT ROWID
+                """
+            )
+            conn.execute(
+                """
+                CREATE TEMP TABLE IF NOT EXISTS scan_dirs (
+                    path TEXT PRIMARY KEY,
+                    parent_path TEXT,
+                    mtime REAL,
+                    child_count INTEGER,
+                    subdir_count INTEGER,
+                    state TEXT
+                ) WITHOUT ROWID
+                """
+            )
+            conn.execute(
+                "CREATE TEMP TABLE IF NOT EXISTS scan_new (abs_path TEXT PRIMARY KEY) WITHOUT ROWID"
+            )
+            conn.execute("CREATE TEMP TABLE IF NOT EXISTS scan_gone (id INTEGER PRIMARY KEY)")
+            conn.execute(
+                """
+                CREATE TEMP TABLE IF NOT EXISTS scan_moves (
+                    file_id INTEGER PRIMARY KEY,
+                    abs_path TEXT UNIQUE
                 )
+                """
+            )
+            for table in _STAGING_TABLES:
+                conn.execute(f"DELETE FROM temp.{table}")
+
+    def _drop_staging(self) -> None:
+        with self._db.transaction() as conn:
+            for table in _STAGING_TABLES:
+                conn.execute(f"DROP TABLE IF EXISTS temp.{table}")
+
+    def _stage_batch(self, batch: WalkBatch) -> None:
+        with self._db.transaction() as conn:
+            conn.executemany(
+                """
+                INSERT OR REPLACE INTO temp.scan_seen (
+                    abs_path, dir_path, rel_path, file_name, ext, size, mtime, quick_sig,
+                    inode, device
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                [
+                    (
+                        entry.abs_path,
+                        os.path.dirname(entry.abs_path),
+                        entry.rel_path,
+                        entry.file_name,
+                        entry.ext,
+                        entry.size,
+                        entry.mtime,
+                        f"{entry.size}:{entry.mtime}",
+                        entry.inode,
+                        entry.device,
+                    )
+                    for entry in batch.files
+                ],
+            )
+            conn.executemany(
+                """
+                INSERT OR IGNORE INTO temp.scan_dirs (
+                    path, parent_path, mtime, child_count, subdir_count, state
+                ) VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                [
+                    (
+                        record.path,
+                        record.parent_path,
+                        record.mtime,
+                        record.child_count,
+                        record.subdir_count,
+                        "listed" if record.listed else "kept",
+                    )
+                    for record in batch.dirs
+                ],
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO temp.scan_dirs (path, state) VALUES (?, 'gone')",
+                [(path,) for path in batch.gone_dirs],
+            )
+
+    def _move_candidates(self, mode: str) -> list[sqlite3.Row]:
+        """Stage new paths and vanished rows, and pair them up by inode.
+
+        Returns the remaining (size, mtime) pairs that need a closer look;
+        those are confirmed outside the write lock since that reads files.
+        """
+        with self._db.transaction() as conn:
+            conn.execute(
+                """
+                INSERT INTO temp.scan_new (abs_path)
+                SELECT s.abs_path FROM temp.scan_seen s
+                WHERE NOT EXISTS (SELECT 1 FROM file_index f WHERE f.abs_path = s.abs_path)
+                """
+            )
+            if conn.execute("SELECT 1 FROM temp.scan_new LIMIT 1").fetchone() is None:
+                return []
+            gone_sql = """
+                INSERT INTO temp.scan_gone (id)
+                SELECT id FROM file_index
+                WHERE status = 'missing' OR (
+                    status != 'disabled'
+                    AND NOT EXISTS (
+                        SELECT 1 FROM temp.scan_seen s WHERE s.abs_path = file_index.abs_path
+                    )
+            """
+            if mode != "full":
+                gone_sql += """
+                    AND dir_path IN (
+                        SELECT path FROM temp.scan_dirs WHERE state IN ('listed', 'gone')
+                    )
+                """
+            conn.execute(gone_sql + ")")
+            if conn.execute("SELECT 1 FROM temp.scan_gone LIMIT 1").fetchone() is None:
+                return []
+            # Same inode on the same device, untouched size and mtime: a rename.
+            conn.execute(
+                """
+                INSERT OR IGNORE INTO temp.scan_moves (file_id, abs_path)
+                SELECT f.id, s.abs_path
+                FROM temp.scan_new n
+                CROSS JOIN temp.scan_seen s ON s.abs_path = n.abs_path
+                CROSS JOIN file_index f ON f.inode = s.inode AND f.device = s.device
+                CROSS JOIN temp.scan_gone g ON g.id = f.id
+                WHERE s.inode != 0
+                    AND f.size IS s.size
+                    AND f.mtime IS s.mtime
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS temp.idx_scan_seen_size ON scan_seen(size, mtime)"
+            )
+            # Driven from the vanished rows, which are few next to the new ones
+            # on a first scan.
+            return conn.execute(
+                """
+                SELECT s.abs_path, s.file_name AS new_name, f.id, f.file_name,
+                    f.quick_sig, f.partial_hash, f.partial_sig
+                FROM temp.scan_gone g
+                CROSS JOIN file_index f ON f.id = g.id
+                CROSS JOIN temp.scan_seen s ON s.size = f.size AND s.mtime = f.mtime
+                CROSS JOIN temp.scan_new n ON n.abs_path = s.abs_path
+                WHERE g.id NOT IN (SELECT file_id FROM temp.scan_moves)
+                    AND s.abs_path NOT IN (SELECT abs_path FROM temp.scan_moves)
+                """
+            ).fetchall()
+
+    @staticmethod
+    def _confirm_moves(candidates: list[sqlite3.Row]) -> list[tuple[int, str]]:
+        by_path: dict[str, list[sqlite3.Row]] = {}
+        claims: dict[int, int] = {}
+        for row in candidates:
+            by_path.setdefault(row["abs_path"], []).append(row)
+            claims[row["id"]] = claims.get(row["id"], 0) + 1
+        moves: list[tuple[int, str]] = []
+        taken: set[int] = set()
+        for path, rows in by_path.items():
+            hashed = [
+                row
+                for row in rows
+                if row["partial_hash"] is not None and row["partial_sig"] == row["quick_sig"]
+            ]
+            if hashed:
+                try:
+                    digest = partial_sha1(path)
+                except OSError:
+                    continue
+                matches = [row for row in hashed if row["partial_hash"] == digest]
+            elif len(rows) == 1 and claims[rows[0]["id"]] == 1:
+                # Without a stored hash, only an unambiguous same-name pair counts.
+                matches = [row for row in rows if row["file_name"] == row["new_name"]]
+            else:
+                matches = []
+            for row in matches:
+                if row["id"] not in taken:
+                    taken.add(row["id"])
+                    moves.append((row["id"], path))
+                    break
+        return moves
+
+    def _apply_staging(
+        self,
+        conn: sqlite3.Connection,
+        root: Path,
+        source: str,
+        mode: str,
+        now: str,
+        moves: list[tuple[int, str]],
+    ) -> tuple[int, int, int, int]:
+        conn.execute(
+            """
+            INSERT INTO dir_index (
+                path, parent_path, mtime, child_count, subdir_count, last_scanned_at
+            )
+            SELECT path, parent_path, mtime, child_count, subdir_count, ?
+            FROM temp.scan_dirs WHERE state = 'listed'
+            ON CONFLICT(path) DO UPDATE SET
+                parent_path = excluded.parent_path,
+                mtime = excluded.mtime,
+                child_count = excluded.child_count,
+                subdir_count = excluded.subdir_count,
+                last_scanned_at = excluded.last_scanned_at
+            """,
+            (now,),
+        )
+        conn.executemany(
+            "INSERT OR IGNORE INTO temp.scan_moves (file_id, abs_path) VALUES (?, ?)", moves
+        )
+        # Moved rows keep their id, first_seen_at, hashes and everything that
+        # references them; only the path columns follow the file. A renamed
+        # file leaves its old name group and may join a new one, so its
+        # duplicate check is redone.
+        moved = conn.execute(
+            """
+            UPDATE file_index
+            SET abs_path = s.abs_path, rel_path = s.rel_path, file_name = s.file_name,
+                ext = s.ext, dir_path = s.dir_path, inode = s.inode, device = s.device,
+                last_seen_at = ?,
+                dup_sig = CASE WHEN file_index.file_name = s.file_name
+                    THEN file_index.dup_sig END,
+                status = CASE WHEN file_index.status = 'missing' THEN 'normal'
+                    ELSE file_index.status END
+            FROM temp.scan_moves AS m JOIN temp.scan_seen AS s ON s.abs_path = m.abs_path
+            WHERE file_index.id = m.file_id
+                AND NOT EXISTS (SELECT 1 FROM file_index g WHERE g.abs_path = s.abs_path)
+            """,
+            (now,),
+        ).rowcount
+        conn.execute(
+            """
+            UPDATE file_index SET inode = s.inode, device = s.device
+            FROM temp.scan_seen AS s
+            WHERE file_index.abs_path = s.abs_path
+                AND (file_index.inode IS NOT s.inode OR file_index.device IS NOT s.device)
+            """
+        )
+        conn.execute(
+            """
+            UPDATE file_index SET status = 'normal', last_seen_at = ?
+            FROM temp.scan_seen AS s
+            WHERE file_index.abs_path = s.abs_path
+                AND file_index.status != 'normal'
+                AND file_index.size IS s.size
+                AND file_index.mtime IS s.mtime
+            """,
+            (now,),
+        )
+        changed = conn.execute(
+            """
+            UPDATE file_index
+            SET rel_path = s.rel_path, file_name = s.file_name, ext = s.ext,
+                size = s.size, mtime = s.mtime, quick_sig = s.quick_sig,
+                dir_path = s.dir_path, last_seen_at = ?, status = 'changed'
+            FROM temp.scan_seen AS s
+            WHERE file_index.abs_path = s.abs_path
+                AND (file_index.size IS NOT s.size OR file_index.mtime IS NOT s.mtime)
+            """,
+            (now,),
+        ).rowcount
+        added = conn.execute(
+            """
+            INSERT INTO file_index (
+                abs_path, rel_path, file_name, ext, size, mtime, quick_sig, sha1,
+                first_seen_at, last_seen_at, status, source, dir_path, inode, device
+            )
+            SELECT s.abs_path, s.rel_path, s.file_name, s.ext, s.size, s.mtime,
+                s.quick_sig, NULL, ?, ?, 'normal', ?, s.dir_path, s.inode, s.device
+            FROM temp.scan_seen AS s
+            WHERE NOT EXISTS (SELECT 1 FROM file_index f WHERE f.abs_path = s.abs_path)
+            """,
+            (now, now, source),
+        ).rowcount
 
-        removed = 0
-        for abs_path in existing.keys() - seen:
-            removed += 1
-            self._db.execute(
-                "UPDATE file_index SET status = ?, last_seen_at = ? WHERE abs_path = ?",
-                ("missing", now, abs_path),
+        missing_sql = """
+            UPDATE file_index SET status = 'missing', last_seen_at = ?
+            WHERE status NOT IN ('missing', 'disabled')
+                AND NOT EXISTS (
+                    SELECT 1 FROM temp.scan_seen s WHERE s.abs_path = file_index.abs_path
+                )
+        """
+        if mode == "full":
+            removed = conn.execute(missing_sql, (now,)).rowcount
+            root_str, prefix, upper = self._path_range(root)
+            conn.execute(
+                """
+                DELETE FROM dir_index
+                WHERE (path = ? OR (path >= ? AND path < ?))
+                    AND path NOT IN (SELECT path FROM temp.scan_dirs)
+                """,
+                (root_str, prefix, upper),
             )
+        else:
+            removed = conn.execute(
+                missing_sql
+                + """
+                AND dir_path IN (
+                    SELECT path FROM temp.scan_dirs WHERE state IN ('listed', 'gone')
+                )
+                """,
+                (now,),
+            ).rowcount
+            conn.execute(
+                """
+                DELETE FROM dir_index
+                WHERE path IN (SELECT path FROM temp.scan_dirs WHERE state = 'gone')
+                """
+            )
+        return added, changed, removed, moved
+
+    @staticmethod
+    def _path_range(root: Path) -> tuple[str, str, str]:
+        root_str = str(root)
+        prefix = root_str if root_str.endswith(os.sep) else root_str + os.sep
+        return root_str, prefix, prefix[:-1] + chr(ord(os.sep) + 1)
 
-        self._db.commit()
-        return ScanSummary(root=root, added=added, changed=changed, removed=removed)
+    def _dir_rows_under(self, root: Path) -> list[sqlite3.Row]:
+        return self._db.query(
+            """
+            SELECT path, parent_path, mtime, child_count, subdir_count FROM dir_index
+            WHERE path = ? OR (path >= ? AND path < ?)
+            """,
+            self._path_range(root),
+        )
+
+    def _known_dirs(self, root: Path) -> dict[str, KnownDir]:
+        rows = self._dir_rows_under(root)
+        children: dict[str, list[str]] = {}
+        for row in rows:
+            if row["parent_path"] is not None:
+                children.setdefault(row["parent_path"], []).append(row["path"])
+        return {
+            row["path"]: KnownDir(
+                mtime=row["mtime"],
+                child_count=row["child_count"],
+                subdir_count=row["subdir_count"],
+                subdirs=tuple(children.get(row["path"], ())),
+            )
+            for row in rows
+        }
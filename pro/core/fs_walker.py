@@ -0,0 +1,232 @@
+from __future__ import annotations
+
+import os
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Collection, Iterator, Mapping
+
+
+@dataclass(frozen=True)
+class FileEntry:
+    abs_path: str
+    rel_path: str
+    file_name: str
+    ext: str
+    size: int
+    mtime: float
+    inode: int = 0
+    device: int = 0
+
+
+@dataclass(frozen=True)
+class DirRecord:
+    path: str
+    parent_path: str | None
+    mtime: float
+    child_count: int
+    subdir_count: int
+    listed: bool
+
+
+@dataclass(frozen=True)
+class KnownDir:
+    mtime: float
+    child_count: int
+    subdir_count: int
+    subdirs: tuple[str, ...] = ()
+
+    @property
+    def complete(self) -> bool:
+        return len(self.subdirs) == self.subdir_count
+
+
+@dataclass
+class WalkBatch:
+    files: list[FileEntry] = field(default_factory=list)
+    dirs: list[DirRecord] = field(default_factory=list)
+    gone_dirs: list[str] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.files) + len(self.dirs)
+
+
+def _suffix(name: str) -> str:
+    index = name.rfind(".")
+    if 0 < index < len(name) - 1:
+        return name[index:]
+    return ""
+
+
+def _outermost(paths: Collection[str], root: str) -> list[str]:
+    """Drop paths outside ``root`` and paths below another path in the set."""
+    kept: set[str] = set()
+    for path in sorted(paths, key=len):
+        parent = path
+        while parent != root:
+            parent, previous = os.path.dirname(parent), parent
+            if parent == previous:
+                break
+            if parent in kept:
+                break
+        else:
+            kept.add(path)
+    return sorted(kept)
+
+
+class FsWalker:
+    def __init__(self, max_workers: int = 8, batch_size: int = 2000) -> None:
+        self._max_workers = max(1, max_workers)
+        self._batch_size = max(1, batch_size)
+
+    def walk(
+        self,
+        root: Path,
+        known_dirs: Mapping[str, KnownDir] | None = None,
+        start_dirs: Collection[str] | None = None,
+    ) -> Iterator[WalkBatch]:
+        """Yield batches of files and directories below ``root``.
+
+        With ``known_dirs`` the walk is incremental: a directory whose mtime
+        matches its known record is not listed again, only its known
+        subdirectories are visited. ``start_dirs`` limits the walk to those
+        directories (always listed) and whatever changed beneath them.
+        """
+        root_str = str(root)
+        prefix_len = len(root_str) if root_str.endswith(os.sep) else len(root_str) + 1
+        known = known_dirs or {}
+        force = frozenset(start_dirs or ())
+        starts: list[tuple[str, str | None]] = [(root_str, None)]
+        if start_dirs is not None:
+            starts = [
+                (path, None if path == root_str else os.path.dirname(path))
+                for path in _outermost(force, root_str)
+            ]
+        batch = WalkBatch()
+        with ThreadPoolExecutor(
+            max_workers=self._max_workers, thread_name_prefix="fs-walker"
+        ) as executor:
+            pending: set[Future] = {
+                executor.submit(self._visit, path, parent, None, prefix_len, known, force)
+                for path, parent in starts
+            }
+            try:
+                while pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        files, record, subdirs, gone = future.result()
+                        for subdir, mtime in subdirs:
+                            pending.add(
+                                executor.submit(
+                                    self._visit,
+                                    subdir,
+                                    record.path,
+                                    mtime,
+                                    prefix_len,
+                                    known,
+                                    force,
+                                )
+                            )
+                        batch.files.extend(files)
+                        batch.dirs.append(record)
+                        batch.gone_dirs.extend(gone)
+                        if len(batch) >= self._batch_size:
+                            yield batch
+                            batch = WalkBatch()
+            finally:
+                for future in pending:
+                    future.cancel()
+        if len(batch) or batch.gone_dirs:
+            yield batch
+
+    def _visit(
+        self,
+        dir_path: str,
+        parent_path: str | None,
+        mtime: float | None,
+        prefix_len: int,
+        known: Mapping[str, KnownDir],
+        force: frozenset[str] = frozenset(),
+    ) -> tuple[list[FileEntry], DirRecord, list[tuple[str, float | None]], list[str]]:
+        if mtime is None:
+            try:
+                mtime = os.stat(dir_path).st_mtime
+            except OSError:
+                record = DirRecord(dir_path, parent_path, 0.0, 0, 0, listed=False)
+                return [], record, [], self._subtree(dir_path, known)
+        known_dir = known.get(dir_path)
+        if (
+            known_dir is not None
+            and known_dir.mtime == mtime
+            and known_dir.complete
+            and dir_path not in force
+        ):
+            record = DirRecord(
+                dir_path,
+                parent_path,
+                mtime,
+                known_dir.child_count,
+                known_dir.subdir_count,
+                listed=False,
+            )
+            return [], record, [(subdir, None) for subdir in known_dir.subdirs], []
+
+        files, subdirs, child_count = self._list_dir(dir_path, prefix_len)
+        record = DirRecord(dir_path, parent_path, mtime, child_count, len(subdirs), listed=True)
+        gone: list[str] = []
+        if known_dir is not None:
+            present = {subdir for subdir, _ in subdirs}
+            for subdir in known_dir.subdirs:
+                if subdir not in present:
+                    gone.extend(self._subtree(subdir, known))
+        return files, record, subdirs, gone
+
+    @staticmethod
+    def _subtree(dir_path: str, known: Mapping[str, KnownDir]) -> list[str]:
+        result: list[str] = []
+        stack = [dir_path]
+        while stack:
+            path = stack.pop()
+            result.append(path)
+            known_dir = known.get(path)
+            if known_dir is not None:
+                stack.extend(known_dir.subdirs)
+        return result
+
+    @staticmethod
+    def _list_dir(
+        dir_path: str, prefix_len: int
+    ) -> tuple[list[FileEntry], list[tuple[str, float | None]], int]:
+        files: list[FileEntry] = []
+        subdirs: list[tuple[str, float | None]] = []
+        child_count = 0
+        try:
+            iterator = os.scandir(dir_path)
+        except OSError:
+            return files, subdirs, child_count
+        with iterator:
+            for entry in iterator:
+                child_count += 1
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append((entry.path, entry.stat(follow_symlinks=False).st_mtime))
+                        continue
+                    if not entry.is_file():
+                        continue
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                name = entry.name
+                files.append(
+                    FileEntry(
+                        abs_path=entry.path,
+                        rel_path=entry.path[prefix_len:],
+                        file_name=name,
+                        ext=_suffix(name),
+                        size=stat.st_size,
+                        mtime=stat.st_mtime,
+                        inode=entry.inode(),
+                        device=stat.st_dev,
+                    )
+                )
+        return files, subdirs, child_count
@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+import os
+import re
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable
+
+from .db_service import DBService
+from .move_engine import MoveEngine, MoveItem, MoveSummary
+from .task_service import TaskContext
+
+DISABLED_DIR = "__DISABLED__"
+SAFE_MODE_DIR = "__SAFE_MODE__"
+_UNSAFE_NAME = re.compile(r'[<>:"/\\|?*\x00-\x1f]')
+
+
+@dataclass(frozen=True)
+class Group:
+    group_id: int
+    name: str
+    parent_id: int | None
+    member_count: int
+    disabled_count: int
+
+
+def parking_root(mods_root: Path) -> Path:
+    # The game loads packages from any depth below Mods, so parked files have
+    # to live beside it rather than inside it.
+    return mods_root.expanduser().parent / DISABLED_DIR
+
+
+def _folder_name(name: str) -> str:
+    return _UNSAFE_NAME.sub("_", name).strip(" .") or "_"
+
+
+class GroupService:
+    def __init__(self, db: DBService, engine: MoveEngine) -> None:
+        self._db = db
+        self._engine = engine
+
+    @property
+    def engine(self) -> MoveEngine:
+        return self._engine
+
+    def groups(self) -> list[Group]:
+        rows = self._db.query(
+            """
+            SELECT g.id, g.name, g.parent_id,
+                (SELECT COUNT(*) FROM group_members m WHERE m.group_id = g.id) AS members,
+                (SELECT COUNT(*) FROM disabled_map d WHERE d.group_id = g.id) AS disabled
+            FROM groups g ORDER BY g.name COLLATE NOCASE
+            """
+        )
+        return [
+            Group(
+                group_id=row["id"],
+                name=row["name"],
+                parent_id=row["parent_id"],
+                member_count=row["members"],
+                disabled_count=row["disabled"],
+            )
+            for row in rows
+        ]
+
+    def create_group(self, name: str, parent_id: int | None = None) -> int:
+        with self._db.transaction() as conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO groups (name, parent_id, created_at) VALUES (?, ?, ?)",
+                (name, parent_id, datetime.now().isoformat(timespec="seconds")),
+            )
+            return conn.execute("SELECT id FROM groups WHERE name = ?", (name,)).fetchone()[0]
+
+    def add_files(self, group_id: int, file_ids: Iterable[int]) -> int:
+        now = datetime.now().isoformat(timespec="seconds")
+        with self._db.transaction() as conn:
+            before = conn.total_changes
+            conn.executemany(
+                """
+                INSERT OR IGNORE INTO group_members (group_id, member_type, ref, created_at)
+                VALUES (?, 'file', ?, ?)
+                """,
+                ((group_id, str(file_id), now) for file_id in file_ids),
+            )
+            return conn.total_changes - before
+
+    def plan_disable(self, group_id: int, mods_root: Path) -> list[MoveItem]:
+        name = self._group_name(group_id)
+        target = parking_root(mods_root) / _folder_name(name)
+        rows = self._db.query(
+            """
+            SELECT f.id, f.abs_path, f.rel_path
+            FROM group_members m
+            JOIN file_index f ON f.id = CAST(m.ref AS INTEGER)
+            WHERE m.group_id = ? AND m.member_type = 'file'
+                AND f.status IN ('normal', 'changed')
+            ORDER BY f.abs_path
+            """,
+            (group_id,),
+        )
+        return [
+            MoveItem(
+                file_id=row["id"],
+                src=row["abs_path"],
+                dst=os.path.join(target, row["rel_path"]),
+                kind="disable",
+                group_id=group_id,
+            )
+            for row in rows
+        ]
+
+    def plan_enable(self, group_id: int) -> list[MoveItem]:
+        rows = self._db.query(
+            """
+            SELECT file_id, abs_path_src, abs_path_disabled, reason FROM disabled_map
+            WHERE group_id = ? ORDER BY abs_path_src
+            """,
+            (group_id,),
+        )
+        return [
+            MoveItem(
+                file_id=row["file_id"],
+                src=row["abs_path_disabled"],
+                dst=row["abs_path_src"],
+                kind="enable",
+                group_id=group_id,
+                reason=row["reason"],
+            )
+            for row in rows
+        ]
+
+    def plan_safe_mode(self, mods_root: Path) -> list[MoveItem]:
+        """Every active script archive; packages stay, so only code is switched off."""
+        target = parking_root(mods_root) / SAFE_MODE_DIR
+        rows = self._db.query(
+            """
+            SELECT f.id, f.abs_path, f.rel_path
+            FROM script_files s JOIN file_index f ON f.id = s.file_id
+            WHERE f.status IN ('normal', 'changed')
+                AND (s.pyc_count + s.py_count > 0 OR lower(f.ext) = '.ts4script')
+            ORDER BY f.abs_path
+            """
+        )
+        return [
+            MoveItem(
+                file_id=row["id"],
+                src=row["abs_path"],
+                dst=os.path.join(target, row["rel_path"]),
+                kind="disable",
+                reason="safe_mode",
+            )
+            for row in rows
+        ]
+
+    def plan_leave_safe_mode(self) -> list[MoveItem]:
+        rows = self._db.query(
+            """
+            SELECT file_id, abs_path_src, abs_path_disabled FROM disabled_map
+            WHERE reason = 'safe_mode' ORDER BY abs_path_src
+            """
+        )
+        return [
+            MoveItem(
+                file_id=row["file_id"],
+                src=row["abs_path_disabled"],
+                dst=row["abs_path_src"],
+                kind="enable",
+                reason="safe_mode",
+            )
+            for row in rows
+        ]
+
+    def enter_safe_mode(self, mods_root: Path, context: TaskContext | None = None) -> MoveSummary:
+        return self._engine.run("safe_mode", self.plan_safe_mode(mods_root), context=context)
+
+    def leave_safe_mode(self, context: TaskContext | None = None) -> MoveSummary:
+        return self._engine.run("leave_safe_mode", self.plan_leave_safe_mode(), context=context)
+
+    def disable(
+        self, group_id: int, mods_root: Path, context: TaskContext | None = None
+    ) -> MoveSummary:
+        items = self.plan_disable(group_id, mods_root)
+        payload = {"group_id": group_id, "group": self._group_name(group_id)}
+        return self._engine.run("disable", items, payload, context=context)
+
+    def enable(self, group_id: int, context: TaskContext | None = None) -> MoveSummary:
+        items = self.plan_enable(group_id)
+        payload = {"group_id": group_id, "group": self._group_name(group_id)}
+        return self._engine.run("enable", items, payload, context=context)
+
+    def _group_name(self, group_id: int) -> str:
+        row = self._db.query_one("SELECT name FROM groups WHERE id = ?", (group_id,))
+        if row is None:
+            raise KeyError(group_id)
+        return row["name"]
@@ -0,0 +1,220 @@
+from __future__ import annotations
+
+import hashlib
+import mmap
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable
+
+from .db_service import DBService
+from .task_service import TaskCancelled, TaskContext
+
+
+CHUNK_SIZE = 1 << 20
+MMAP_THRESHOLD = 8 << 20
+PARTIAL_SPAN = 64 << 10
+
+
+@dataclass(frozen=True)
+class HashSummary:
+    hashed: int
+    failed: int
+    bytes_read: int
+    cancelled: bool = False
+
+
+class IoThrottle:
+    def __init__(self, bytes_per_sec: int | None = None) -> None:
+        self._rate = bytes_per_sec
+        self._lock = threading.Lock()
+        self._allowance = float(bytes_per_sec or 0)
+        self._last = time.monotonic()
+        self._resume = threading.Event()
+        self._resume.set()
+
+    def pause(self) -> None:
+        self._resume.clear()
+
+    def resume(self) -> None:
+        self._resume.set()
+
+    def consume(self, amount: int, should_stop: Callable[[], bool] | None = None) -> None:
+        while not self._resume.wait(0.2):
+            if should_stop is not None and should_stop():
+                return
+        if not self._rate:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self._allowance = min(
+                float(self._rate), self._allowance + (now - self._last) * self._rate
+            )
+            self._last = now
+            self._allowance -= amount
+            delay = -self._allowance / self._rate if self._allowance < 0 else 0.0
+        if delay > 0:
+            time.sleep(delay)
+
+
+def sha1_file(
+    path: str,
+    throttle: IoThrottle | None = None,
+    should_stop: Callable[[], bool] | None = None,
+) -> str:
+    digest = hashlib.sha1()
+    with open(path, "rb", buffering=0) as handle:
+        size = os.fstat(handle.fileno()).st_size
+        if size >= MMAP_THRESHOLD:
+            with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                view = memoryview(mapped)
+                try:
+                    for offset in range(0, size, CHUNK_SIZE):
+                        if should_stop is not None and should_stop():
+                            raise TaskCancelled()
+                        chunk = view[offset : offset + CHUNK_SIZE]
+                        digest.update(chunk)
+                        chunk.release()
+                        if throttle is not None:
+                            throttle.consume(CHUNK_SIZE, should_stop)
+                finally:
+                    view.release()
+        else:
+            buffer = bytearray(CHUNK_SIZE)
+            view = memoryview(buffer)
+            while True:
+                if should_stop is not None and should_stop():
+                    raise TaskCancelled()
+                read = handle.readinto(buffer)
+                if not read:
+                    break
+                digest.update(view[:read])
+                if throttle is not None:
+                    throttle.consume(read, should_stop)
+    return digest.hexdigest()
+
+
+def partial_sha1(path: str, span: int = PARTIAL_SPAN) -> str:
+    digest = hashlib.sha1()
+    with open(path, "rb", buffering=0) as handle:
+        size = os.fstat(handle.fileno()).st_size
+        digest.update(str(size).encode("ascii"))
+        digest.update(handle.read(span))
+        if size > span:
+            handle.seek(max(span, size - span))
+            digest.update(handle.read(span))
+    return digest.hexdigest()
+
+
+def _lower_thread_priority() -> None:
+    if sys.platform.startswith("linux") and hasattr(os, "setpriority"):
+        try:
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 10)
+        except OSError:
+            pass
+
+
+class HashService:
+    def __init__(
+        self,
+        db: DBService,
+        max_workers: int = 2,
+        bytes_per_sec: int | None = 64 << 20,
+        page_size: int = 256,
+    ) -> None:
+        self._db = db
+        self._max_workers = max(1, max_workers)
+        self._page_size = page_size
+        self._throttle = IoThrottle(bytes_per_sec)
+
+    def ensure_schema(self) -> None:
+        self._db.ensure_columns("file_index", {"sha1_sig": "TEXT"})
+        with self._db.transaction() as conn:
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_file_index_sha1 ON file_index(sha1)")
+
+    def pause(self) -> None:
+        self._throttle.pause()
+
+    def resume(self) -> None:
+        self._throttle.resume()
+
+    def pending_count(self) -> int:
+        return self._db.query_one(
+            """
+            SELECT COUNT(*) FROM file_index
+            WHERE status != 'missing' AND sha1_sig IS NOT quick_sig
+            """
+        )[0]
+
+    def adopt_known(self) -> int:
+        """Copy hashes computed while downloading onto unchanged indexed files."""
+        with self._db.transaction() as conn:
+            return conn.execute(
+                """
+                UPDATE file_index SET sha1 = d.sha1, sha1_sig = file_index.quick_sig
+                FROM downloads AS d
+                WHERE d.file_path = file_index.abs_path
+                    AND d.quick_sig = file_index.quick_sig
+                    AND d.sha1 IS NOT NULL
+                    AND file_index.sha1_sig IS NOT file_index.quick_sig
+                """
+            ).rowcount
+
+    def run(self, context: TaskContext | None = None) -> HashSummary:
+        should_stop = (lambda: context.cancelled) if context is not None else None
+        self.adopt_known()
+        total = self.pending_count()
+        hashed = failed = bytes_read = 0
+        last_id = 0
+        with ThreadPoolExecutor(
+            max_workers=self._max_workers,
+            thread_name_prefix="hash-worker",
+            initializer=_lower_thread_priority,
+        ) as executor:
+            while True:
+                rows = self._db.query(
+                    """
+                    SELECT id, abs_path, size, quick_sig FROM file_index
+                    WHERE id > ? AND status != 'missing' AND sha1_sig IS NOT quick_sig
+                    ORDER BY id
+                    LIMIT ?
+                    """,
+                    (last_id, self._page_size),
+                )
+                if not rows:
+                    break
+                last_id = rows[-1]["id"]
+                futures = [
+                    (row, executor.submit(sha1_file, row["abs_path"], self._throttle, should_stop))
+                    for row in rows
+                ]
+                results = []
+                for row, future in futures:
+                    try:
+                        sha1 = future.result()
+                    except TaskCancelled:
+                        continue
+                    except OSError:
+                        # Leave sha1_sig alone so the next run retries the file.
+                        failed += 1
+                        continue
+                    hashed += 1
+                    bytes_read += row["size"] or 0
+                    results.append((sha1, row["quick_sig"], row["id"], row["quick_sig"]))
+                # Only store the hash if the file was not rescanned as changed meanwhile.
+                with self._db.transaction() as conn:
+                    conn.executemany(
+                        """
+                        UPDATE file_index SET sha1 = ?, sha1_sig = ?
+                        WHERE id = ? AND quick_sig = ?
+                        """,
+                        results,
+                    )
+                if context is not None:
+                    context.report("哈希", hashed + failed, total)
+                    if context.cancelled:
+                        return HashSummary(hashed, failed, bytes_read, cancelled=True)
+        return HashSummary(hashed, failed, bytes_read)
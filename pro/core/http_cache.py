@@ -0,0 +1,251 @@
+from __future__ import annotations
+
+import hashlib
+import http.client
+import os
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from urllib.parse import urljoin, urlsplit
+
+from .db_service import DBService
+from .download_service import (
+    MAX_REDIRECTS,
+    REDIRECT_STATUS,
+    RETRYABLE_STATUS,
+    USER_AGENT,
+    ConnectionPool,
+    DownloadError,
+)
+
+TOUCH_BATCH = 256
+EVICT_TO = 0.9
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    """``source`` is cache, revalidated, network or stale."""
+
+    url: str
+    body: bytes
+    content_sha1: str
+    source: str
+
+
+@dataclass(frozen=True)
+class CacheStats:
+    hits: int
+    revalidated: int
+    fetched: int
+    stale: int
+    evicted: int
+    stored_bytes: int
+
+
+class HttpCache:
+    """GET responses kept on disk, zlib-compressed and indexed in ``http_cache``.
+
+    An entry younger than ``max_age`` is served without touching the network;
+    an older one is revalidated with If-None-Match / If-Modified-Since. The
+    stored size is bounded by evicting least recently used entries.
+    """
+
+    def __init__(
+        self,
+        db: DBService,
+        cache_dir: Path,
+        max_bytes: int = 256 << 20,
+        max_age: float = 7 * 24 * 3600,
+        timeout: float = 30.0,
+    ) -> None:
+        self._db = db
+        self._cache_dir = cache_dir
+        self._max_bytes = max_bytes
+        self._max_age = max_age
+        self._pool = ConnectionPool(timeout=timeout)
+        self._lock = threading.Lock()
+        self._size = db.query_one("SELECT COALESCE(SUM(stored_size), 0) FROM http_cache")[0]
+        self._touched: dict[str, float] = {}
+        self._counts = {"hits": 0, "revalidated": 0, "fetched": 0, "stale": 0, "evicted": 0}
+
+    def get(self, url: str, max_age: float | None = None) -> CachedResponse:
+        max_age = self._max_age if max_age is None else max_age
+        row = self._db.query_one(
+            """
+            SELECT etag, last_modified, content_sha1, fetched_at FROM http_cache WHERE url = ?
+            """,
+            (url,),
+        )
+        body = self._read_body(url) if row is not None else None
+        now = time.time()
+        if body is not None and now - row["fetched_at"] < max_age:
+            self._touch(url, now, "hits")
+            return CachedResponse(url, body, row["content_sha1"], "cache")
+
+        headers = {"User-Agent": USER_AGENT, "Accept-Encoding": "gzip"}
+        if body is not None:
+            if row["etag"]:
+                headers["If-None-Match"] = row["etag"]
+            if row["last_modified"]:
+                headers["If-Modified-Since"] = row["last_modified"]
+        try:
+            status, response_headers, fresh = self._request(url, headers)
+            if status in RETRYABLE_STATUS:
+                raise DownloadError(f"HTTP {status}", retryable=True)
+        except (OSError, http.client.HTTPException, DownloadError):
+            if body is None:
+                raise
+            # Offline or the site is struggling: an old copy beats nothing.
+            self._touch(url, now, "stale")
+            return CachedResponse(url, body, row["content_sha1"], "stale")
+
+        if status == 304 and body is not None:
+            with self._db.transaction() as conn:
+                conn.execute(
+                    "UPDATE http_cache SET fetched_at = ?, used_at = ? WHERE url = ?",
+                    (now, now, url),
+                )
+            with self._lock:
+                self._counts["revalidated"] += 1
+            return CachedResponse(url, body, row["content_sha1"], "revalidated")
+        if status != 200:
+            raise DownloadError(f"HTTP {status}")
+        content_sha1 = hashlib.sha1(fresh).hexdigest()
+        self._store(url, fresh, content_sha1, response_headers, now)
+        return CachedResponse(url, fresh, content_sha1, "network")
+
+    def flush(self) -> None:
+        """Write pending last-used times; called by batch users when they finish."""
+        with self._lock:
+            touched, self._touched = self._touched, {}
+        if touched:
+            with self._db.transaction() as conn:
+                conn.executemany(
+                    "UPDATE http_cache SET used_at = ? WHERE url = ?",
+                    [(used_at, url) for url, used_at in touched.items()],
+                )
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(**self._counts, stored_bytes=self._size)
+
+    def close(self) -> None:
+        self.flush()
+        self._pool.close()
+
+    def _path(self, url: str) -> Path:
+        digest = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        return self._cache_dir / digest[:2] / f"{digest}.z"
+
+    def _read_body(self, url: str) -> bytes | None:
+        try:
+            return zlib.decompress(self._path(url).read_bytes())
+        except (OSError, zlib.error):
+            return None
+
+    def _touch(self, url: str, now: float, counter: str) -> None:
+        with self._lock:
+            self._counts[counter] += 1
+            self._touched[url] = now
+            due = len(self._touched) >= TOUCH_BATCH
+        if due:
+            self.flush()
+
+    def _request(
+        self, url: str, headers: dict[str, str]
+    ) -> tuple[int, http.client.HTTPMessage, bytes]:
+        for _ in range(MAX_REDIRECTS + 1):
+            parts = urlsplit(url)
+            scheme = parts.scheme.lower()
+            key = (scheme, parts.hostname or "", parts.port or (443 if scheme == "https" else 80))
+            target = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+            conn = self._pool.acquire(key)
+            try:
+                conn.request("GET", target, headers=headers)
+                response = conn.getresponse()
+                body = response.read()
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                raise
+            self._pool.release(key, conn, not response.will_close)
+            if response.status in REDIRECT_STATUS:
+                url = urljoin(url, response.getheader("Location", ""))
+                continue
+            if response.getheader("Content-Encoding", "").lower() == "gzip":
+                body = zlib.decompress(body, 16 + zlib.MAX_WBITS)
+            return response.status, response.headers, body
+        raise DownloadError("重定向次数过多")
+
+    def _store(
+        self,
+        url: str,
+        body: bytes,
+        content_sha1: str,
+        headers: http.client.HTTPMessage,
+        now: float,
+    ) -> None:
+        path = self._path(url)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = zlib.compress(body, 6)
+        partial = path.with_suffix(".tmp")
+        partial.write_bytes(data)
+        os.replace(partial, path)
+        with self._db.transaction() as conn:
+            previous = conn.execute(
+                "SELECT stored_size FROM http_cache WHERE url = ?", (url,)
+            ).fetchone()
+            conn.execute(
+                """
+                INSERT INTO http_cache (
+                    url, etag, last_modified, content_sha1, stored_size, fetched_at, used_at
+                ) VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(url) DO UPDATE SET
+                    etag = excluded.etag,
+                    last_modified = excluded.last_modified,
+                    content_sha1 = excluded.content_sha1,
+                    stored_size = excluded.stored_size,
+                    fetched_at = excluded.fetched_at,
+                    used_at = excluded.used_at
+                """,
+                (
+                    url,
+                    headers.get("ETag"),
+                    headers.get("Last-Modified"),
+                    content_sha1,
+                    len(data),
+                    now,
+                    now,
+                ),
+            )
+        with self._lock:
+            self._counts["fetched"] += 1
+            self._size += len(data) - (previous[0] if previous else 0)
+            over = self._size > self._max_bytes
+        if over:
+            self._evict()
+
+    def _evict(self) -> None:
+        self.flush()
+        with self._lock:
+            excess = self._size - int(self._max_bytes * EVICT_TO)
+        victims = []
+        freed = 0
+        for row in self._db.query(
+            "SELECT url, stored_size FROM http_cache ORDER BY used_at"
+        ):
+            if freed >= excess:
+                break
+            victims.append(row["url"])
+            freed += row["stored_size"] or 0
+        with self._db.transaction() as conn:
+            conn.executemany("DELETE FROM http_cache WHERE url = ?", [(url,) for url in victims])
+        for url in victims:
+            try:
+                self._path(url).unlink()
+            except FileNotFoundError:
+                pass
+        with self._lock:
+            self._size -= freed
+            self._counts["evicted"] += len(victims)
@@ -1,21 +1,118 @@
 from __future__ import annotations
 
+import os
+import queue
+import threading
+from collections import deque
 from dataclasses import dataclass
 from datetime import datetime
+from itertools import islice
+from pathlib import Path
 from typing import Callable
 
+LEVELS = ("INFO", "WARN", "ERROR")
+LOG_FILE_NAME = "simstoolbox.log"
+WRITER_BATCH = 1000
+
 
 @dataclass(frozen=True)
 class LogEntry:
     timestamp: datetime
     level: str
     message: str
+    seq: int = 0
+
+    def format(self) -> str:
+        return f"[{self.timestamp:%H:%M:%S}] {self.level}: {self.message}"
+
+
+class _RotatingWriter:
+    """Appends log lines to disk on a background thread, rotating by size."""
+
+    def __init__(self, log_dir: Path, max_bytes: int, backups: int) -> None:
+        self._path = log_dir / LOG_FILE_NAME
+        self._max_bytes = max_bytes
+        self._backups = backups
+        self._queue: queue.SimpleQueue[LogEntry | None] = queue.SimpleQueue()
+        log_dir.mkdir(parents=True, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def put(self, entry: LogEntry) -> None:
+        self._queue.put(entry)
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self) -> None:
+        handle = open(self._path, "ab")
+        size = handle.tell()
+        try:
+            while True:
+                batch = [self._queue.get()]
+                while len(batch) < WRITER_BATCH:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                closing = None in batch
+                text = "".join(
+                    f"{entry.timestamp.isoformat(timespec='seconds')} {entry.level} "
+                    f"{entry.message}\n"
+                    for entry in batch
+                    if entry is not None
+                )
+                if text:
+                    data = text.encode("utf-8")
+                    if size and size + len(data) > self._max_bytes:
+                        handle.close()
+                        self._rotate()
+                        handle = open(self._path, "ab")
+                        size = 0
+                    handle.write(data)
+                    handle.flush()
+                    size += len(data)
+                if closing:
+                    return
+        finally:
+            handle.close()
+
+    def _rotate(self) -> None:
+        for index in range(self._backups - 1, 0, -1):
+            older = self._path.with_name(f"{LOG_FILE_NAME}.{index}")
+            if older.exists():
+                os.replace(older, self._path.with_name(f"{LOG_FILE_NAME}.{index + 1}"))
+        if self._backups:
+            os.replace(self._path, self._path.with_name(f"{LOG_FILE_NAME}.1"))
+        else:
+            self._path.unlink()
 
 
 class LogService:
-    def __init__(self) -> None:
-        self._entries: list[LogEntry] = []
+    """Keeps the last ``capacity`` entries in memory and mirrors them to disk.
+
+    Appending only takes a lock and queues the entry for the writer thread.
+    Views poll ``since`` for what arrived after the last sequence number they
+    saw instead of being called once per entry.
+    """
+
+    def __init__(
+        self,
+        capacity: int = 20000,
+        log_dir: Path | None = None,
+        max_bytes: int = 2 * 1024 * 1024,
+        backups: int = 5,
+    ) -> None:
+        self._entries: deque[LogEntry] = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self._seq = 0
         self._listeners: list[Callable[[LogEntry], None]] = []
+        self._writer = _RotatingWriter(log_dir, max_bytes, backups) if log_dir else None
+
+    @property
+    def capacity(self) -> int:
+        return self._entries.maxlen
 
     def add_listener(self, callback: Callable[[LogEntry], None]) -> None:
         self._listeners.append(callback)
@@ -29,11 +126,44 @@ class LogService:
     def error(self, message: str) -> None:
         self._append("ERROR", message)
 
-    def entries(self) -> list[LogEntry]:
-        return list(self._entries)
+    def entries(self, min_level: str = "INFO", text: str = "") -> list[LogEntry]:
+        with self._lock:
+            entries = list(self._entries)
+        return filter_entries(entries, min_level, text)
+
+    def since(self, seq: int) -> list[LogEntry]:
+        """Entries newer than ``seq``, oldest first; older ones may have been dropped."""
+        with self._lock:
+            newer = self._seq - seq
+            if newer <= 0:
+                return []
+            if newer >= len(self._entries):
+                return list(self._entries)
+            return list(islice(reversed(self._entries), newer))[::-1]
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
 
     def _append(self, level: str, message: str) -> None:
-        entry = LogEntry(timestamp=datetime.now(), level=level, message=message)
-        self._entries.append(entry)
+        with self._lock:
+            self._seq += 1
+            entry = LogEntry(
+                timestamp=datetime.now(), level=level, message=message, seq=self._seq
+            )
+            self._entries.append(entry)
+        if self._writer is not None:
+            self._writer.put(entry)
         for listener in list(self._listeners):
             listener(entry)
+
+
+def filter_entries(entries: list[LogEntry], min_level: str, text: str) -> list[LogEntry]:
+    allowed = set(LEVELS[LEVELS.index(min_level) :])
+    needle = text.casefold()
+    return [
+        entry
+        for entry in entries
+        if entry.level in allowed and (not needle or needle in entry.message.casefold())
+    ]
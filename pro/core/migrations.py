@@ -17,4 +17,143 @@ MIGRATIONS: list[Migration] = [
         CREATE INDEX IF NOT EXISTS idx_op_log_created_at ON op_log(created_at);
         """,
     ),
+    Migration(
+        version=2,
+        sql="""
+        ALTER TABLE op_log ADD COLUMN parent_id INTEGER;
+        ALTER TABLE op_log ADD COLUMN item_count INTEGER NOT NULL DEFAULT 0;
+        CREATE INDEX IF NOT EXISTS idx_op_log_parent_id ON op_log(parent_id);
+        CREATE TABLE IF NOT EXISTS op_log_items (
+            op_id INTEGER NOT NULL,
+            seq INTEGER NOT NULL,
+            payload_json TEXT,
+            status TEXT,
+            PRIMARY KEY (op_id, seq)
+        ) WITHOUT ROWID;
+        """,
+    ),
+    Migration(
+        version=3,
+        sql="""
+        CREATE TABLE IF NOT EXISTS mod_meta (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            item_id TEXT UNIQUE,
+            title TEXT,
+            creator TEXT,
+            publish_date TEXT,
+            tags_json TEXT,
+            required_links_json TEXT,
+            notes TEXT,
+            last_updated_at TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_mod_meta_creator ON mod_meta(creator);
+        """,
+    ),
+    Migration(
+        version=4,
+        sql="""
+        CREATE TABLE IF NOT EXISTS groups (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT UNIQUE,
+            parent_id INTEGER,
+            created_at TEXT
+        );
+        CREATE TABLE IF NOT EXISTS group_members (
+            group_id INTEGER NOT NULL,
+            member_type TEXT NOT NULL,
+            ref TEXT NOT NULL,
+            created_at TEXT,
+            PRIMARY KEY (group_id, member_type, ref)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS idx_group_members_ref ON group_members(member_type, ref);
+        CREATE TABLE IF NOT EXISTS disabled_map (
+            abs_path_src TEXT PRIMARY KEY,
+            abs_path_disabled TEXT UNIQUE,
+            file_id INTEGER,
+            group_id INTEGER,
+            disabled_at TEXT,
+            reason TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_disabled_map_group_id ON disabled_map(group_id);
+        CREATE INDEX IF NOT EXISTS idx_disabled_map_file_id ON disabled_map(file_id);
+        """,
+    ),
+    Migration(
+        version=5,
+        sql="""
+        CREATE TABLE IF NOT EXISTS downloads (
+            url TEXT PRIMARY KEY,
+            domain TEXT,
+            item_id TEXT,
+            file_name TEXT,
+            file_path TEXT,
+            file_size INTEGER,
+            sha1 TEXT,
+            quick_sig TEXT,
+            status TEXT,
+            error TEXT,
+            downloaded_at TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_downloads_item_id ON downloads(item_id);
+        CREATE INDEX IF NOT EXISTS idx_downloads_file_path ON downloads(file_path);
+        CREATE INDEX IF NOT EXISTS idx_downloads_downloaded_at ON downloads(downloaded_at);
+        """,
+    ),
+    Migration(
+        version=6,
+        sql="""
+        CREATE TABLE IF NOT EXISTS http_cache (
+            url TEXT PRIMARY KEY,
+            etag TEXT,
+            last_modified TEXT,
+            content_sha1 TEXT,
+            stored_size INTEGER,
+            fetched_at REAL,
+            used_at REAL
+        );
+        CREATE INDEX IF NOT EXISTS idx_http_cache_used_at ON http_cache(used_at);
+        ALTER TABLE mod_meta ADD COLUMN creator_url TEXT;
+        ALTER TABLE mod_meta ADD COLUMN categories_json TEXT;
+        ALTER TABLE mod_meta ADD COLUMN file_size INTEGER;
+        ALTER TABLE mod_meta ADD COLUMN source_sha1 TEXT;
+        ALTER TABLE mod_meta ADD COLUMN parser_version INTEGER;
+        """,
+    ),
+    Migration(
+        version=7,
+        sql="""
+        CREATE TABLE IF NOT EXISTS package_files (
+            file_id INTEGER PRIMARY KEY,
+            quick_sig TEXT,
+            resource_count INTEGER,
+            error TEXT,
+            indexed_at TEXT
+        );
+        CREATE TABLE IF NOT EXISTS package_resources (
+            res_type INTEGER NOT NULL,
+            res_group INTEGER NOT NULL,
+            res_instance INTEGER NOT NULL,
+            file_id INTEGER NOT NULL,
+            PRIMARY KEY (res_type, res_group, res_instance, file_id)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS idx_package_resources_file_id
+            ON package_resources(file_id);
+        """,
+    ),
+    Migration(
+        version=8,
+        sql="""
+        CREATE TABLE IF NOT EXISTS script_files (
+            file_id INTEGER PRIMARY KEY,
+            quick_sig TEXT,
+            modules_json TEXT,
+            pyc_count INTEGER,
+            py_count INTEGER,
+            entry_count INTEGER,
+            code_depth INTEGER,
+            error TEXT,
+            inspected_at TEXT
+        );
+        """,
+    ),
 ]
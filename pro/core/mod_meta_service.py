@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import json
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from datetime import datetime
+
+from .db_service import DBService
+from .http_cache import HttpCache
+from .task_service import TaskContext
+from .tsr_parser import PARSER_VERSION, TSR_PAGE_URL, TsrDetails, parse_tsr_details
+
+PAGE_SIZE = 200
+
+
+@dataclass(frozen=True)
+class MetaRefreshSummary:
+    requested: int
+    cache_hits: int
+    revalidated: int
+    fetched: int
+    parsed: int
+    unchanged: int
+    failed: int
+    cancelled: bool = False
+
+
+class ModMetaService:
+    """Fills ``mod_meta`` from TSR details pages through the HTTP cache.
+
+    A page whose content hash matches ``mod_meta.source_sha1`` (for the same
+    parser version) is not parsed or written again.
+    """
+
+    def __init__(
+        self,
+        db: DBService,
+        cache: HttpCache,
+        page_url: str = TSR_PAGE_URL,
+        max_workers: int = 2,
+    ) -> None:
+        self._db = db
+        self._cache = cache
+        self._page_url = page_url
+        self._max_workers = max(1, max_workers)
+
+    @property
+    def cache(self) -> HttpCache:
+        return self._cache
+
+    def known_item_ids(self) -> list[str]:
+        rows = self._db.query(
+            """
+            SELECT DISTINCT item_id FROM downloads
+            WHERE item_id IS NOT NULL AND status = 'success'
+            ORDER BY item_id
+            """
+        )
+        return [row["item_id"] for row in rows]
+
+    def refresh(
+        self,
+        item_ids: list[str] | None = None,
+        context: TaskContext | None = None,
+        max_age: float | None = None,
+    ) -> MetaRefreshSummary:
+        item_ids = self.known_item_ids() if item_ids is None else [str(i) for i in item_ids]
+        counts = dict.fromkeys(
+            ("cache_hits", "revalidated", "fetched", "parsed", "unchanged", "failed"), 0
+        )
+        sources = {"cache": "cache_hits", "stale": "cache_hits", "network": "fetched"}
+        cancelled = False
+        with ThreadPoolExecutor(
+            max_workers=self._max_workers, thread_name_prefix="meta-fetch"
+        ) as executor:
+            for start in range(0, len(item_ids), PAGE_SIZE):
+                page = item_ids[start : start + PAGE_SIZE]
+                parsed_as = self._parsed_hashes(page)
+                rows = []
+                fetches = [
+                    (item_id, executor.submit(self._cache.get, self._url(item_id), max_age))
+                    for item_id in page
+                ]
+                for item_id, future in fetches:
+                    if context is not None and context.cancelled:
+                        # Drop the page's queued fetches; keep what was parsed so far.
+                        for _, queued in fetches:
+                            queued.cancel()
+                        cancelled = True
+                        break
+                    try:
+                        response = future.result()
+                    except Exception:  # noqa: BLE001
+                        counts["failed"] += 1
+                        continue
+                    counts[sources.get(response.source, response.source)] += 1
+                    if parsed_as.get(item_id) == response.content_sha1:
+                        counts["unchanged"] += 1
+                        continue
+                    details = parse_tsr_details(
+                        response.body.decode("utf-8", errors="replace"), item_id
+                    )
+                    if details is None:
+                        counts["failed"] += 1
+                        continue
+                    counts["parsed"] += 1
+                    rows.append(_meta_row(details, response.content_sha1))
+                self._store(rows)
+                if cancelled:
+                    break
+                if context is not None:
+                    context.report("元数据", start + len(page), len(item_ids))
+                    if context.cancelled:
+                        cancelled = True
+                        break
+        self._cache.flush()
+        return MetaRefreshSummary(requested=len(item_ids), cancelled=cancelled, **counts)
+
+    def _url(self, item_id: str) -> str:
+        return self._page_url.format(item_id=item_id)
+
+    def _parsed_hashes(self, item_ids: list[str]) -> dict[str, str]:
+        rows = self._db.query(
+            """
+            SELECT item_id, source_sha1 FROM mod_meta
+            WHERE item_id IN (SELECT value FROM json_each(?)) AND parser_version = ?
+            """,
+            (json.dumps(item_ids), PARSER_VERSION),
+        )
+        return {row["item_id"]: row["source_sha1"] for row in rows}
+
+    def _store(self, rows: list[tuple]) -> None:
+        if not rows:
+            return
+        with self._db.transaction() as conn:
+            conn.executemany(
+                """
+                INSERT INTO mod_meta (
+                    item_id, title, creator, creator_url, publish_date, categories_json,
+                    tags_json, required_links_json, file_size, source_sha1, parser_version,
+                    last_updated_at
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(item_id) DO UPDATE SET
+                    title = excluded.title,
+                    creator = excluded.creator,
+                    creator_url = excluded.creator_url,
+                    publish_date = excluded.publish_date,
+                    categories_json = excluded.categories_json,
+                    tags_json = excluded.tags_json,
+                    required_links_json = excluded.required_links_json,
+                    file_size = excluded.file_size,
+                    source_sha1 = excluded.source_sha1,
+                    parser_version = excluded.parser_version,
+                    last_updated_at = excluded.last_updated_at
+                """,
+                rows,
+            )
+
+
+def _meta_row(details: TsrDetails, source_sha1: str) -> tuple:
+    return (
+        details.item_id,
+        details.title,
+        details.creator,
+        details.creator_url,
+        details.publish_date,
+        json.dumps(details.categories, ensure_ascii=False),
+        json.dumps(details.tags, ensure_ascii=False),
+        json.dumps([asdict(link) for link in details.required_links], ensure_ascii=False),
+        details.file_size,
+        source_sha1,
+        PARSER_VERSION,
+        datetime.now().isoformat(timespec="seconds"),
+    )
@@ -0,0 +1,291 @@
+from __future__ import annotations
+
+import errno
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Any, Iterable
+
+from .db_service import DBService
+from .file_index_service import FileIndexService
+from .hash_service import sha1_file
+from .op_log_service import OperationRecord, OpLogService
+from .task_service import TaskContext
+
+# Every op type the engine writes; interrupted batches of any of them can be resumed.
+MOVE_OP_TYPES = ("disable", "enable", "safe_mode", "leave_safe_mode", "undo", "rollback")
+# Finished batches the user may undo; undoing a rollback would redo the interrupted batch.
+UNDOABLE_OP_TYPES = ("disable", "enable", "safe_mode", "leave_safe_mode", "undo")
+FLUSH_SIZE = 500
+ERROR_LIMIT = 20
+
+
+@dataclass(frozen=True)
+class MoveItem:
+    file_id: int
+    src: str
+    dst: str
+    kind: str
+    group_id: int | None = None
+    reason: str = "group"
+
+    def reversed(self) -> MoveItem:
+        return MoveItem(
+            file_id=self.file_id,
+            src=self.dst,
+            dst=self.src,
+            kind="enable" if self.kind == "disable" else "disable",
+            group_id=self.group_id,
+            reason=self.reason,
+        )
+
+    @classmethod
+    def from_payload(cls, payload: dict[str, Any]) -> MoveItem:
+        return cls(**payload)
+
+
+@dataclass(frozen=True)
+class MoveSummary:
+    op_id: int
+    moved: int
+    failed: int
+    cancelled: bool = False
+    errors: tuple[str, ...] = ()
+
+
+def _copy_verified(src: str, dst: str) -> None:
+    partial = dst + ".partial"
+    shutil.copy2(src, partial)
+    try:
+        if sha1_file(src) != sha1_file(partial):
+            raise OSError(errno.EIO, "复制校验失败", src)
+        os.replace(partial, dst)
+    except OSError:
+        if os.path.exists(partial):
+            os.unlink(partial)
+        raise
+    try:
+        os.unlink(src)
+    except OSError:
+        os.unlink(dst)
+        raise
+
+
+def _move(item: MoveItem) -> str | None:
+    if os.path.lexists(item.dst):
+        if not os.path.lexists(item.src):
+            # Moved before an interruption, but never journaled as done.
+            return None
+        return f"目标已存在: {item.dst}"
+    try:
+        os.rename(item.src, item.dst)
+    except OSError as exc:
+        if exc.errno != errno.EXDEV:
+            return f"{item.src}: {exc.strerror or exc}"
+        try:
+            _copy_verified(item.src, item.dst)
+        except OSError as copy_exc:
+            return f"{item.src}: {copy_exc.strerror or copy_exc}"
+    return None
+
+
+class MoveEngine:
+    """Moves many mod files as one journaled operation.
+
+    The whole batch is written to op_log up front with every item pending.
+    Files are renamed in a worker pool and each chunk's results are committed
+    together with the matching ``file_index``/``disabled_map`` rows, so the
+    journal always says which files have actually moved. An interrupted batch
+    can be resumed or rolled back from that record.
+    """
+
+    def __init__(
+        self,
+        db: DBService,
+        op_log: OpLogService,
+        file_index: FileIndexService,
+        max_workers: int = 8,
+    ) -> None:
+        self._db = db
+        self._op_log = op_log
+        self._file_index = file_index
+        self._max_workers = max(1, max_workers)
+
+    def run(
+        self,
+        op_type: str,
+        items: Iterable[MoveItem],
+        payload: dict[str, Any] | None = None,
+        parent_id: int | None = None,
+        context: TaskContext | None = None,
+    ) -> MoveSummary:
+        items = list(items)
+        op_id = self._op_log.record_batch(
+            op_type,
+            {**(payload or {}), "count": len(items)},
+            (asdict(item) for item in items),
+            status="running",
+            item_status="pending",
+            parent_id=parent_id,
+        )
+        return self._execute(op_id, list(enumerate(items)), context)
+
+    def resume(self, op_id: int, context: TaskContext | None = None) -> MoveSummary:
+        pending = [
+            (item.seq, MoveItem.from_payload(item.payload))
+            for item in self._op_log.iter_items(op_id, status="pending")
+        ]
+        return self._execute(op_id, pending, context)
+
+    def undo(
+        self, op_id: int, context: TaskContext | None = None, op_type: str = "undo"
+    ) -> MoveSummary:
+        done = [
+            MoveItem.from_payload(item.payload).reversed()
+            for item in self._op_log.iter_items(op_id, status="done")
+        ]
+        done.reverse()
+        summary = self.run(op_type, done, {"undo_of": op_id}, parent_id=op_id, context=context)
+        if not summary.failed and not summary.cancelled:
+            self._op_log.set_status(op_id, "undone" if op_type == "undo" else "rolled_back")
+        return summary
+
+    def rollback(self, op_id: int, context: TaskContext | None = None) -> MoveSummary:
+        # Pending items may have moved right before the interruption; record
+        # those first so the rollback puts them back too.
+        settled = [
+            (item.seq, MoveItem.from_payload(item.payload))
+            for item in self._op_log.iter_items(op_id, status="pending")
+        ]
+        moved = {
+            seq
+            for seq, item in settled
+            if os.path.lexists(item.dst) and not os.path.lexists(item.src)
+        }
+        with self._file_index.scans_paused():
+            self._commit(op_id, [(seq, item, None) for seq, item in settled if seq in moved])
+            self._op_log.set_status(
+                op_id,
+                "running",
+                ((seq, "skipped") for seq, _ in settled if seq not in moved),
+            )
+        return self.undo(op_id, context, op_type="rollback")
+
+    def interrupted(self) -> list[OperationRecord]:
+        placeholders = ", ".join("?" for _ in MOVE_OP_TYPES)
+        rows = self._db.query(
+            f"""
+            SELECT id FROM op_log
+            WHERE status IN ('running', 'cancelled') AND op_type IN ({placeholders})
+            ORDER BY id
+            """,
+            MOVE_OP_TYPES,
+        )
+        return [record for record in (self._op_log.get(row["id"]) for row in rows) if record]
+
+    def last_undoable(self) -> OperationRecord | None:
+        placeholders = ", ".join("?" for _ in UNDOABLE_OP_TYPES)
+        row = self._db.query_one(
+            f"""
+            SELECT id FROM op_log
+            WHERE status IN ('done', 'partial') AND op_type IN ({placeholders})
+            ORDER BY id DESC LIMIT 1
+            """,
+            UNDOABLE_OP_TYPES,
+        )
+        return self._op_log.get(row["id"]) if row is not None else None
+
+    def _execute(
+        self,
+        op_id: int,
+        work: list[tuple[int, MoveItem]],
+        context: TaskContext | None,
+    ) -> MoveSummary:
+        moved = failed = 0
+        errors: list[str] = []
+        cancelled = False
+        # Scans would see half-moved folders as missing and added files.
+        with self._file_index.scans_paused():
+            self._prepare_dirs(item.dst for _, item in work)
+            with ThreadPoolExecutor(
+                max_workers=self._max_workers, thread_name_prefix="mod-mover"
+            ) as executor:
+                for start in range(0, len(work), FLUSH_SIZE):
+                    if context is not None:
+                        context.report("移动", start, len(work))
+                        if context.cancelled:
+                            cancelled = True
+                            break
+                    chunk = work[start : start + FLUSH_SIZE]
+                    results = list(executor.map(_move, (item for _, item in chunk)))
+                    outcomes = [(seq, item, error) for (seq, item), error in zip(chunk, results)]
+                    self._commit(op_id, outcomes)
+                    for _, _, error in outcomes:
+                        if error is None:
+                            moved += 1
+                        else:
+                            failed += 1
+                            if len(errors) < ERROR_LIMIT:
+                                errors.append(error)
+            if cancelled:
+                status = "cancelled"
+            else:
+                status = "partial" if failed else "done"
+            self._op_log.set_status(op_id, status)
+        return MoveSummary(op_id, moved, failed, cancelled=cancelled, errors=tuple(errors))
+
+    @staticmethod
+    def _prepare_dirs(paths: Iterable[str]) -> None:
+        for directory in sorted({os.path.dirname(path) for path in paths}):
+            os.makedirs(directory, exist_ok=True)
+
+    def _commit(self, op_id: int, outcomes: list[tuple[int, MoveItem, str | None]]) -> None:
+        now = datetime.now().isoformat(timespec="seconds")
+        done = [item for _, item, error in outcomes if error is None]
+        with self._db.transaction() as conn:
+            # Another row may already hold the path a file returns to: a stale
+            # "missing" one, or one a scan added after an interrupted move.
+            conn.executemany(
+                "DELETE FROM file_index WHERE abs_path = ? AND id != ?",
+                [(item.dst, item.file_id) for item in done],
+            )
+            conn.executemany(
+                """
+                UPDATE file_index
+                SET abs_path = ?, dir_path = ?, status = ?, last_seen_at = ?
+                WHERE id = ?
+                """,
+                [
+                    (
+                        item.dst,
+                        os.path.dirname(item.dst),
+                        "disabled" if item.kind == "disable" else "normal",
+                        now,
+                        item.file_id,
+                    )
+                    for item in done
+                ],
+            )
+            conn.executemany(
+                """
+                INSERT OR REPLACE INTO disabled_map (
+                    abs_path_src, abs_path_disabled, file_id, group_id, disabled_at, reason
+                ) VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                [
+                    (item.src, item.dst, item.file_id, item.group_id, now, item.reason)
+                    for item in done
+                    if item.kind == "disable"
+                ],
+            )
+            conn.executemany(
+                "DELETE FROM disabled_map WHERE abs_path_disabled = ?",
+                [(item.src,) for item in done if item.kind == "enable"],
+            )
+            self._op_log.set_status(
+                op_id,
+                "running",
+                ((seq, "done" if error is None else "failed") for seq, _, error in outcomes),
+            )
@@ -1,9 +1,10 @@
 from __future__ import annotations
 
 import json
-from dataclasses import dataclass
+from contextlib import contextmanager
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Any
+from typing import Any, Iterable, Iterator
 
 from .db_service import DBService
 
@@ -14,38 +15,186 @@ class OperationRecord:
     payload: dict[str, Any]
     status: str
     created_at: str
+    op_id: int = 0
+    parent_id: int | None = None
+    item_count: int = 0
+
+
+@dataclass(frozen=True)
+class OperationItem:
+    op_id: int
+    seq: int
+    payload: dict[str, Any]
+    status: str
+
+
+@dataclass
+class OperationBatch:
+    op_type: str
+    payload: dict[str, Any]
+    status: str = "done"
+    parent_id: int | None = None
+    items: list[tuple[dict[str, Any], str]] = field(default_factory=list)
+    op_id: int | None = None
+
+    def add(self, payload: dict[str, Any], status: str = "done") -> None:
+        self.items.append((payload, status))
+
+    def extend(self, payloads: Iterable[dict[str, Any]], status: str = "done") -> None:
+        self.items.extend((payload, status) for payload in payloads)
 
 
 class OpLogService:
     def __init__(self, db: DBService) -> None:
         self._db = db
 
-    def record(self, op_type: str, payload: dict[str, Any], status: str = "done") -> None:
-        self._db.execute(
+    def record(self, op_type: str, payload: dict[str, Any], status: str = "done") -> int:
+        return self.record_batch(op_type, payload, (), status=status)
+
+    @contextmanager
+    def batch(
+        self,
+        op_type: str,
+        payload: dict[str, Any] | None = None,
+        status: str = "done",
+        parent_id: int | None = None,
+    ) -> Iterator[OperationBatch]:
+        """Collect child items and write the whole operation in one transaction.
+
+        Nothing is recorded if the block raises.
+        """
+        batch = OperationBatch(op_type, payload or {}, status=status, parent_id=parent_id)
+        yield batch
+        batch.op_id = self._insert(batch)
+
+    def record_batch(
+        self,
+        op_type: str,
+        payload: dict[str, Any],
+        items: Iterable[dict[str, Any]],
+        status: str = "done",
+        item_status: str = "done",
+        parent_id: int | None = None,
+    ) -> int:
+        batch = OperationBatch(op_type, payload, status=status, parent_id=parent_id)
+        batch.extend(items, item_status)
+        return self._insert(batch)
+
+    def set_status(
+        self,
+        op_id: int,
+        status: str,
+        item_updates: Iterable[tuple[int, str]] = (),
+    ) -> None:
+        with self._db.transaction() as conn:
+            conn.execute("UPDATE op_log SET status = ? WHERE id = ?", (status, op_id))
+            conn.executemany(
+                "UPDATE op_log_items SET status = ? WHERE op_id = ? AND seq = ?",
+                ((item_status, op_id, seq) for seq, item_status in item_updates),
+            )
+
+    def get(self, op_id: int) -> OperationRecord | None:
+        row = self._db.query_one(
             """
-            INSERT INTO op_log (op_type, payload_json, status, created_at)
-            VALUES (?, ?, ?, ?)
+            SELECT id, op_type, payload_json, status, created_at, parent_id, item_count
+            FROM op_log WHERE id = ?
             """,
-            (
-                op_type,
-                json.dumps(payload, ensure_ascii=False),
-                status,
-                datetime.now().isoformat(timespec="seconds"),
-            ),
+            (op_id,),
         )
-        self._db.commit()
+        return self._to_record(row) if row is not None else None
+
+    def recent(self, limit: int = 50, before_id: int | None = None) -> list[OperationRecord]:
+        if before_id is None:
+            rows = self._db.query(
+                """
+                SELECT id, op_type, payload_json, status, created_at, parent_id, item_count
+                FROM op_log ORDER BY id DESC LIMIT ?
+                """,
+                (limit,),
+            )
+        else:
+            rows = self._db.query(
+                """
+                SELECT id, op_type, payload_json, status, created_at, parent_id, item_count
+                FROM op_log WHERE id < ? ORDER BY id DESC LIMIT ?
+                """,
+                (before_id, limit),
+            )
+        return [self._to_record(row) for row in rows]
 
-    def recent(self, limit: int = 50) -> list[OperationRecord]:
-        rows = self._db.execute(
-            "SELECT op_type, payload_json, status, created_at FROM op_log ORDER BY id DESC LIMIT ?",
-            (limit,),
-        ).fetchall()
+    def items(
+        self,
+        op_id: int,
+        after_seq: int = -1,
+        limit: int = 1000,
+        status: str | None = None,
+    ) -> list[OperationItem]:
+        sql = """
+            SELECT op_id, seq, payload_json, status FROM op_log_items
+            WHERE op_id = ? AND seq > ?
+        """
+        params: tuple = (op_id, after_seq)
+        if status is not None:
+            sql += " AND status = ?"
+            params += (status,)
+        sql += " ORDER BY seq LIMIT ?"
+        rows = self._db.query(sql, params + (limit,))
         return [
-            OperationRecord(
-                op_type=row["op_type"],
+            OperationItem(
+                op_id=row["op_id"],
+                seq=row["seq"],
                 payload=json.loads(row["payload_json"]),
                 status=row["status"],
-                created_at=row["created_at"],
             )
             for row in rows
         ]
+
+    def iter_items(self, op_id: int, status: str | None = None) -> Iterator[OperationItem]:
+        after_seq = -1
+        while True:
+            page = self.items(op_id, after_seq=after_seq, status=status)
+            if not page:
+                return
+            yield from page
+            after_seq = page[-1].seq
+
+    def _insert(self, batch: OperationBatch) -> int:
+        with self._db.transaction() as conn:
+            op_id = conn.execute(
+                """
+                INSERT INTO op_log (
+                    op_type, payload_json, status, created_at, parent_id, item_count
+                ) VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    batch.op_type,
+                    json.dumps(batch.payload, ensure_ascii=False),
+                    batch.status,
+                    datetime.now().isoformat(timespec="seconds"),
+                    batch.parent_id,
+                    len(batch.items),
+                ),
+            ).lastrowid
+            conn.executemany(
+                """
+                INSERT INTO op_log_items (op_id, seq, payload_json, status)
+                VALUES (?, ?, ?, ?)
+                """,
+                (
+                    (op_id, seq, json.dumps(payload, ensure_ascii=False), status)
+                    for seq, (payload, status) in enumerate(batch.items)
+                ),
+            )
+        return op_id
+
+    @staticmethod
+    def _to_record(row) -> OperationRecord:
+        return OperationRecord(
+            op_type=row["op_type"],
+            payload=json.loads(row["payload_json"]),
+            status=row["status"],
+            created_at=row["created_at"],
+            op_id=row["id"],
+            parent_id=row["parent_id"],
+            item_count=row["item_count"],
+        )
@@ -0,0 +1,271 @@
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import struct
+from dataclasses import dataclass
+from datetime import datetime
+
+from .db_service import DBService
+from .task_service import TaskContext, TaskService
+
+# magic, major, minor, index count, index position (legacy), index size,
+# index version, index position; 96 bytes in all.
+HEADER = struct.Struct("<4sII24xIII12xII28x")
+# Index flags: the type, group or instance high word is stored once for all entries.
+CONSTANT_TYPE = 0x1
+CONSTANT_GROUP = 0x2
+CONSTANT_INSTANCE_HIGH = 0x4
+KEY_BITS = (CONSTANT_TYPE, CONSTANT_GROUP, CONSTANT_INSTANCE_HIGH)
+COMPRESSION_DELETED = 0xFFE0
+# Name maps only label other resources; every package built by the usual tools has one.
+IGNORED_TYPES = (0x0166038C,)
+CHUNK_FILES = 32
+
+ResourceKey = tuple[int, int, int]
+
+
+class PackageFormatError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class PackageIndexSummary:
+    indexed: int
+    failed: int
+    removed: int
+    resources: int
+    cancelled: bool = False
+
+
+@dataclass(frozen=True)
+class ResourceConflict:
+    """Two packages that both provide ``shared`` resource keys; the later one loaded wins."""
+
+    path_a: str
+    path_b: str
+    shared: int
+    types: tuple[str, ...]
+
+
+def _signed64(value: int) -> int:
+    # SQLite integers are signed; instance ids use the full 64 bits.
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def read_package_keys(path: str) -> list[ResourceKey]:
+    """Resource keys (type, group, instance) of a DBPF package, read from its index only."""
+    with open(path, "rb") as handle:
+        size = os.fstat(handle.fileno()).st_size
+        if size < HEADER.size:
+            raise PackageFormatError("文件过小，不是 DBPF 包")
+        with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            magic, major, _, count, legacy_position, index_size, _, position = (
+                HEADER.unpack_from(mapped, 0)
+            )
+            if magic != b"DBPF":
+                raise PackageFormatError("缺少 DBPF 文件头")
+            if major != 2:
+                raise PackageFormatError(f"不支持的 DBPF 版本: {major}")
+            if count == 0:
+                return []
+            position = position or legacy_position
+            if position + min(index_size, 4) > size:
+                raise PackageFormatError("索引表超出文件范围")
+            (flags,) = struct.unpack_from("<I", mapped, position)
+            position += 4
+            slots: list[int] = [0, 0, 0]
+            varying = []
+            for slot, bit in enumerate(KEY_BITS):
+                if flags & bit:
+                    (slots[slot],) = struct.unpack_from("<I", mapped, position)
+                    position += 4
+                else:
+                    varying.append(slot)
+            # Varying key words, instance low, offset, file size, memory size,
+            # compression type, committed.
+            layout = struct.Struct("<" + "I" * len(varying) + "IIIIHH")
+            end = position + count * layout.size
+            if end > size:
+                raise PackageFormatError("索引表超出文件范围")
+            low_at = len(varying)
+            compression_at = low_at + 4
+            keys = set()
+            view = memoryview(mapped)[position:end]
+            try:
+                for values in layout.iter_unpack(view):
+                    if values[compression_at] == COMPRESSION_DELETED:
+                        continue
+                    for slot, value in zip(varying, values):
+                        slots[slot] = value
+                    keys.add(
+                        (slots[0], slots[1], _signed64(slots[2] << 32 | values[low_at]))
+                    )
+            finally:
+                view.release()
+    return sorted(keys)
+
+
+def index_packages(job: list[tuple[int, str, str]]) -> list[tuple]:
+    """Worker entry point: ``(file_id, quick_sig, keys, error)`` per package."""
+    results = []
+    for file_id, path, quick_sig in job:
+        try:
+            results.append((file_id, quick_sig, read_package_keys(path), None))
+        except (OSError, ValueError) as exc:
+            results.append((file_id, quick_sig, [], str(exc)))
+    return results
+
+
+class PackageIndexService:
+    """Resource keys of every indexed .package, for conflict detection without opening files.
+
+    Only packages whose ``quick_sig`` changed since they were last read are
+    parsed again, on the task service's process pool.
+    """
+
+    def __init__(self, db: DBService, tasks: TaskService) -> None:
+        self._db = db
+        self._tasks = tasks
+
+    def pending_count(self) -> int:
+        return self._db.query_one(
+            """
+            SELECT COUNT(*) FROM file_index f
+            LEFT JOIN package_files p ON p.file_id = f.id
+            WHERE f.status != 'missing' AND lower(f.ext) = '.package'
+                AND p.quick_sig IS NOT f.quick_sig
+            """
+        )[0]
+
+    def refresh(self, context: TaskContext | None = None) -> PackageIndexSummary:
+        removed = self._drop_stale()
+        rows = self._db.query(
+            """
+            SELECT f.id, f.abs_path, f.quick_sig FROM file_index f
+            LEFT JOIN package_files p ON p.file_id = f.id
+            WHERE f.status != 'missing' AND lower(f.ext) = '.package'
+                AND p.quick_sig IS NOT f.quick_sig
+            ORDER BY f.id
+            """
+        )
+        total = len(rows)
+        indexed = failed = resources = 0
+        if context is not None:
+            context.report("资源索引", 0, total)
+        jobs = (
+            [
+                (row["id"], row["abs_path"], row["quick_sig"])
+                for row in rows[start : start + CHUNK_FILES]
+            ]
+            for start in range(0, total, CHUNK_FILES)
+        )
+        for future in self._tasks.map_cpu(index_packages, jobs, context):
+            results = future.result()
+            self._store(results)
+            for _, _, keys, error in results:
+                if error is None:
+                    indexed += 1
+                    resources += len(keys)
+                else:
+                    failed += 1
+            if context is not None:
+                context.report("资源索引", indexed + failed, total)
+        return PackageIndexSummary(
+            indexed=indexed,
+            failed=failed,
+            removed=removed,
+            resources=resources,
+            cancelled=indexed + failed < total,
+        )
+
+    def conflicts(self) -> list[ResourceConflict]:
+        """Package pairs overriding the same resources, most shared keys first."""
+        rows = self._db.query(
+            """
+            WITH shared AS (
+                SELECT res_type, res_group, res_instance FROM package_resources
+                WHERE res_type NOT IN (SELECT value FROM json_each(?))
+                GROUP BY res_type, res_group, res_instance
+                HAVING COUNT(*) > 1
+            )
+            SELECT fa.abs_path AS path_a, fb.abs_path AS path_b, COUNT(*) AS shared,
+                group_concat(DISTINCT printf('%08X', a.res_type)) AS types
+            FROM shared k
+            JOIN package_resources a
+                ON a.res_type = k.res_type AND a.res_group = k.res_group
+                AND a.res_instance = k.res_instance
+            JOIN package_resources b
+                ON b.res_type = k.res_type AND b.res_group = k.res_group
+                AND b.res_instance = k.res_instance AND b.file_id > a.file_id
+            JOIN file_index fa ON fa.id = a.file_id
+            JOIN file_index fb ON fb.id = b.file_id
+            WHERE fa.status != 'missing' AND fb.status != 'missing'
+                -- Byte-identical copies are already reported as duplicates.
+                AND (fa.sha1 IS NULL OR fa.sha1 IS NOT fb.sha1)
+            GROUP BY a.file_id, b.file_id
+            ORDER BY shared DESC, path_a, path_b
+            """,
+            (json.dumps(IGNORED_TYPES),),
+        )
+        return [
+            ResourceConflict(
+                path_a=row["path_a"],
+                path_b=row["path_b"],
+                shared=row["shared"],
+                types=tuple(sorted(row["types"].split(","))),
+            )
+            for row in rows
+        ]
+
+    def _drop_stale(self) -> int:
+        """Forget packages that went missing, were deleted or renamed to another type."""
+        stale = [
+            (row[0],)
+            for row in self._db.query(
+                """
+                SELECT p.file_id FROM package_files p
+                LEFT JOIN file_index f ON f.id = p.file_id
+                WHERE f.id IS NULL OR f.status = 'missing' OR lower(f.ext) != '.package'
+                """
+            )
+        ]
+        if stale:
+            with self._db.transaction() as conn:
+                conn.executemany("DELETE FROM package_resources WHERE file_id = ?", stale)
+                conn.executemany("DELETE FROM package_files WHERE file_id = ?", stale)
+        return len(stale)
+
+    def _store(self, results: list[tuple]) -> None:
+        now = datetime.now().isoformat(timespec="seconds")
+        # In key order the inserts land next to each other in the primary key.
+        rows = sorted((*key, file_id) for file_id, _, keys, _ in results for key in keys)
+        with self._db.transaction() as conn:
+            conn.executemany(
+                "DELETE FROM package_resources WHERE file_id = ?",
+                [(file_id,) for file_id, _, _, _ in results],
+            )
+            conn.executemany(
+                """
+                INSERT OR IGNORE INTO package_resources
+                    (res_type, res_group, res_instance, file_id)
+                VALUES (?, ?, ?, ?)
+                """,
+                rows,
+            )
+            conn.executemany(
+                """
+                INSERT INTO package_files (file_id, quick_sig, resource_count, error, indexed_at)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(file_id) DO UPDATE SET
+                    quick_sig = excluded.quick_sig,
+                    resource_count = excluded.resource_count,
+                    error = excluded.error,
+                    indexed_at = excluded.indexed_at
+                """,
+                [
+                    (file_id, quick_sig, len(keys), error, now)
+                    for file_id, quick_sig, keys, error in results
+                ],
+            )
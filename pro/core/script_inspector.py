@@ -0,0 +1,222 @@
+from __future__ import annotations
+
+import json
+import os
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+
+from .db_service import DBService
+from .task_service import TaskContext
+
+SCRIPT_EXTENSIONS = (".ts4script", ".zip")
+CODE_SUFFIXES = (".pyc", ".py")
+# The game only loads scripts at most one folder below Mods.
+MAX_SCRIPT_DEPTH = 1
+PAGE_SIZE = 256
+_EXT_MATCH = "lower(f.ext) IN (" + ", ".join("?" for _ in SCRIPT_EXTENSIONS) + ")"
+
+
+@dataclass(frozen=True)
+class ArchiveInfo:
+    modules: tuple[str, ...]
+    pyc_count: int
+    py_count: int
+    entry_count: int
+    # Deepest folder level of a code file inside the archive; 0 is the archive root.
+    code_depth: int
+
+
+@dataclass(frozen=True)
+class ScriptInfo:
+    file_id: int
+    abs_path: str
+    rel_path: str
+    folder_depth: int
+    modules: tuple[str, ...]
+    pyc_count: int
+    py_count: int
+    code_depth: int
+    error: str | None
+
+
+@dataclass(frozen=True)
+class ScriptInspectSummary:
+    inspected: int
+    failed: int
+    removed: int
+    cancelled: bool = False
+
+
+def inspect_archive(path: str) -> ArchiveInfo:
+    """What a script archive contains, from its zip central directory alone."""
+    with zipfile.ZipFile(path) as archive:
+        names = [info.filename for info in archive.infolist() if not info.is_dir()]
+    modules: dict[str, None] = {}
+    pyc_count = py_count = code_depth = 0
+    for name in names:
+        lowered = name.lower()
+        if not lowered.endswith(CODE_SUFFIXES):
+            continue
+        if lowered.endswith(".pyc"):
+            pyc_count += 1
+        else:
+            py_count += 1
+        parts = name.replace("\\", "/").strip("/").split("/")
+        code_depth = max(code_depth, len(parts) - 1)
+        parts = [part for part in parts if part != "__pycache__"]
+        # A package keeps its folder name; a lone module drops ".pyc" or ".cpython-37.pyc".
+        modules[parts[0] if len(parts) > 1 else parts[0].split(".")[0]] = None
+    return ArchiveInfo(
+        modules=tuple(sorted(modules)),
+        pyc_count=pyc_count,
+        py_count=py_count,
+        entry_count=len(names),
+        code_depth=code_depth,
+    )
+
+
+def _inspect(path: str) -> tuple[ArchiveInfo | None, str | None]:
+    try:
+        return inspect_archive(path), None
+    except (OSError, zipfile.BadZipFile, ValueError) as exc:
+        return None, str(exc)
+
+
+class ScriptInspector:
+    """Contents of every .ts4script and script .zip, cached against ``quick_sig``.
+
+    Folder depth comes from ``file_index.rel_path`` at query time, so moving a
+    script never needs it to be read again.
+    """
+
+    def __init__(self, db: DBService, max_workers: int = 4) -> None:
+        self._db = db
+        self._max_workers = max(1, max_workers)
+
+    def refresh(self, context: TaskContext | None = None) -> ScriptInspectSummary:
+        removed = self._drop_stale()
+        rows = self._db.query(
+            f"""
+            SELECT f.id, f.abs_path, f.quick_sig FROM file_index f
+            LEFT JOIN script_files s ON s.file_id = f.id
+            WHERE f.status != 'missing' AND {_EXT_MATCH}
+                AND s.quick_sig IS NOT f.quick_sig
+            ORDER BY f.id
+            """,
+            SCRIPT_EXTENSIONS,
+        )
+        inspected = failed = 0
+        cancelled = False
+        with ThreadPoolExecutor(
+            max_workers=self._max_workers, thread_name_prefix="script-inspect"
+        ) as executor:
+            for start in range(0, len(rows), PAGE_SIZE):
+                page = rows[start : start + PAGE_SIZE]
+                results = []
+                for row, (info, error) in zip(
+                    page, executor.map(_inspect, [row["abs_path"] for row in page])
+                ):
+                    if error is None:
+                        inspected += 1
+                    else:
+                        failed += 1
+                    results.append((row["id"], row["quick_sig"], info, error))
+                self._store(results)
+                if context is not None:
+                    context.report("脚本检查", start + len(page), len(rows))
+                    if context.cancelled:
+                        cancelled = True
+                        break
+        return ScriptInspectSummary(inspected, failed, removed, cancelled)
+
+    def scripts(self, statuses: tuple[str, ...] = ("normal", "changed")) -> list[ScriptInfo]:
+        """Script archives among files in ``statuses``; zips without code are left out."""
+        rows = self._db.query(
+            f"""
+            SELECT f.id, f.abs_path, f.rel_path, s.modules_json, s.pyc_count, s.py_count,
+                s.code_depth, s.error,
+                length(f.rel_path) - length(replace(f.rel_path, ?, '')) AS folder_depth
+            FROM script_files s JOIN file_index f ON f.id = s.file_id
+            WHERE f.status IN (SELECT value FROM json_each(?))
+                AND (s.pyc_count + s.py_count > 0 OR lower(f.ext) = '.ts4script')
+            ORDER BY f.rel_path
+            """,
+            (os.sep, json.dumps(statuses)),
+        )
+        return [_script_info(row) for row in rows]
+
+    def depth_problems(self) -> list[ScriptInfo]:
+        """Active scripts the game will not load: too deep below Mods, or unreadable."""
+        return [
+            script
+            for script in self.scripts()
+            if script.folder_depth > MAX_SCRIPT_DEPTH or script.error is not None
+        ]
+
+    def _drop_stale(self) -> int:
+        stale = [
+            (row[0],)
+            for row in self._db.query(
+                f"""
+                SELECT s.file_id FROM script_files s
+                LEFT JOIN file_index f ON f.id = s.file_id
+                WHERE f.id IS NULL OR f.status = 'missing' OR NOT ({_EXT_MATCH})
+                """,
+                SCRIPT_EXTENSIONS,
+            )
+        ]
+        if stale:
+            with self._db.transaction() as conn:
+                conn.executemany("DELETE FROM script_files WHERE file_id = ?", stale)
+        return len(stale)
+
+    def _store(self, results: list[tuple]) -> None:
+        now = datetime.now().isoformat(timespec="seconds")
+        with self._db.transaction() as conn:
+            conn.executemany(
+                """
+                INSERT INTO script_files (
+                    file_id, quick_sig, modules_json, pyc_count, py_count, entry_count,
+                    code_depth, error, inspected_at
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(file_id) DO UPDATE SET
+                    quick_sig = excluded.quick_sig,
+                    modules_json = excluded.modules_json,
+                    pyc_count = excluded.pyc_count,
+                    py_count = excluded.py_count,
+                    entry_count = excluded.entry_count,
+                    code_depth = excluded.code_depth,
+                    error = excluded.error,
+                    inspected_at = excluded.inspected_at
+                """,
+                [
+                    (
+                        file_id,
+                        quick_sig,
+                        json.dumps(list(info.modules) if info else []),
+                        info.pyc_count if info else 0,
+                        info.py_count if info else 0,
+                        info.entry_count if info else 0,
+                        info.code_depth if info else 0,
+                        error,
+                        now,
+                    )
+                    for file_id, quick_sig, info, error in results
+                ],
+            )
+
+
+def _script_info(row) -> ScriptInfo:
+    return ScriptInfo(
+        file_id=row["id"],
+        abs_path=row["abs_path"],
+        rel_path=row["rel_path"],
+        folder_depth=row["folder_depth"],
+        modules=tuple(json.loads(row["modules_json"] or "[]")),
+        pyc_count=row["pyc_count"],
+        py_count=row["py_count"],
+        code_depth=row["code_depth"],
+        error=row["error"],
+    )
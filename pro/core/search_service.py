@@ -0,0 +1,228 @@
+from __future__ import annotations
+
+import re
+import sqlite3
+import threading
+from dataclasses import dataclass
+from typing import Callable
+
+from .db_service import DBService
+
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+@dataclass(frozen=True)
+class SearchHit:
+    kind: str
+    ref_id: int
+    title: str
+    detail: str
+
+
+_INDEXES = {
+    "file_search": ("file_index", "id", ("file_name", "rel_path")),
+    "file_search_tri": ("file_index", "id", ("file_name", "rel_path")),
+    "meta_search": ("mod_meta", "id", ("title", "creator", "tags_json", "notes")),
+}
+
+
+class SearchService:
+    def __init__(self, db: DBService) -> None:
+        self._db = db
+        self._trigram = False
+
+    @property
+    def has_trigram(self) -> bool:
+        return self._trigram
+
+    def ensure_schema(self) -> None:
+        with self._db.transaction() as conn:
+            conn.execute(
+                """
+                CREATE VIRTUAL TABLE IF NOT EXISTS file_search USING fts5(
+                    file_name, rel_path,
+                    content='file_index', content_rowid='id', prefix='2 3'
+                )
+                """
+            )
+            try:
+                conn.execute(
+                    """
+                    CREATE VIRTUAL TABLE IF NOT EXISTS file_search_tri USING fts5(
+                        file_name, rel_path,
+                        content='file_index', content_rowid='id', tokenize='trigram'
+                    )
+                    """
+                )
+                self._trigram = True
+            except sqlite3.OperationalError:
+                # The trigram tokenizer needs SQLite 3.34; fall back to prefix search.
+                self._trigram = False
+            conn.execute(
+                """
+                CREATE VIRTUAL TABLE IF NOT EXISTS meta_search USING fts5(
+                    title, creator, tags_json, notes,
+                    content='mod_meta', content_rowid='id', prefix='2 3'
+                )
+                """
+            )
+            for table in self._tables():
+                self._create_triggers(conn, table)
+                content_table = _INDEXES[table][0]
+                indexed = conn.execute(f"SELECT COUNT(*) FROM {table}_docsize").fetchone()[0]
+                stored = conn.execute(f"SELECT COUNT(*) FROM {content_table}").fetchone()[0]
+                if indexed != stored:
+                    conn.execute(f"INSERT INTO {table}({table}) VALUES ('rebuild')")
+
+    def search(
+        self,
+        text: str,
+        limit: int = 50,
+        conn: sqlite3.Connection | None = None,
+    ) -> list[SearchHit]:
+        tokens = [token.lower() for token in TOKEN_RE.findall(text)]
+        if not tokens:
+            return []
+        conn = conn or self._db.reader()
+        if self._trigram and all(len(token) >= 3 for token in tokens):
+            file_table = "file_search_tri"
+            file_query = " AND ".join(f'"{token}"' for token in tokens)
+        else:
+            file_table = "file_search"
+            file_query = " AND ".join(f'"{token}"*' for token in tokens)
+        meta_query = " AND ".join(f'"{token}"*' for token in tokens)
+
+        hits = [
+            SearchHit(
+                kind="mod",
+                ref_id=row["id"],
+                title=row["title"] or "",
+                detail=row["creator"] or "",
+            )
+            for row in conn.execute(
+                """
+                SELECT m.id, m.title, m.creator
+                FROM meta_search JOIN mod_meta m ON m.id = meta_search.rowid
+                WHERE meta_search MATCH ?
+                LIMIT ?
+                """,
+                (meta_query, limit),
+            )
+        ]
+        hits.extend(
+            SearchHit(
+                kind="file",
+                ref_id=row["id"],
+                title=row["file_name"],
+                detail=row["rel_path"],
+            )
+            for row in conn.execute(
+                f"""
+                SELECT f.id, f.file_name, f.rel_path
+                FROM {file_table} JOIN file_index f ON f.id = {file_table}.rowid
+                WHERE {file_table} MATCH ? AND f.status != 'missing'
+                LIMIT ?
+                """,
+                (file_query, max(limit - len(hits), 0)),
+            )
+        )
+        return hits
+
+    def _tables(self) -> list[str]:
+        tables = ["file_search", "meta_search"]
+        if self._trigram:
+            tables.append("file_search_tri")
+        return tables
+
+    @staticmethod
+    def _create_triggers(conn: sqlite3.Connection, table: str) -> None:
+        content_table, key, columns = _INDEXES[table]
+        names = ", ".join(columns)
+        new_values = ", ".join(f"new.{column}" for column in columns)
+        old_values = ", ".join(f"old.{column}" for column in columns)
+        conn.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_ai AFTER INSERT ON {content_table} BEGIN
+                INSERT INTO {table}(rowid, {names}) VALUES (new.{key}, {new_values});
+            END
+            """
+        )
+        conn.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_ad AFTER DELETE ON {content_table} BEGIN
+                INSERT INTO {table}({table}, rowid, {names})
+                VALUES ('delete', old.{key}, {old_values});
+            END
+            """
+        )
+        conn.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_au AFTER UPDATE OF {names} ON {content_table}
+            BEGIN
+                INSERT INTO {table}({table}, rowid, {names})
+                VALUES ('delete', old.{key}, {old_values});
+                INSERT INTO {table}(rowid, {names}) VALUES (new.{key}, {new_values});
+            END
+            """
+        )
+
+
+class SearchRunner:
+    """Runs searches on one background thread, newest query wins.
+
+    Submitting a new query interrupts the one in flight, so a burst of
+    keystrokes only ever pays for the latest text.
+    """
+
+    def __init__(self, search: SearchService, db: DBService, limit: int = 50) -> None:
+        self._search = search
+        self._db = db
+        self._limit = limit
+        self._condition = threading.Condition()
+        self._pending: tuple[int, str, Callable[[int, str, list[SearchHit]], None]] | None = None
+        self._generation = 0
+        self._running_generation = 0
+        self._conn: sqlite3.Connection | None = None
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="search-runner", daemon=True)
+        self._thread.start()
+
+    def submit(self, text: str, callback: Callable[[int, str, list[SearchHit]], None]) -> int:
+        with self._condition:
+            self._generation += 1
+            self._pending = (self._generation, text, callback)
+            if self._conn is not None and self._running_generation:
+                self._conn.interrupt()
+            self._condition.notify()
+            return self._generation
+
+    def close(self) -> None:
+        with self._condition:
+            self._closed = True
+            self._pending = None
+            self._condition.notify()
+
+    def _run(self) -> None:
+        self._conn = self._db.reader()
+        while True:
+            with self._condition:
+                while self._pending is None and not self._closed:
+                    self._condition.wait()
+                if self._closed:
+                    return
+                generation, text, callback = self._pending
+                self._pending = None
+                self._running_generation = generation
+            try:
+                hits = self._search.search(text, self._limit, conn=self._conn)
+            except sqlite3.OperationalError:
+                # Interrupted by a newer query, or the text is not a valid match expression.
+                hits = None
+            finally:
+                with self._condition:
+                    self._running_generation = 0
+            with self._condition:
+                stale = generation != self._generation
+            if hits is not None and not stale:
+                callback(generation, text, hits)
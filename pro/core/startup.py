@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+import threading
+import time
+
+
+class StartupTimer:
+    """Collects how long each startup phase took, for one log line."""
+
+    def __init__(self) -> None:
+        self._started = time.perf_counter()
+        self._last = self._started
+        self._phases: list[tuple[str, float]] = []
+        self._lock = threading.Lock()
+
+    def mark(self, phase: str) -> float:
+        """Close ``phase`` at the current time; returns seconds since start."""
+        now = time.perf_counter()
+        with self._lock:
+            self._phases.append((phase, now - self._last))
+            self._last = now
+        return now - self._started
+
+    def add(self, phase: str, seconds: float) -> None:
+        """Record a phase that ran beside the main sequence, e.g. on a worker."""
+        with self._lock:
+            self._phases.append((phase, seconds))
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._started
+
+    def summary(self) -> str:
+        with self._lock:
+            phases = list(self._phases)
+        parts = " · ".join(f"{phase} {seconds * 1000:.0f} ms" for phase, seconds in phases)
+        return f"启动耗时 {self.elapsed() * 1000:.0f} ms: {parts}"
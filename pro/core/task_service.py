@@ -1,49 +1,479 @@
 from __future__ import annotations
 
+import heapq
 import itertools
-from concurrent.futures import Future, ThreadPoolExecutor
-from dataclasses import dataclass
-from typing import Callable, Dict, Iterable
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, Iterator
 
+from .tracing import TRACER
 
-@dataclass
+PRIORITY_USER = 0
+PRIORITY_NORMAL = 50
+PRIORITY_BACKGROUND = 100
+
+LANE_IO = "io"
+LANE_CPU = "cpu"
+LANE_DB = "db"
+
+FINISHED_STATUSES = ("done", "failed", "cancelled")
+_EXHAUSTED = object()
+
+
+class TaskCancelled(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class TaskProgress:
+    phase: str
+    done: int = 0
+    total: int | None = None
+    rate: float = 0.0
+    eta: float | None = None
+
+    def describe(self) -> str:
+        text = self.phase
+        if self.total:
+            text += f" {self.done}/{self.total}"
+        elif self.done:
+            text += f" {self.done}"
+        if self.rate:
+            text += f" · {self.rate:.0f}/s"
+        if self.eta is not None:
+            text += f" · 剩余 {self.eta:.0f}s"
+        return text
+
+
+class TaskContext:
+    def __init__(self) -> None:
+        self._cancel_event = threading.Event()
+        self._progress: TaskProgress | None = None
+        self._phase_started = time.monotonic()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel_event.is_set()
+
+    @property
+    def progress(self) -> TaskProgress | None:
+        return self._progress
+
+    def cancel(self) -> None:
+        self._cancel_event.set()
+
+    def raise_if_cancelled(self) -> None:
+        if self._cancel_event.is_set():
+            raise TaskCancelled()
+
+    def report(self, phase: str, done: int = 0, total: int | None = None) -> None:
+        now = time.monotonic()
+        if self._progress is None or self._progress.phase != phase:
+            self._phase_started = now
+        elapsed = now - self._phase_started
+        rate = done / elapsed if elapsed > 0 else 0.0
+        eta = None
+        if total and rate > 0:
+            eta = max(total - done, 0) / rate
+        self._progress = TaskProgress(phase=phase, done=done, total=total, rate=rate, eta=eta)
+
+
+FINISHED_RETENTION = 5.0
+
+
+class DependencyFailed(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    attempts: int = 3
+    delay: float = 1.0
+    backoff: float = 2.0
+    retry_on: tuple[type[BaseException], ...] = (OSError,)
+
+    def delay_for(self, attempt: int) -> float:
+        return self.delay * self.backoff ** max(attempt - 1, 0)
+
+
+@dataclass(eq=False)
 class TaskHandle:
     task_id: int
     name: str
     future: Future
+    context: TaskContext = field(default_factory=TaskContext)
+    priority: int = PRIORITY_NORMAL
+    lane: str = LANE_IO
+    status: str = "queued"
+    attempt: int = 0
+    error: str = ""
+    finished_at: float | None = None
+    # Whether fn was handed ``context`` and can notice a cancel while running.
+    takes_context: bool = False
+
+    @property
+    def progress(self) -> TaskProgress | None:
+        return self.context.progress
 
     def cancel(self) -> bool:
-        return self.future.cancel()
+        """Stop the task; returns False if it will still run to completion.
+
+        A queued task is dropped. A running one is only told to stop through its
+        context, which also prevents further retries; tasks submitted without a
+        context cannot see that, so they keep running and this returns False.
+        """
+        if self.future.cancel():
+            return True
+        if self.future.done():
+            return False
+        self.context.cancel()
+        return self.takes_context
+
+
+@dataclass(eq=False)
+class _Job:
+    handle: TaskHandle
+    fn: Callable
+    args: tuple
+    kwargs: dict[str, Any]
+    retry: RetryPolicy | None
+    after: list[TaskHandle] = field(default_factory=list)
+    waiting: int = 0
+    # perf_counter values of the last enqueue and start, for tracing.
+    queued_at: float = 0.0
+    started_at: float = 0.0
+
+
+class _Lane:
+    def __init__(
+        self,
+        name: str,
+        slots: int,
+        urgent_slots: int,
+        factory: Callable[[int], ThreadPoolExecutor | ProcessPoolExecutor],
+    ) -> None:
+        self.name = name
+        self.slots = slots
+        self.urgent_slots = urgent_slots
+        self.queue: list[tuple[int, int, _Job]] = []
+        self.running = 0
+        self._factory = factory
+        self._executor: ThreadPoolExecutor | ProcessPoolExecutor | None = None
+
+    def executor(self) -> ThreadPoolExecutor | ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = self._factory(self.slots + self.urgent_slots)
+        return self._executor
+
+    def limit(self, priority: int) -> int:
+        return self.slots + (self.urgent_slots if priority <= PRIORITY_USER else 0)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
 
 
 class TaskService:
-    def __init__(self, max_workers: int = 4) -> None:
-        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+    """Runs tasks by priority on separate lanes.
+
+    ``io`` is a thread pool with one extra slot that only user-priority work
+    may take, so a long background job never blocks what the user asked for.
+    ``db`` is a single thread for work that writes heavily to the database,
+    and ``cpu`` is a process pool for picklable, GIL-bound work. A task can
+    wait for other tasks and be retried on failure.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 4,
+        cpu_workers: int | None = None,
+        urgent_slots: int = 1,
+    ) -> None:
+        cpu_workers = cpu_workers or max(1, (os.cpu_count() or 2) - 1)
+        self._lanes = {
+            LANE_IO: _Lane(
+                LANE_IO,
+                max_workers,
+                urgent_slots,
+                lambda n: ThreadPoolExecutor(max_workers=n, thread_name_prefix="task-io"),
+            ),
+            LANE_DB: _Lane(
+                LANE_DB,
+                1,
+                0,
+                lambda n: ThreadPoolExecutor(max_workers=n, thread_name_prefix="task-db"),
+            ),
+            LANE_CPU: _Lane(
+                LANE_CPU,
+                cpu_workers,
+                0,
+                # Forking a process that runs Qt and several threads is unsafe.
+                lambda n: ProcessPoolExecutor(
+                    max_workers=n, mp_context=multiprocessing.get_context("spawn")
+                ),
+            ),
+        }
+        self._lock = threading.RLock()
         self._counter = itertools.count(1)
+        self._sequence = itertools.count()
         self._tasks: Dict[int, TaskHandle] = {}
         self._listeners: list[Callable[[TaskHandle], None]] = []
 
-    def submit(self, name: str, fn: Callable, *args, **kwargs) -> TaskHandle:
-        task_id = next(self._counter)
-        future = self._executor.submit(fn, *args, **kwargs)
-        handle = TaskHandle(task_id=task_id, name=name, future=future)
-        self._tasks[task_id] = handle
-        self._notify(handle)
-        return handle
+    def submit(
+        self,
+        name: str,
+        fn: Callable,
+        *args,
+        priority: int = PRIORITY_NORMAL,
+        lane: str = LANE_IO,
+        after: Iterable[TaskHandle] = (),
+        retry: RetryPolicy | None = None,
+        **kwargs,
+    ) -> TaskHandle:
+        return self._submit(name, fn, args, kwargs, TaskContext(), priority, lane, after, retry)
+
+    def submit_with_context(
+        self,
+        name: str,
+        fn: Callable,
+        *args,
+        priority: int = PRIORITY_NORMAL,
+        lane: str = LANE_IO,
+        after: Iterable[TaskHandle] = (),
+        retry: RetryPolicy | None = None,
+        **kwargs,
+    ) -> TaskHandle:
+        if lane == LANE_CPU:
+            raise ValueError("cpu tasks run in another process and cannot take a context")
+        context = TaskContext()
+        kwargs["context"] = context
+        return self._submit(
+            name, fn, args, kwargs, context, priority, lane, after, retry, takes_context=True
+        )
+
+    def map_cpu(
+        self,
+        fn: Callable,
+        items: Iterable,
+        context: TaskContext | None = None,
+        window: int | None = None,
+    ) -> Iterator[Future]:
+        """Run ``fn(item)`` on the cpu lane's processes, yielding futures as they finish.
+
+        For fan-out from inside a running task: items do not get handles of
+        their own, and only ``window`` of them are in flight at once, so a
+        cancelled ``context`` stops the batch after the running ones finish.
+        """
+        with self._lock:
+            lane = self._lanes[LANE_CPU]
+            executor = lane.executor()
+        window = window or lane.slots * 2
+        source = iter(items)
+        pending: set[Future] = set()
+        while True:
+            while len(pending) < window and not (context is not None and context.cancelled):
+                item = next(source, _EXHAUSTED)
+                if item is _EXHAUSTED:
+                    break
+                pending.add(executor.submit(fn, item))
+            if not pending:
+                return
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            yield from done
 
     def add_listener(self, callback: Callable[[TaskHandle], None]) -> None:
         self._listeners.append(callback)
 
     def active_tasks(self) -> Iterable[TaskHandle]:
-        return list(self._tasks.values())
+        """Unfinished tasks, plus those that finished in the last few seconds."""
+        with self._lock:
+            return list(self._tasks.values())
 
-    def cleanup_finished(self) -> None:
-        finished = [task_id for task_id, handle in self._tasks.items() if handle.future.done()]
-        for task_id in finished:
-            self._tasks.pop(task_id, None)
+    def cleanup_finished(self, keep_for: float = FINISHED_RETENTION) -> None:
+        cutoff = time.monotonic() - keep_for
+        with self._lock:
+            finished = [
+                task_id
+                for task_id, handle in self._tasks.items()
+                if handle.finished_at is not None and handle.finished_at <= cutoff
+            ]
+            for task_id in finished:
+                self._tasks.pop(task_id, None)
 
     def shutdown(self) -> None:
-        self._executor.shutdown(wait=False, cancel_futures=True)
+        with self._lock:
+            queued = [job for lane in self._lanes.values() for _, _, job in lane.queue]
+            for lane in self._lanes.values():
+                lane.queue.clear()
+                lane.shutdown()
+        for job in queued:
+            job.handle.future.cancel()
+
+    def _submit(
+        self,
+        name: str,
+        fn: Callable,
+        args: tuple,
+        kwargs: dict[str, Any],
+        context: TaskContext,
+        priority: int,
+        lane: str,
+        after: Iterable[TaskHandle],
+        retry: RetryPolicy | None,
+        takes_context: bool = False,
+    ) -> TaskHandle:
+        if lane not in self._lanes:
+            raise ValueError(f"unknown lane: {lane}")
+        handle = TaskHandle(
+            task_id=next(self._counter),
+            name=name,
+            future=Future(),
+            context=context,
+            priority=priority,
+            lane=lane,
+            takes_context=takes_context,
+        )
+        job = _Job(handle, fn, args, kwargs, retry, after=list(after))
+        with self._lock:
+            self._tasks[handle.task_id] = handle
+        handle.future.add_done_callback(lambda future: self._on_future_done(handle))
+        self._notify(handle)
+        if not job.after:
+            self._enqueue(job)
+            return handle
+        handle.status = "waiting"
+        job.waiting = len(job.after)
+        for dependency in job.after:
+            dependency.future.add_done_callback(lambda future: self._on_dependency_done(job))
+        return handle
+
+    def _on_dependency_done(self, job: _Job) -> None:
+        with self._lock:
+            job.waiting -= 1
+            if job.waiting:
+                return
+        failed = [
+            dependency.name
+            for dependency in job.after
+            if dependency.future.cancelled() or dependency.future.exception() is not None
+        ]
+        if not failed:
+            self._enqueue(job)
+        elif not job.handle.future.done():
+            self._settle(job, error=DependencyFailed(", ".join(failed)))
+
+    def _enqueue(self, job: _Job) -> None:
+        handle = job.handle
+        if handle.future.done():
+            return
+        if handle.attempt and handle.context.cancelled:
+            self._settle(job, error=TaskCancelled())
+            return
+        with self._lock:
+            handle.status = "queued"
+            job.queued_at = time.perf_counter()
+            lane = self._lanes[handle.lane]
+            heapq.heappush(lane.queue, (handle.priority, next(self._sequence), job))
+            self._pump(lane)
+
+    def _pump(self, lane: _Lane) -> None:
+        while lane.queue:
+            priority, _, job = lane.queue[0]
+            if lane.running >= lane.limit(priority):
+                return
+            heapq.heappop(lane.queue)
+            handle = job.handle
+            if not handle.attempt and not handle.future.set_running_or_notify_cancel():
+                continue
+            lane.running += 1
+            handle.attempt += 1
+            handle.status = "running"
+            job.started_at = time.perf_counter()
+            if TRACER.enabled:
+                TRACER.record(
+                    handle.name,
+                    "task.wait",
+                    job.queued_at,
+                    job.started_at - job.queued_at,
+                    {"lane": lane.name, "priority": priority},
+                )
+            if lane.name == LANE_CPU:
+                inner = lane.executor().submit(job.fn, *job.args, **job.kwargs)
+                inner.add_done_callback(lambda future, job=job: self._collect(job, future))
+            else:
+                lane.executor().submit(self._run, job)
+
+    def _run(self, job: _Job) -> None:
+        try:
+            result = job.fn(*job.args, **job.kwargs)
+        except BaseException as exc:  # noqa: BLE001
+            self._finish(job, error=exc)
+        else:
+            self._finish(job, result=result)
+
+    def _collect(self, job: _Job, future: Future) -> None:
+        if future.cancelled():
+            self._finish(job, error=TaskCancelled())
+            return
+        error = future.exception()
+        self._finish(job, result=None if error else future.result(), error=error)
+
+    def _finish(self, job: _Job, result: Any = None, error: BaseException | None = None) -> None:
+        handle = job.handle
+        if TRACER.enabled:
+            TRACER.record(
+                handle.name,
+                "task.run",
+                job.started_at,
+                time.perf_counter() - job.started_at,
+                {"lane": handle.lane, "attempt": handle.attempt, "ok": error is None},
+            )
+        with self._lock:
+            lane = self._lanes[handle.lane]
+            lane.running -= 1
+            self._pump(lane)
+        retry = job.retry
+        if (
+            error is not None
+            and retry is not None
+            and handle.attempt < retry.attempts
+            and isinstance(error, retry.retry_on)
+            and not handle.context.cancelled
+        ):
+            handle.status = "retrying"
+            handle.error = str(error)
+            timer = threading.Timer(retry.delay_for(handle.attempt), self._enqueue, (job,))
+            timer.daemon = True
+            timer.start()
+            return
+        self._settle(job, result, error)
+
+    @staticmethod
+    def _settle(job: _Job, result: Any = None, error: BaseException | None = None) -> None:
+        handle = job.handle
+        if error is None:
+            handle.status = "done"
+            handle.future.set_result(result)
+            return
+        handle.status = "cancelled" if isinstance(error, TaskCancelled) else "failed"
+        handle.error = str(error) or type(error).__name__
+        handle.future.set_exception(error)
+
+    def _on_future_done(self, handle: TaskHandle) -> None:
+        if handle.future.cancelled():
+            handle.status = "cancelled"
+        handle.finished_at = time.monotonic()
 
     def _notify(self, handle: TaskHandle) -> None:
         for listener in list(self._listeners):
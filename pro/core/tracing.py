@@ -0,0 +1,228 @@
+from __future__ import annotations
+
+import itertools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, ContextManager
+
+if TYPE_CHECKING:
+    from .db_service import DBService
+
+SPAN_CAPACITY = 10_000
+SQL_PREVIEW = 160
+_NULL_SPAN = nullcontext()
+
+
+@dataclass(frozen=True)
+class Span:
+    seq: int
+    name: str
+    category: str
+    # Seconds since the tracer was created (or last cleared).
+    start: float
+    duration: float
+    thread_id: int
+    args: dict[str, Any]
+
+
+@dataclass(frozen=True)
+class CategoryTotals:
+    category: str
+    count: int
+    total: float
+    max: float
+
+
+class _ActiveSpan:
+    __slots__ = ("_tracer", "_name", "_category", "_args", "_started")
+
+    def __init__(self, tracer: Tracer, name: str, category: str, args: dict[str, Any]) -> None:
+        self._tracer = tracer
+        self._name = name
+        self._category = category
+        self._args = args
+        self._started = 0.0
+
+    def __enter__(self) -> _ActiveSpan:
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        elapsed = time.perf_counter() - self._started
+        if exc_type is not None:
+            self._args["error"] = exc_type.__name__
+        self._tracer.record(self._name, self._category, self._started, elapsed, self._args)
+
+
+class Tracer:
+    """Timed spans and counters for the hot paths, kept in a ring buffer.
+
+    While ``enabled`` is False, ``span`` hands out a shared no-op context and
+    instrumented code skips its bookkeeping, so tracing costs an attribute
+    check. Spans from the cpu lane's worker processes are not collected.
+    """
+
+    def __init__(self, capacity: int = SPAN_CAPACITY) -> None:
+        self.enabled = False
+        self._lock = threading.Lock()
+        self._spans: deque[Span] = deque(maxlen=capacity)
+        self._sequence = itertools.count(1)
+        self._counters: dict[str, float] = {}
+        self._totals: dict[str, list[float]] = {}
+        self._threads: dict[int, str] = {}
+        self._origin = time.perf_counter()
+        self._listeners: list[Callable[[bool], None]] = []
+
+    def set_enabled(self, enabled: bool) -> None:
+        if enabled == self.enabled:
+            return
+        self.enabled = enabled
+        for listener in list(self._listeners):
+            listener(enabled)
+
+    def add_listener(self, callback: Callable[[bool], None]) -> None:
+        """Call ``callback(enabled)`` now and whenever tracing is switched."""
+        self._listeners.append(callback)
+        callback(self.enabled)
+
+    def span(self, name: str, category: str = "app", **args: Any) -> ContextManager:
+        if not self.enabled:
+            return _NULL_SPAN
+        return _ActiveSpan(self, name, category, args)
+
+    def record(
+        self,
+        name: str,
+        category: str,
+        started: float,
+        duration: float,
+        args: dict[str, Any] | None = None,
+    ) -> None:
+        """Store a finished span; ``started`` is a ``time.perf_counter()`` value."""
+        thread_id = threading.get_ident()
+        with self._lock:
+            if thread_id not in self._threads:
+                self._threads[thread_id] = threading.current_thread().name
+            self._spans.append(
+                Span(
+                    seq=next(self._sequence),
+                    name=name,
+                    category=category,
+                    start=started - self._origin,
+                    duration=duration,
+                    thread_id=thread_id,
+                    args=args or {},
+                )
+            )
+            totals = self._totals.get(category)
+            if totals is None:
+                self._totals[category] = [1, duration, duration]
+            else:
+                totals[0] += 1
+                totals[1] += duration
+                totals[2] = max(totals[2], duration)
+
+    def count(self, name: str, value: float = 1) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def statement(self, name: str, sql: str, started: float, duration: float) -> None:
+        """``DBService`` statement hook."""
+        self.record(name, "db", started, duration, {"sql": " ".join(sql.split())[:SQL_PREVIEW]})
+
+    def spans(self, since: int = 0) -> list[Span]:
+        """Buffered spans with a sequence number above ``since``, oldest first."""
+        with self._lock:
+            if since <= 0:
+                return list(self._spans)
+            return [span for span in self._spans if span.seq > since]
+
+    def thread_names(self) -> dict[int, str]:
+        with self._lock:
+            return dict(self._threads)
+
+    def counters(self) -> dict[str, float]:
+        with self._lock:
+            return dict(self._counters)
+
+    def totals(self) -> list[CategoryTotals]:
+        """Span count and time per category since the last ``clear``, busiest first."""
+        with self._lock:
+            totals = [
+                CategoryTotals(category, int(count), total, longest)
+                for category, (count, total, longest) in self._totals.items()
+            ]
+        return sorted(totals, key=lambda item: item.total, reverse=True)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._spans.clear()
+            self._counters.clear()
+            self._totals.clear()
+            self._origin = time.perf_counter()
+
+    def export_chrome_trace(self, path: Path) -> int:
+        """Write the buffered spans as Chrome trace JSON; returns how many were written.
+
+        The file opens in chrome://tracing or https://ui.perfetto.dev.
+        """
+        with self._lock:
+            spans = list(self._spans)
+            counters = dict(self._counters)
+            threads = dict(self._threads)
+            end = time.perf_counter() - self._origin
+        pid = os.getpid()
+        events: list[dict[str, Any]] = [
+            {"name": "process_name", "ph": "M", "pid": pid, "args": {"name": "SimsToolbox Pro"}}
+        ]
+        events.extend(
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+            for tid, name in threads.items()
+        )
+        events.extend(
+            {
+                "name": span.name,
+                "cat": span.category,
+                "ph": "X",
+                "ts": round(span.start * 1e6, 3),
+                "dur": round(span.duration * 1e6, 3),
+                "pid": pid,
+                "tid": span.thread_id,
+                "args": span.args,
+            }
+            for span in spans
+        )
+        events.extend(
+            {
+                "name": name,
+                "ph": "C",
+                "ts": round(end * 1e6, 3),
+                "pid": pid,
+                "args": {"value": value},
+            }
+            for name, value in sorted(counters.items())
+        )
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(
+            json.dumps({"traceEvents": events, "displayTimeUnit": "ms"}, default=str),
+            encoding="utf-8",
+        )
+        return len(spans)
+
+
+TRACER = Tracer()
+
+
+def trace_db(db: DBService, tracer: Tracer = TRACER) -> None:
+    """Install ``tracer`` as ``db``'s statement hook whenever tracing is on."""
+    tracer.add_listener(
+        lambda enabled: db.set_statement_hook(tracer.statement if enabled else None)
+    )
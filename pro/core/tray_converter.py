@@ -0,0 +1,435 @@
+from __future__ import annotations
+
+import mmap
+import os
+import shutil
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from .task_service import TaskContext, TaskService
+
+# Version gates seen in .trayitem files fall in this range.
+VERSION_MIN = 0x2000
+VERSION_MAX = 0x5000
+MAX_DEPTH = 30
+MAX_FIELDS = 1500
+MMAP_THRESHOLD = 1 << 20
+CHUNK_FILES = 16
+
+# (field_number, occurrence_index) per level, outermost first.
+FieldPath = tuple[tuple[int, int], ...]
+
+
+class ProtoParseError(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class VersionField:
+    """Where a version varint or fixed32 sits in the file."""
+
+    value: int
+    wire_type: int
+    path: FieldPath
+    offset: int
+    size: int
+    # (offset, size, length) of each enclosing length prefix, outermost first.
+    parents: tuple[tuple[int, int, int], ...] = ()
+
+
+@dataclass(frozen=True)
+class ConvertOptions:
+    recursive: bool = True
+    copy_associated: bool = True
+    overwrite: bool = False
+    dry_run: bool = False
+
+
+@dataclass(frozen=True)
+class FileOutcome:
+    """``kind`` is patch, same, skip or error."""
+
+    name: str
+    kind: str
+    detail: str = ""
+
+
+@dataclass(frozen=True)
+class ConvertSummary:
+    total: int
+    patched: int
+    same: int
+    skipped: int
+    errors: int
+    cancelled: bool = False
+    problems: list[FileOutcome] = field(default_factory=list)
+
+
+def read_varint(buf, pos: int, limit: int) -> tuple[int, int]:
+    """Decode a varint at ``pos``; returns (value, new_pos) without slicing."""
+    result = 0
+    shift = 0
+    while pos < limit and shift <= 63:
+        byte = buf[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return result, pos
+        shift += 7
+    raise ProtoParseError("varint 非法或数据被截断")
+
+
+def encode_varint(value: int) -> bytes:
+    if value < 0:
+        raise ValueError("不支持负数 varint")
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def payload_offset(buf) -> int:
+    """Many .trayitem files start with an 8-byte header before the protobuf payload."""
+    size = len(buf)
+    if size >= 8:
+        lead = int.from_bytes(buf[0:4], "little")
+        length = int.from_bytes(buf[4:8], "little")
+        if lead == 0 and length in (size - 8, size - 4, size):
+            return 8
+    return 0
+
+
+def _scan(buf, start: int, limit: int, depth: int, path: FieldPath, parents, found) -> bool:
+    """Walk one message, appending version candidates; False if it is not a message.
+
+    Candidates from a length-delimited field only count if the whole field
+    parses as a message, the same best-effort rule the reference parser used.
+    """
+    if depth > MAX_DEPTH:
+        return False
+    pos = start
+    fields = 0
+    counts: dict[int, int] = {}
+    try:
+        while pos < limit:
+            key, pos = read_varint(buf, pos, limit)
+            number = key >> 3
+            wire_type = key & 0x07
+            if number == 0:
+                return False
+            occurrence = counts.get(number, 0)
+            counts[number] = occurrence + 1
+            fields += 1
+            if fields > MAX_FIELDS:
+                return False
+            if wire_type == 0:
+                value_start = pos
+                value, pos = read_varint(buf, pos, limit)
+                if VERSION_MIN <= value <= VERSION_MAX:
+                    found.append(
+                        VersionField(
+                            value, 0, path + ((number, occurrence),), value_start,
+                            pos - value_start, parents,
+                        )
+                    )
+            elif wire_type == 5:
+                if pos + 4 > limit:
+                    return False
+                value = int.from_bytes(buf[pos : pos + 4], "little")
+                if VERSION_MIN <= value <= VERSION_MAX:
+                    found.append(
+                        VersionField(value, 5, path + ((number, occurrence),), pos, 4, parents)
+                    )
+                pos += 4
+            elif wire_type == 1:
+                if pos + 8 > limit:
+                    return False
+                pos += 8
+            elif wire_type == 2:
+                length_start = pos
+                length, pos = read_varint(buf, pos, limit)
+                if pos + length > limit:
+                    return False
+                if length:
+                    nested: list[VersionField] = []
+                    prefix = (length_start, pos - length_start, length)
+                    if _scan(
+                        buf, pos, pos + length, depth + 1, path + ((number, occurrence),),
+                        parents + (prefix,), nested,
+                    ):
+                        found.extend(nested)
+                pos += length
+            else:
+                return False
+        return True
+    except ProtoParseError:
+        return False
+
+
+def find_version(buf, start: int = 0) -> VersionField | None:
+    """The largest in-range value, preferring deeper fields on ties."""
+    found: list[VersionField] = []
+    if not _scan(buf, start, len(buf), 0, (), (), found) or not found:
+        return None
+    return max(found, key=lambda candidate: (candidate.value, len(candidate.path)))
+
+
+def locate_path(buf, path: FieldPath, start: int = 0) -> VersionField | None:
+    """The varint or fixed32 field at ``path``, found without walking other branches."""
+    pos, limit = start, len(buf)
+    parents: tuple[tuple[int, int, int], ...] = ()
+    try:
+        for level, (number, occurrence) in enumerate(path):
+            last = level == len(path) - 1
+            seen = 0
+            while True:
+                if pos >= limit:
+                    return None
+                key, pos = read_varint(buf, pos, limit)
+                wire_type = key & 0x07
+                value_start = pos
+                if wire_type == 0:
+                    value, pos = read_varint(buf, pos, limit)
+                elif wire_type == 5:
+                    value = int.from_bytes(buf[pos : pos + 4], "little")
+                    pos += 4
+                elif wire_type == 1:
+                    pos += 8
+                elif wire_type == 2:
+                    length, pos = read_varint(buf, pos, limit)
+                else:
+                    return None
+                if key >> 3 != number or seen < occurrence:
+                    if key >> 3 == number:
+                        seen += 1
+                    if wire_type == 2:
+                        pos += length
+                    continue
+                if last:
+                    if wire_type not in (0, 5):
+                        return None
+                    return VersionField(
+                        value, wire_type, path, value_start, pos - value_start, parents
+                    )
+                if wire_type != 2:
+                    return None
+                parents += ((value_start, pos - value_start, length),)
+                limit = pos + length
+                break
+    except ProtoParseError:
+        return None
+    return None
+
+
+def patch_bytes(buf, target: VersionField, version: int, header: int) -> bytearray | None:
+    """Copy of ``buf`` with the version replaced; None if it can be patched in place.
+
+    When the new varint is longer or shorter, every enclosing length prefix
+    (and an 8-byte header that records the payload size) is rewritten.
+    """
+    encoded = (
+        encode_varint(version) if target.wire_type == 0 else version.to_bytes(4, "little")
+    )
+    if len(encoded) == target.size:
+        return None
+    out = bytearray(buf)
+    out[target.offset : target.offset + target.size] = encoded
+    delta = len(encoded) - target.size
+    for offset, size, length in reversed(target.parents):
+        prefix = encode_varint(length + delta)
+        out[offset : offset + size] = prefix
+        delta += len(prefix) - size
+    if header:
+        recorded = int.from_bytes(out[4:8], "little") + delta
+        out[4:8] = recorded.to_bytes(4, "little")
+    return out
+
+
+def tray_group_id(file_name: str) -> str | None:
+    # 0x00000001!0x004215edd6910135.trayitem -> 0x004215edd6910135
+    if "!" not in file_name:
+        return None
+    return file_name.split("!", 1)[1].rsplit(".", 1)[0] or None
+
+
+def collect_trayitems(source: Path, recursive: bool) -> list[Path]:
+    if source.is_file():
+        return [source] if source.suffix.lower() == ".trayitem" else []
+    pattern = "**/*.trayitem" if recursive else "*.trayitem"
+    return sorted(path for path in source.glob(pattern) if path.is_file())
+
+
+def parse_hex_version(text: str) -> int:
+    value = text.strip().lower().removeprefix("0x")
+    if len(value) != 8 or any(char not in "0123456789abcdef" for char in value):
+        raise ValueError("版本号必须是 8 位十六进制，例如：00002BC0")
+    return int(value, 16)
+
+
+def detect_version(path: Path) -> VersionField:
+    """The version field of a reference .trayitem saved by the target game version."""
+    data = path.read_bytes()
+    found = find_version(memoryview(data), payload_offset(data))
+    if found is None:
+        raise ValueError(f"无法在该文件中猜测版本字段：{path}")
+    return found
+
+
+def _convert_one(
+    path: Path,
+    out_dir: Path,
+    version: int,
+    options: ConvertOptions,
+    ref_path: FieldPath | None,
+) -> FileOutcome:
+    out_path = out_dir / path.name
+    in_place = out_path == path
+    if out_path.exists() and not in_place and not options.overwrite and not options.dry_run:
+        return FileOutcome(path.name, "skip", f"输出已存在：{out_path.name}")
+    partial = out_path.with_name(out_path.name + ".tmp")
+    with open(path, "r+b" if in_place and not options.dry_run else "rb") as handle:
+        size = os.fstat(handle.fileno()).st_size
+        if size >= MMAP_THRESHOLD:
+            buffer = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            buffer = bytearray(size)
+            handle.readinto(buffer)
+        view = memoryview(buffer)
+        chunks: tuple = ()
+        try:
+            header = payload_offset(view)
+            target = locate_path(view, ref_path, header) if ref_path else None
+            target = target or find_version(view, header)
+            if target is None:
+                return FileOutcome(path.name, "skip", "无法定位版本字段")
+            if target.value == version:
+                outcome = FileOutcome(path.name, "same", f"已是 0x{version:08X}")
+                if options.dry_run or in_place:
+                    return outcome
+                chunks = (view,)
+            else:
+                outcome = FileOutcome(
+                    path.name, "patch", f"0x{target.value:08X} -> 0x{version:08X}"
+                )
+                if options.dry_run:
+                    return outcome
+                rebuilt = patch_bytes(view, target, version, header)
+                if rebuilt is not None:
+                    chunks = (rebuilt,)
+                else:
+                    encoded = (
+                        encode_varint(version)
+                        if target.wire_type == 0
+                        else version.to_bytes(4, "little")
+                    )
+                    if in_place:
+                        # Same length: only the version bytes are written back.
+                        handle.seek(target.offset)
+                        handle.write(encoded)
+                        return outcome
+                    chunks = (view[: target.offset], encoded, view[target.offset + target.size :])
+            try:
+                with open(partial, "wb") as out:
+                    for chunk in chunks:
+                        out.write(chunk)
+            except BaseException:
+                partial.unlink(missing_ok=True)
+                raise
+        finally:
+            # Slices of the view pin the mmap; it cannot close while any is alive.
+            for chunk in chunks:
+                if isinstance(chunk, memoryview):
+                    chunk.release()
+            view.release()
+            if isinstance(buffer, mmap.mmap):
+                buffer.close()
+    os.replace(partial, out_path)
+    return outcome
+
+
+def _copy_associated(path: Path, out_dir: Path, overwrite: bool) -> None:
+    group_id = tray_group_id(path.name)
+    if not group_id or out_dir == path.parent:
+        return
+    for sibling in path.parent.glob(f"*!{group_id}.*"):
+        if sibling.name == path.name or sibling.suffix.lower() == ".tmp":
+            continue
+        target = out_dir / sibling.name
+        if target.exists() and not overwrite:
+            continue
+        shutil.copyfile(sibling, target)
+
+
+def convert_files(job: tuple) -> list[FileOutcome]:
+    """Worker entry point for one chunk of files (runs in a cpu-lane process)."""
+    paths, out_dir, version, options, ref_path = job
+    out_dir = Path(out_dir)
+    if not options.dry_run:
+        out_dir.mkdir(parents=True, exist_ok=True)
+    outcomes = []
+    for name in paths:
+        path = Path(name)
+        try:
+            outcome = _convert_one(path, out_dir, version, options, ref_path)
+            if options.copy_associated and not options.dry_run and outcome.kind != "skip":
+                _copy_associated(path, out_dir, options.overwrite)
+        except Exception as exc:  # noqa: BLE001
+            # One unreadable or malformed file must not fail the rest of the chunk.
+            outcome = FileOutcome(path.name, "error", str(exc) or type(exc).__name__)
+        outcomes.append(outcome)
+    return outcomes
+
+
+class VersionConverter:
+    """Rewrites the version gate of .trayitem files so an older game loads them.
+
+    Files are read into one buffer (mmap for large ones) and scanned through a
+    memoryview; a version varint of unchanged length is patched in place.
+    Chunks of files run on the task service's process pool.
+    """
+
+    def __init__(self, tasks: TaskService) -> None:
+        self._tasks = tasks
+
+    def convert(
+        self,
+        source: Path,
+        out_dir: Path,
+        version: int,
+        options: ConvertOptions = ConvertOptions(),
+        ref_path: FieldPath | None = None,
+        context: TaskContext | None = None,
+    ) -> ConvertSummary:
+        paths = [str(path) for path in collect_trayitems(source, options.recursive)]
+        total = len(paths)
+        counts = {"patch": 0, "same": 0, "skip": 0, "error": 0}
+        problems: list[FileOutcome] = []
+        done = 0
+        if context is not None:
+            context.report("转换", 0, total)
+        jobs = (
+            (paths[start : start + CHUNK_FILES], str(out_dir), version, options, ref_path)
+            for start in range(0, total, CHUNK_FILES)
+        )
+        for future in self._tasks.map_cpu(convert_files, jobs, context):
+            for outcome in future.result():
+                counts[outcome.kind] += 1
+                if outcome.kind in ("skip", "error"):
+                    problems.append(outcome)
+                done += 1
+            if context is not None:
+                context.report("转换", done, total)
+        return ConvertSummary(
+            total=total,
+            patched=counts["patch"],
+            same=counts["same"],
+            skipped=counts["skip"],
+            errors=counts["error"],
+            cancelled=done < total,
+            problems=problems,
+        )
@@ -0,0 +1,226 @@
+from __future__ import annotations
+
+import html
+import json
+import re
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from html.parser import HTMLParser
+
+# Bump when parsing changes so cached results are parsed again.
+PARSER_VERSION = 1
+TSR_PAGE_URL = "https://www.thesimsresource.com/downloads/{item_id}"
+VOID_TAGS = frozenset(
+    {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "wbr"}
+)
+MENU_TAGS = {"sims", "sets", "mods", "objects", "makeup"}
+
+
+@dataclass(frozen=True)
+class RequiredLink:
+    url: str
+    title: str | None
+    group: str | None
+    item_id: str | None
+
+
+@dataclass(frozen=True)
+class TsrDetails:
+    item_id: str
+    title: str | None
+    creator: str | None
+    creator_url: str | None
+    publish_date: str | None
+    categories: tuple[str, ...]
+    tags: tuple[str, ...]
+    game: str | None
+    file_size: int | None
+    required_links: tuple[RequiredLink, ...]
+
+
+def _norm_space(text: str) -> str:
+    return re.sub(r"\s+", " ", (text or "").strip())
+
+
+def _unique(values) -> list[str]:
+    return list(dict.fromkeys(value for value in values if value))
+
+
+def _epoch_to_iso(value) -> str | None:
+    try:
+        epoch = int(value)
+    except (TypeError, ValueError):
+        return None
+    if epoch <= 0:
+        return None
+    stamp = datetime.fromtimestamp(epoch, tz=timezone.utc).replace(microsecond=0)
+    return stamp.isoformat().replace("+00:00", "Z")
+
+
+class _DetailsScanner(HTMLParser):
+    """Collects the handful of nodes the details page parser needs in one pass."""
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.items: list[str] = []
+        self.breadcrumbs: list[str] = []
+        self.browse_category: str | None = None
+        self.creator: str | None = None
+        self.creator_url: str | None = None
+        self.heading: str | None = None
+        self._stack: list[tuple[str, tuple[str, ...]]] = []
+        self._open: Counter[str] = Counter()
+        self._capture: str | None = None
+        self._capture_depth = 0
+        self._text: list[str] = []
+
+    def _inside(self, css_class: str) -> bool:
+        return self._open[css_class] > 0
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        values = dict(attrs)
+        classes = tuple((values.get("class") or "").split())
+        if "item-wrapper" in classes and values.get("data-item"):
+            self.items.append(values["data-item"])
+        if self._capture is None:
+            if tag == "a" and self._inside("full-category-path"):
+                self._capture = "breadcrumb"
+            elif tag == "a" and self.creator is None and self._inside("artist-name") and (
+                self._inside("created-by-wrapper")
+            ):
+                self._capture = "creator"
+                self.creator_url = values.get("href")
+            elif tag == "h1" and self.heading is None:
+                self._capture = "heading"
+            elif "browse-info-category" in classes and self.browse_category is None:
+                self._capture = "browse"
+            if self._capture is not None:
+                self._capture_depth = len(self._stack)
+                self._text = []
+        if tag not in VOID_TAGS:
+            self._stack.append((tag, classes))
+            self._open.update(classes)
+
+    def handle_endtag(self, tag: str) -> None:
+        for index in range(len(self._stack) - 1, -1, -1):
+            if self._stack[index][0] == tag:
+                for _, classes in self._stack[index:]:
+                    self._open.subtract(classes)
+                del self._stack[index:]
+                break
+        else:
+            return
+        if self._capture is None or len(self._stack) > self._capture_depth:
+            return
+        text = "".join(self._text)
+        if self._capture == "breadcrumb":
+            self.breadcrumbs.append(_norm_space(text))
+        elif self._capture == "creator":
+            self.creator = _norm_space(text)
+        elif self._capture == "heading":
+            self.heading = _norm_space(text)
+        else:
+            self.browse_category = text
+        self._capture = None
+
+    def handle_data(self, data: str) -> None:
+        if self._capture is not None:
+            self._text.append(data)
+
+
+def _item_json(scanner: _DetailsScanner, item_id: str) -> dict | None:
+    for raw in scanner.items:
+        try:
+            item = json.loads(html.unescape(raw))
+        except ValueError:
+            continue
+        if str(item.get("ID")) == item_id or str(item.get("ItemID")) == item_id:
+            return item
+    return None
+
+
+def _required_links(item: dict) -> list[RequiredLink]:
+    links = []
+    for group in item.get("requiredDownloads") or []:
+        group_name = _norm_space(group.get("group") or group.get("originalName") or "") or None
+        for download in group.get("downloads") or []:
+            target = download.get("download")
+            if not target:
+                continue
+            title = _norm_space(download.get("title") or "") or None
+            if (download.get("type") or "").lower() == "id":
+                if not str(target).isdigit():
+                    continue
+                links.append(
+                    RequiredLink(
+                        TSR_PAGE_URL.format(item_id=target), title, group_name, str(target)
+                    )
+                )
+            else:
+                match = re.search(r"thesimsresource\.com/.*?(?:/id/|/downloads/)(\d+)", target)
+                links.append(
+                    RequiredLink(str(target), title, group_name, match.group(1) if match else None)
+                )
+    return links
+
+
+def parse_tsr_details(html_text: str, item_id: str) -> TsrDetails | None:
+    """Metadata from a TSR details page; None if the page does not describe ``item_id``."""
+    scanner = _DetailsScanner()
+    scanner.feed(html_text)
+    scanner.close()
+    item = _item_json(scanner, str(item_id))
+    if item is None and not scanner.heading:
+        return None
+    item = item or {}
+
+    creator = scanner.creator or item.get("creatorName") or item.get("creator")
+    creator_url = scanner.creator_url
+    if not creator_url and item.get("minisitePath") and item.get("minisiteName"):
+        creator_url = f"/{item['minisitePath']}/{item['minisiteName']}/"
+    try:
+        file_size = int(item.get("FileSize") or item.get("filesize") or 0) or None
+    except (TypeError, ValueError):
+        file_size = None
+
+    categories_raw = []
+    if item.get("CategoryDisplay"):
+        categories_raw.append(str(item["CategoryDisplay"]))
+    if item.get("type"):
+        categories_raw.append(str(item["type"]))
+    categories_raw.extend(
+        category.get("Name") or "" for category in item.get("Categories") or []
+    )
+    breadcrumbs = _unique(scanner.breadcrumbs)
+    if not breadcrumbs and scanner.browse_category:
+        breadcrumbs = _unique(_norm_space(part) for part in scanner.browse_category.split("/"))
+    categories_raw.extend(breadcrumbs)
+    categories = _unique(_norm_space(str(category)) for category in categories_raw)
+
+    parts = [_norm_space(part) for category in categories for part in category.split("/")]
+    kind = str(item.get("type") or "").strip().lower()
+    if kind in ("sims", "sets"):
+        parts.insert(0, kind.capitalize())
+    tags = []
+    for tag in parts:
+        if tag.lower() == "sims4":
+            tag = "Sims 4"
+        elif tag.lower() in MENU_TAGS:
+            tag = tag.capitalize()
+        tags.append(tag)
+
+    return TsrDetails(
+        item_id=str(item_id),
+        title=item.get("title") or scanner.heading,
+        creator=creator,
+        creator_url=creator_url,
+        publish_date=_epoch_to_iso(item.get("publishDate")) or _epoch_to_iso(
+            item.get("lastUpdated")
+        ),
+        categories=tuple(categories),
+        tags=tuple(_unique(tags)),
+        game=item.get("game"),
+        file_size=file_size,
+        required_links=tuple(_required_links(item)),
+    )
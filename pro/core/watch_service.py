@@ -0,0 +1,336 @@
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from pathlib import Path
+
+from .event_bus import EventBus
+from .file_index_service import FileIndexService
+
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = getattr(os, "O_CLOEXEC", 0o2000000)
+
+WATCH_MASK = (
+    IN_ATTRIB
+    | IN_CLOSE_WRITE
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+    | IN_DELETE_SELF
+    | IN_ONLYDIR
+)
+EVENT_HEADER = struct.Struct("iIII")
+DELTA_DIR_LIMIT = 50
+
+
+def _subdirs(path: str) -> list[str]:
+    result: list[str] = []
+    stack = [path]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as iterator:
+                for entry in iterator:
+                    if entry.is_dir(follow_symlinks=False):
+                        result.append(entry.path)
+                        stack.append(entry.path)
+        except OSError:
+            continue
+    return result
+
+
+def merge_deltas(old: dict, new: dict) -> dict:
+    """Fold two ``index.delta`` payloads into one, for coalescing subscribers."""
+    dirs = list(dict.fromkeys([*old["dirs"], *new["dirs"]]))
+    return {
+        "added": old["added"] + new["added"],
+        "changed": old["changed"] + new["changed"],
+        "removed": old["removed"] + new["removed"],
+        "moved": old["moved"] + new["moved"],
+        "dirs": dirs[:DELTA_DIR_LIMIT],
+        "dir_count": old["dir_count"] + new["dir_count"],
+    }
+
+
+class WatcherUnavailable(OSError):
+    pass
+
+
+class InotifyBackend:
+    """Reports the directories whose entries changed, via Linux inotify."""
+
+    def __init__(self) -> None:
+        if not sys.platform.startswith("linux"):
+            raise WatcherUnavailable("inotify is only available on Linux")
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._rm_watch = libc.inotify_rm_watch
+        self._rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        self._fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise WatcherUnavailable(ctypes.get_errno(), "inotify_init1 failed")
+        self._paths: dict[int, str] = {}
+        self._watches: dict[str, int] = {}
+        self._root = ""
+
+    def start(self, root: str) -> None:
+        self._root = root
+        for path in [root, *_subdirs(root)]:
+            self._watch(path)
+
+    def read(self, timeout: float) -> set[str]:
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return set()
+        dirty: set[str] = set()
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                wd, mask, _cookie, length = EVENT_HEADER.unpack_from(data, offset)
+                name_start = offset + EVENT_HEADER.size
+                raw_name = data[name_start : name_start + length].rstrip(b"\0")
+                offset = name_start + length
+                if mask & IN_Q_OVERFLOW:
+                    # Events were dropped; only a walk of the whole tree is safe.
+                    dirty.add(self._root)
+                    continue
+                if mask & IN_IGNORED:
+                    path = self._paths.pop(wd, None)
+                    if path is not None and self._watches.get(path) == wd:
+                        del self._watches[path]
+                    continue
+                parent = self._paths.get(wd)
+                if parent is None:
+                    continue
+                if mask & IN_DELETE_SELF:
+                    dirty.add(os.path.dirname(parent) if parent != self._root else parent)
+                    continue
+                dirty.add(parent)
+                if mask & IN_ISDIR and raw_name:
+                    path = os.path.join(parent, os.fsdecode(raw_name))
+                    if mask & (IN_CREATE | IN_MOVED_TO):
+                        # Files may land before the watch exists, so the new
+                        # directory is listed on the next flush as well.
+                        for subdir in [path, *_subdirs(path)]:
+                            self._watch(subdir)
+                        dirty.add(path)
+                    elif mask & IN_MOVED_FROM:
+                        self._unwatch_tree(path)
+        return dirty
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+    def _watch(self, path: str) -> None:
+        wd = self._add_watch(self._fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            code = ctypes.get_errno()
+            if code == errno.ENOSPC:
+                raise WatcherUnavailable(code, "inotify watch limit reached")
+            return
+        self._paths[wd] = path
+        self._watches[path] = wd
+
+    def _unwatch_tree(self, path: str) -> None:
+        prefix = path + os.sep
+        for watched in [p for p in self._watches if p == path or p.startswith(prefix)]:
+            wd = self._watches.pop(watched)
+            self._paths.pop(wd, None)
+            self._rm_watch(self._fd, wd)
+
+
+class PollingBackend:
+    """Compares directory mtimes on an interval.
+
+    Adding, removing or renaming an entry touches its directory's mtime, which
+    is all this sees; rewriting a file in place is left to the next scan.
+    """
+
+    def __init__(self, interval: float = 0.25) -> None:
+        self._interval = interval
+        self._mtimes: dict[str, float] = {}
+        self._root = ""
+        self._next_poll = 0.0
+
+    def start(self, root: str) -> None:
+        self._root = root
+        self._mtimes = {}
+        self._record([root, *_subdirs(root)])
+        self._next_poll = time.monotonic() + self._interval
+
+    def read(self, timeout: float) -> set[str]:
+        delay = self._next_poll - time.monotonic()
+        if delay > timeout:
+            time.sleep(timeout)
+            return set()
+        if delay > 0:
+            time.sleep(delay)
+        self._next_poll = time.monotonic() + self._interval
+        dirty: set[str] = set()
+        for path, mtime in list(self._mtimes.items()):
+            if path not in self._mtimes:
+                continue
+            try:
+                current = os.stat(path).st_mtime
+            except OSError:
+                prefix = path + os.sep
+                for gone in [p for p in self._mtimes if p == path or p.startswith(prefix)]:
+                    del self._mtimes[gone]
+                dirty.add(os.path.dirname(path) if path != self._root else path)
+                continue
+            if current != mtime:
+                self._mtimes[path] = current
+                dirty.add(path)
+                new = [subdir for subdir in _subdirs(path) if subdir not in self._mtimes]
+                self._record(new)
+                dirty.update(new)
+        return dirty
+
+    def close(self) -> None:
+        self._mtimes = {}
+
+    def _record(self, paths: list[str]) -> None:
+        for path in paths:
+            try:
+                self._mtimes[path] = os.stat(path).st_mtime
+            except OSError:
+                continue
+
+
+class WatchService:
+    """Keeps ``file_index`` in step with edits made behind the tool's back.
+
+    Changed directories are collected until the tree has been quiet for
+    ``debounce`` seconds (or ``max_delay`` passed since the first change),
+    then rescanned as one directory-limited incremental scan.
+    """
+
+    def __init__(
+        self,
+        file_index: FileIndexService,
+        event_bus: EventBus,
+        debounce: float = 0.3,
+        max_delay: float = 1.0,
+        backend: str = "auto",
+    ) -> None:
+        self._file_index = file_index
+        self._event_bus = event_bus
+        self._debounce = debounce
+        self._max_delay = max_delay
+        self._backend_name = backend
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._root: Path | None = None
+        self._backend: InotifyBackend | PollingBackend | None = None
+
+    @property
+    def root(self) -> Path | None:
+        return self._root
+
+    @property
+    def backend_name(self) -> str:
+        if isinstance(self._backend, InotifyBackend):
+            return "inotify"
+        if isinstance(self._backend, PollingBackend):
+            return "polling"
+        return ""
+
+    def start(self, root: Path) -> None:
+        self.stop()
+        root = root.expanduser()
+        self._backend = self._create_backend(str(root))
+        self._root = root
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="fs-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._backend is not None:
+            self._backend.close()
+            self._backend = None
+        self._root = None
+
+    def _create_backend(self, root: str) -> InotifyBackend | PollingBackend:
+        if self._backend_name in ("auto", "inotify"):
+            backend = None
+            try:
+                backend = InotifyBackend()
+                backend.start(root)
+                return backend
+            except (WatcherUnavailable, OSError, AttributeError):
+                if backend is not None:
+                    backend.close()
+                if self._backend_name == "inotify":
+                    raise
+        backend = PollingBackend()
+        backend.start(root)
+        return backend
+
+    def _run(self) -> None:
+        backend, root = self._backend, self._root
+        dirty: set[str] = set()
+        first_change = last_change = 0.0
+        while not self._stop.is_set():
+            changed = backend.read(0.1)
+            now = time.monotonic()
+            if changed:
+                if not dirty:
+                    first_change = now
+                dirty |= changed
+                last_change = now
+            if dirty and (
+                now - last_change >= self._debounce or now - first_change >= self._max_delay
+            ):
+                batch, dirty = dirty, set()
+                self._flush(root, batch)
+
+    def _flush(self, root: Path, dirs: set[str]) -> None:
+        try:
+            summary = self._file_index.scan(root, mode="incremental", dirs=dirs)
+        except Exception as exc:  # noqa: BLE001
+            self._event_bus.publish("index.watch_failed", {"error": str(exc)})
+            return
+        if not (summary.added or summary.changed or summary.removed or summary.moved):
+            return
+        ordered = sorted(dirs)
+        self._event_bus.publish(
+            "index.delta",
+            {
+                "added": summary.added,
+                "changed": summary.changed,
+                "removed": summary.removed,
+                "moved": summary.moved,
+                "dirs": ordered[:DELTA_DIR_LIMIT],
+                "dir_count": len(ordered),
+            },
+        )
@@ -1,11 +1,178 @@
 from __future__ import annotations
 
+import os
 from dataclasses import dataclass
+from pathlib import Path
 
 from PySide6 import QtWidgets
 
+from ..core.download_service import DownloadRequest
 from .base import ModuleMeta
 
+COLUMNS = ["链接", "来源", "文件", "进度", "状态"]
+STATUS_LABELS = {
+    "downloaded": "已下载",
+    "in_library": "库中已有",
+    "queued": "排队中",
+    "running": "下载中",
+    "success": "完成",
+    "failed": "失败",
+    "cancelled": "已取消",
+}
+
+
+def _merge_progress(old: dict, new: dict) -> dict:
+    return {"items": {**old["items"], **new["items"]}}
+
+
+def _format_progress(done: int, total: int | None) -> str:
+    if total:
+        return f"{done * 100 // total}% ({done / 1048576:.1f} / {total / 1048576:.1f} MB)"
+    return f"{done / 1048576:.1f} MB"
+
+
+class DownloadQueueView(QtWidgets.QWidget):
+    def __init__(self, app: object) -> None:
+        super().__init__()
+        self._app = app
+        self._rows: dict[str, int] = {}
+        self._finished: set[str] = set()
+
+        self._links = QtWidgets.QPlainTextEdit()
+        self._links.setPlaceholderText("粘贴下载链接，每行一个")
+        self._links.setMaximumHeight(100)
+        self._summary = QtWidgets.QLabel()
+        self._dest = QtWidgets.QLineEdit(self._default_dir())
+        browse = QtWidgets.QPushButton("浏览…")
+        browse.clicked.connect(self._choose_dir)
+        enqueue = QtWidgets.QPushButton("加入队列")
+        enqueue.clicked.connect(self._enqueue)
+        cancel = QtWidgets.QPushButton("取消所选")
+        cancel.clicked.connect(self._cancel_selected)
+
+        self._table = QtWidgets.QTableWidget(0, len(COLUMNS))
+        self._table.setHorizontalHeaderLabels(COLUMNS)
+        self._table.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self._table.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+        self._table.verticalHeader().setVisible(False)
+        self._table.horizontalHeader().setStretchLastSection(True)
+
+        dest_row = QtWidgets.QHBoxLayout()
+        dest_row.addWidget(QtWidgets.QLabel("保存到:"))
+        dest_row.addWidget(self._dest, 1)
+        dest_row.addWidget(browse)
+        dest_row.addWidget(enqueue)
+        dest_row.addWidget(cancel)
+        layout = QtWidgets.QVBoxLayout(self)
+        layout.addWidget(self._links)
+        layout.addLayout(dest_row)
+        layout.addWidget(self._summary)
+        layout.addWidget(self._table, 1)
+
+        bus = app.event_bus
+        bus.subscribe(
+            ["download.progress"],
+            lambda name, payload: self._on_progress(payload),
+            mode="gui",
+            coalesce=_merge_progress,
+        )
+        bus.subscribe(
+            ["download.finished", "download.failed", "download.cancelled"],
+            self._on_done,
+            mode="gui",
+        )
+
+    def _default_dir(self) -> str:
+        settings = self._app.settings
+        return (
+            settings.get("download.dir")
+            or settings.get("mods_root")
+            or str(Path.home() / "Downloads")
+        )
+
+    def _choose_dir(self) -> None:
+        path = QtWidgets.QFileDialog.getExistingDirectory(self, "选择保存目录", self._dest.text())
+        if path:
+            self._dest.setText(path)
+
+    def _enqueue(self) -> None:
+        dest = self._dest.text().strip()
+        batch = self._app.download_meta.parse_text(self._links.toPlainText())
+        if not dest or not batch.links:
+            return
+        settings = self._app.settings
+        settings.set("download.dir", dest)
+        settings.save()
+        statuses = self._app.download_meta.check(batch.links)
+        skipped = queued = 0
+        self._table.setUpdatesEnabled(False)
+        try:
+            for status in statuses:
+                meta = status.meta
+                url = meta.download_url
+                row = self._rows.get(url)
+                if row is not None and url not in self._finished:
+                    continue  # still queued or downloading
+                if row is None:
+                    row = self._table.rowCount()
+                    self._table.insertRow(row)
+                    self._rows[url] = row
+                    self._table.setItem(row, 0, QtWidgets.QTableWidgetItem(meta.url))
+                    self._table.setItem(row, 1, QtWidgets.QTableWidgetItem(meta.source))
+                if status.state in ("downloaded", "in_library"):
+                    skipped += 1
+                    self._finished.add(url)
+                    name = os.path.basename(status.file_path)
+                    self._set_row(row, name, "", STATUS_LABELS[status.state])
+                    continue
+                self._finished.discard(url)
+                queued += 1
+                self._set_row(row, "", "", STATUS_LABELS["queued"])
+                self._app.downloads.submit(
+                    DownloadRequest(url=url, dest_dir=os.path.abspath(dest), item_id=meta.item_id)
+                )
+        finally:
+            self._table.setUpdatesEnabled(True)
+        self._summary.setText(
+            f"识别 {len(batch.links)} 条 · 已有 {skipped} 条 · 加入队列 {queued} 条"
+            f" · 重复 {batch.repeated} 条 · 忽略 {batch.ignored} 条"
+        )
+        self._links.clear()
+
+    def _cancel_selected(self) -> None:
+        rows = {index.row() for index in self._table.selectionModel().selectedRows()}
+        for url, row in self._rows.items():
+            if row in rows:
+                self._app.downloads.cancel(url)
+
+    def _set_row(self, row: int, file_name: str | None, progress: str, status: str) -> None:
+        if file_name is not None:
+            self._table.setItem(row, 2, QtWidgets.QTableWidgetItem(file_name))
+        self._table.setItem(row, 3, QtWidgets.QTableWidgetItem(progress))
+        self._table.setItem(row, 4, QtWidgets.QTableWidgetItem(status))
+
+    def _on_progress(self, payload: dict) -> None:
+        for url, (done, total) in payload["items"].items():
+            row = self._rows.get(url)
+            # Progress is coalesced separately and may trail the final event.
+            if row is not None and url not in self._finished:
+                self._set_row(row, None, _format_progress(done, total), STATUS_LABELS["running"])
+
+    def _on_done(self, name: str, payload: dict) -> None:
+        row = self._rows.get(payload["url"])
+        if row is None:
+            return
+        self._finished.add(payload["url"])
+        if name == "download.finished":
+            self._set_row(
+                row, payload["file_name"], _format_progress(payload["file_size"], None),
+                STATUS_LABELS["success"],
+            )
+        elif name == "download.failed":
+            self._set_row(row, None, "", f"{STATUS_LABELS['failed']}: {payload['error']}")
+        else:
+            self._set_row(row, None, "", STATUS_LABELS["cancelled"])
+
 
 @dataclass(frozen=True)
 class DownloaderModule:
@@ -22,10 +189,7 @@ class DownloaderModule:
         return []
 
     def create_tabs(self, app: object) -> list[QtWidgets.QWidget]:
-        tab = QtWidgets.QWidget()
-        layout = QtWidgets.QVBoxLayout(tab)
-        layout.addWidget(QtWidgets.QLabel("下载器骨架：链接解析 + 队列 + 去重检查。"))
-        layout.addStretch(1)
+        tab = DownloadQueueView(app)
         tab.setObjectName("Downloader")
         return [tab]
 
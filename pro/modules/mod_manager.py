@@ -1,10 +1,159 @@
 from __future__ import annotations
 
+import os
 from dataclasses import dataclass
 
-from PySide6 import QtWidgets
+from PySide6 import QtCore, QtWidgets
 
+from ..core.task_service import PRIORITY_USER
 from .base import ModuleMeta
+from .mod_table import ModTable
+
+PROBLEM_KINDS = {
+    "same_hash": "重复文件",
+    "name_conflict": "同名不同 hash",
+    "resource_conflict": "资源冲突",
+    "script_depth": "脚本深度异常",
+}
+
+
+def _problem_lists(app: object) -> tuple[list, list, list]:
+    """Duplicate groups, resource conflicts and misplaced scripts; runs on a worker."""
+    duplicates = getattr(app, "duplicates", None)
+    packages = getattr(app, "packages", None)
+    scripts = getattr(app, "scripts", None)
+    return (
+        duplicates.groups() if duplicates is not None else [],
+        packages.conflicts() if packages is not None else [],
+        scripts.depth_problems() if scripts is not None else [],
+    )
+
+
+class GroupTree(QtWidgets.QTreeWidget):
+    problems_loaded = QtCore.Signal(int, object)
+
+    def __init__(self, app: object) -> None:
+        super().__init__()
+        self._app = app
+        self._problems_handle = None
+        self._problems_generation = 0
+        self.problems_loaded.connect(self._show_problems)
+        self.setHeaderHidden(True)
+        self._groups = QtWidgets.QTreeWidgetItem(self, ["基础组别"])
+        QtWidgets.QTreeWidgetItem(self, ["最近新增"])
+        self._problems = QtWidgets.QTreeWidgetItem(self, ["问题 Mod"])
+        self._problems.setChildIndicatorPolicy(QtWidgets.QTreeWidgetItem.ShowIndicator)
+        self.itemExpanded.connect(self._on_expanded)
+        self.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
+        self.customContextMenuRequested.connect(self._show_menu)
+        app.event_bus.subscribe(
+            ["groups.changed", "mods.moved"],
+            lambda name, payload: self._load_groups(),
+            mode="gui",
+            coalesce=True,
+        )
+        self._load_groups()
+
+    def _load_groups(self) -> None:
+        self._groups.takeChildren()
+        for group in self._app.groups.groups():
+            label = f"{group.name} ({group.member_count})"
+            if group.disabled_count:
+                label += f" · 已停用 {group.disabled_count}"
+            child = QtWidgets.QTreeWidgetItem(self._groups, [label])
+            child.setData(0, QtCore.Qt.UserRole, group.group_id)
+
+    def _show_menu(self, pos: QtCore.QPoint) -> None:
+        item = self.itemAt(pos)
+        if item is None or item.parent() is not self._groups:
+            return
+        group_id = item.data(0, QtCore.Qt.UserRole)
+        menu = QtWidgets.QMenu(self)
+        disable_action = menu.addAction("停用组别")
+        enable_action = menu.addAction("启用组别")
+        menu.addSeparator()
+        undo_action = menu.addAction("撤销上次批量移动")
+        chosen = menu.exec(self.viewport().mapToGlobal(pos))
+        if chosen is disable_action:
+            self._app.request_group_disable(group_id)
+        elif chosen is enable_action:
+            self._app.request_group_enable(group_id)
+        elif chosen is undo_action:
+            self._app.request_move_undo()
+
+    def _on_expanded(self, item: QtWidgets.QTreeWidgetItem) -> None:
+        if item is not self._problems:
+            return
+        # The conflict query self-joins every shared resource key; keep it off the GUI thread.
+        if self._problems_handle is not None and not self._problems_handle.future.done():
+            self._problems_handle.cancel()
+        item.takeChildren()
+        QtWidgets.QTreeWidgetItem(item, ["加载中…"])
+        self._problems_generation += 1
+        generation = self._problems_generation
+        handle = self._app.tasks.submit(
+            "读取问题 Mod", _problem_lists, self._app, priority=PRIORITY_USER
+        )
+        self._problems_handle = handle
+
+        def done(future) -> None:
+            if not future.cancelled():
+                self.problems_loaded.emit(generation, future)
+
+        handle.future.add_done_callback(done)
+
+    def _show_problems(self, generation: int, future) -> None:
+        if generation != self._problems_generation:
+            return
+        item = self._problems
+        item.takeChildren()
+        try:
+            groups, conflicts, problems = future.result()
+        except Exception as exc:  # noqa: BLE001
+            QtWidgets.QTreeWidgetItem(item, [f"读取失败: {exc}"])
+            return
+        by_kind: dict[str, QtWidgets.QTreeWidgetItem] = {}
+        for group in groups:
+            kind_item = by_kind.get(group.kind)
+            if kind_item is None:
+                label = PROBLEM_KINDS.get(group.kind, group.kind)
+                kind_item = QtWidgets.QTreeWidgetItem(item, [label])
+                by_kind[group.kind] = kind_item
+            group_item = QtWidgets.QTreeWidgetItem(
+                kind_item, [f"{os.path.basename(group.paths[0])} ×{len(group.paths)}"]
+            )
+            for path in group.paths:
+                child = QtWidgets.QTreeWidgetItem(group_item, [path])
+                child.setToolTip(0, path)
+        if conflicts:
+            conflict_item = by_kind["resource_conflict"] = QtWidgets.QTreeWidgetItem(
+                item, [PROBLEM_KINDS["resource_conflict"]]
+            )
+        for conflict in conflicts:
+            pair_item = QtWidgets.QTreeWidgetItem(
+                conflict_item,
+                [
+                    f"{os.path.basename(conflict.path_a)} ↔ {os.path.basename(conflict.path_b)}"
+                    f" · {conflict.shared} 个资源"
+                ],
+            )
+            pair_item.setToolTip(0, "资源类型: " + ", ".join(conflict.types))
+            for path in (conflict.path_a, conflict.path_b):
+                child = QtWidgets.QTreeWidgetItem(pair_item, [path])
+                child.setToolTip(0, path)
+        if problems:
+            script_item = by_kind["script_depth"] = QtWidgets.QTreeWidgetItem(
+                item, [PROBLEM_KINDS["script_depth"]]
+            )
+        for script in problems:
+            if script.error is not None:
+                reason = f"无法读取: {script.error}"
+            else:
+                reason = f"位于第 {script.folder_depth} 层子文件夹，游戏只加载一层以内的脚本"
+            child = QtWidgets.QTreeWidgetItem(script_item, [script.rel_path])
+            child.setToolTip(0, f"{script.abs_path}\n{reason}")
+        for kind_item in by_kind.values():
+            kind_item.setText(0, f"{kind_item.text(0)} ({kind_item.childCount()})")
 
 
 @dataclass(frozen=True)
@@ -21,18 +170,11 @@ class ModManagerModule:
     def create_docks(self, app: object) -> list[QtWidgets.QDockWidget]:
         dock = QtWidgets.QDockWidget("虚拟组别")
         dock.setObjectName("ModGroupsDock")
-        list_widget = QtWidgets.QListWidget()
-        list_widget.addItems(["基础组别", "最近新增", "问题 Mod"])
-        dock.setWidget(list_widget)
+        dock.setWidget(GroupTree(app))
         return [dock]
 
     def create_tabs(self, app: object) -> list[QtWidgets.QWidget]:
-        tab = QtWidgets.QWidget()
-        layout = QtWidgets.QVBoxLayout(tab)
-        layout.addWidget(QtWidgets.QLabel("Mod 管理器：虚拟组别 + 批量停用/启用 + Undo。"))
-        layout.addStretch(1)
-        tab.setObjectName("ModManager")
-        return [tab]
+        return [ModTable(app)]
 
     def subscribe_events(self, bus: object) -> None:
         return None
@@ -0,0 +1,371 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from datetime import datetime
+
+from PySide6 import QtCore, QtWidgets
+
+from ..core.file_index_service import PAGE_COLUMNS, FileIndexService
+from ..core.task_service import PRIORITY_USER
+
+PAGE_SIZE = 200
+CACHE_PAGES = 32
+
+COLUMNS = [
+    ("file_name", "名称"),
+    ("rel_path", "相对路径"),
+    ("ext", "类型"),
+    ("size", "大小"),
+    ("mtime", "修改时间"),
+    ("status", "状态"),
+]
+STATUS_LABELS = {
+    "normal": "正常",
+    "changed": "已变更",
+    "missing": "缺失",
+    "disabled": "已停用",
+}
+
+_FIELD = {name: position for position, name in enumerate(PAGE_COLUMNS)}
+
+
+def _format_size(size: int | None) -> str:
+    if size is None:
+        return ""
+    if size < 1024:
+        return f"{size} B"
+    value = size / 1024
+    for unit in ("KB", "MB"):
+        if value < 1024:
+            return f"{value:.1f} {unit}"
+        value /= 1024
+    return f"{value:.1f} GB"
+
+
+class ModTableModel(QtCore.QAbstractTableModel):
+    """Table over ``file_index`` that only ever holds a few pages in memory.
+
+    Rows appear page by page through ``fetchMore``. Each page remembers the
+    sort key it starts after, so an evicted page is re-read with one keyset
+    query when the view scrolls back to it.
+    """
+
+    def __init__(
+        self, file_index: FileIndexService, parent: QtCore.QObject | None = None
+    ) -> None:
+        super().__init__(parent)
+        self._file_index = file_index
+        self._sort = "file_name"
+        self._descending = False
+        self._filter = ""
+        self._cursors: list[tuple | None] = [None]
+        self._pages: OrderedDict[int, list[tuple]] = OrderedDict()
+        self._row_count = 0
+        self._exhausted = False
+
+    @property
+    def filter_text(self) -> str:
+        return self._filter
+
+    def rowCount(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> int:
+        return 0 if parent.isValid() else self._row_count
+
+    def columnCount(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def headerData(
+        self,
+        section: int,
+        orientation: QtCore.Qt.Orientation,
+        role: int = QtCore.Qt.DisplayRole,
+    ):
+        if role == QtCore.Qt.DisplayRole and orientation == QtCore.Qt.Horizontal:
+            return COLUMNS[section][1]
+        return None
+
+    def data(self, index: QtCore.QModelIndex, role: int = QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row = self._row(index.row())
+        if row is None:
+            return None
+        name = COLUMNS[index.column()][0]
+        value = row[_FIELD[name]]
+        if role == QtCore.Qt.DisplayRole:
+            if name == "size":
+                return _format_size(value)
+            if name == "mtime":
+                return datetime.fromtimestamp(value).strftime("%Y-%m-%d %H:%M") if value else ""
+            if name == "status":
+                return STATUS_LABELS.get(value, value)
+            return value
+        if role == QtCore.Qt.ToolTipRole:
+            return row[_FIELD["abs_path"]]
+        if role == QtCore.Qt.UserRole:
+            return row[_FIELD["id"]]
+        if role == QtCore.Qt.TextAlignmentRole and name == "size":
+            return int(QtCore.Qt.AlignRight | QtCore.Qt.AlignVCenter)
+        return None
+
+    def canFetchMore(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> bool:
+        return not parent.isValid() and not self._exhausted
+
+    def fetchMore(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> None:
+        if parent.isValid() or self._exhausted:
+            return
+        rows = self._load_next()
+        if not rows:
+            return
+        first = self._row_count
+        self.beginInsertRows(QtCore.QModelIndex(), first, first + len(rows) - 1)
+        self._row_count += len(rows)
+        self.endInsertRows()
+
+    def sort(self, column: int, order: QtCore.Qt.SortOrder = QtCore.Qt.AscendingOrder) -> None:
+        sort = COLUMNS[column][0]
+        descending = order == QtCore.Qt.DescendingOrder
+        if (sort, descending) == (self._sort, self._descending) and self._row_count:
+            return
+        self._sort, self._descending = sort, descending
+        self.reload()
+
+    def set_filter(self, text: str) -> None:
+        if text == self._filter:
+            return
+        self._filter = text
+        self.reload()
+
+    def reload(
+        self, min_rows: int = PAGE_SIZE, keep_ids: set[int] | None = None
+    ) -> dict[int, int]:
+        """Re-read from the first page until ``min_rows`` rows are loaded."""
+        return self.reload_window(0, min_rows, keep_ids)
+
+    def reload_window(
+        self, first_row: int, min_rows: int, keep_ids: set[int] | None = None
+    ) -> dict[int, int]:
+        """Re-read from the page holding ``first_row`` until ``min_rows`` more rows are loaded.
+
+        Pages above it keep their cursors and are re-read only when scrolled
+        back into view; rows past the window come back through ``fetchMore``.
+        Returns the new row of each id in ``keep_ids`` found in the window,
+        so the view can put its selection and scroll position back.
+        """
+        found: dict[int, int] = {}
+        self.beginResetModel()
+        start_page = min(max(first_row, 0) // PAGE_SIZE, len(self._cursors) - 1)
+        del self._cursors[start_page + 1 :]
+        self._pages.clear()
+        self._row_count = start_page * PAGE_SIZE
+        self._exhausted = False
+        while self._row_count < first_row + min_rows and not self._exhausted:
+            rows = self._load_next()
+            if keep_ids:
+                for offset, row in enumerate(rows):
+                    if row[0] in keep_ids:
+                        found[row[0]] = self._row_count + offset
+            self._row_count += len(rows)
+        self.endResetModel()
+        return found
+
+    def count(self, filter_text: str | None = None) -> int:
+        """Matching rows in the table; safe to call from a worker thread."""
+        if filter_text is None:
+            filter_text = self._filter
+        return self._file_index.count_files(filter_text)
+
+    def file_id(self, row: int) -> int | None:
+        data = self._row(row)
+        return data[0] if data is not None else None
+
+    def _row(self, row: int) -> tuple | None:
+        if not 0 <= row < self._row_count:
+            return None
+        page = self._page(row // PAGE_SIZE)
+        offset = row % PAGE_SIZE
+        # A page re-read after eviction can come back shorter if rows vanished
+        # since; the next refresh realigns the view.
+        return page[offset] if offset < len(page) else None
+
+    def _page(self, number: int) -> list[tuple]:
+        page = self._pages.get(number)
+        if page is not None:
+            self._pages.move_to_end(number)
+            return page
+        return self._store(number, self._query(self._cursors[number]))
+
+    def _load_next(self) -> list[tuple]:
+        number = len(self._cursors) - 1
+        rows = self._query(self._cursors[number])
+        if len(rows) < PAGE_SIZE:
+            self._exhausted = True
+        if rows:
+            last = rows[-1]
+            self._cursors.append((last[_FIELD[self._sort]], last[0]))
+            self._store(number, rows)
+        return rows
+
+    def _store(self, number: int, rows: list[tuple]) -> list[tuple]:
+        self._pages[number] = rows
+        self._pages.move_to_end(number)
+        while len(self._pages) > CACHE_PAGES:
+            self._pages.popitem(last=False)
+        return rows
+
+    def _query(self, after: tuple | None) -> list[tuple]:
+        return self._file_index.page(
+            self._sort, self._descending, self._filter, after=after, limit=PAGE_SIZE
+        )
+
+
+class ModTable(QtWidgets.QWidget):
+    # (filter text, count), emitted from the counting task.
+    counted = QtCore.Signal(str, int)
+
+    def __init__(self, app: object) -> None:
+        super().__init__()
+        self.setObjectName("ModManager")
+        self._app = app
+        self._model = ModTableModel(app.file_index, self)
+
+        self._filter = QtWidgets.QLineEdit()
+        self._filter.setPlaceholderText("筛选文件名 / 路径")
+        self._filter.setClearButtonEnabled(True)
+        self._count = QtWidgets.QLabel()
+
+        self._view = QtWidgets.QTableView()
+        self._view.setModel(self._model)
+        self._view.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+        self._view.setSelectionMode(QtWidgets.QAbstractItemView.ExtendedSelection)
+        self._view.setAlternatingRowColors(True)
+        self._view.setWordWrap(False)
+        self._view.verticalHeader().setVisible(False)
+        self._view.verticalHeader().setSectionResizeMode(QtWidgets.QHeaderView.Fixed)
+        self._view.verticalHeader().setDefaultSectionSize(22)
+        self._view.horizontalHeader().setStretchLastSection(True)
+        self._view.horizontalHeader().setSortIndicator(0, QtCore.Qt.AscendingOrder)
+        self._view.setSortingEnabled(True)
+        self._view.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
+        self._view.customContextMenuRequested.connect(self._show_menu)
+
+        top = QtWidgets.QHBoxLayout()
+        top.addWidget(self._filter, 1)
+        top.addWidget(self._count)
+        layout = QtWidgets.QVBoxLayout(self)
+        layout.addLayout(top)
+        layout.addWidget(self._view, 1)
+
+        self._filter_timer = QtCore.QTimer(self)
+        self._filter_timer.setSingleShot(True)
+        self._filter_timer.setInterval(250)
+        self._filter_timer.timeout.connect(self._apply_filter)
+        self._filter.textChanged.connect(self._filter_timer.start)
+        self._refresh_timer = QtCore.QTimer(self)
+        self._refresh_timer.setSingleShot(True)
+        self._refresh_timer.setInterval(300)
+        self._refresh_timer.timeout.connect(self.refresh)
+        self._model.modelReset.connect(self._update_count)
+        self.counted.connect(self._show_count)
+        self._count_handle = None
+
+        app.event_bus.subscribe(
+            ["index.updated", "index.delta", "mods.moved"],
+            lambda name, payload: self._schedule_refresh(),
+            mode="gui",
+            coalesce=True,
+        )
+
+    def refresh(self) -> None:
+        selection = self._view.selectionModel()
+        selected_rows = [index.row() for index in selection.selectedRows()]
+        ids = {self._model.file_id(row) for row in selected_rows}
+        ids.discard(None)
+        current = self._model.file_id(self._view.currentIndex().row())
+        top = self._model.file_id(self._view.rowAt(0))
+        scroll = self._view.verticalScrollBar().value()
+        keep = set(ids)
+        keep.update(file_id for file_id in (current, top) if file_id is not None)
+
+        first = max(self._view.rowAt(0), 0)
+        row_height = self._view.verticalHeader().defaultSectionSize()
+        visible = self._view.viewport().height() // row_height + 1
+        rows = self._model.reload_window(first, max(visible, PAGE_SIZE), keep)
+        # Rows above the re-read window keep their page positions.
+        window_start = first // PAGE_SIZE * PAGE_SIZE
+        restored = {rows[file_id] for file_id in ids if file_id in rows}
+        restored.update(row for row in selected_rows if row < window_start)
+
+        selected = QtCore.QItemSelection()
+        last_column = self._model.columnCount() - 1
+        for start, end in _runs(sorted(restored)):
+            selected.select(self._model.index(start, 0), self._model.index(end, last_column))
+        selection.select(selected, QtCore.QItemSelectionModel.Select)
+        if current in rows:
+            selection.setCurrentIndex(
+                self._model.index(rows[current], 0), QtCore.QItemSelectionModel.NoUpdate
+            )
+        if top in rows:
+            self._view.scrollTo(
+                self._model.index(rows[top], 0), QtWidgets.QAbstractItemView.PositionAtTop
+            )
+        else:
+            self._view.verticalScrollBar().setValue(scroll)
+
+    def _show_menu(self, pos: QtCore.QPoint) -> None:
+        rows = self._view.selectionModel().selectedRows()
+        ids = [self._model.file_id(index.row()) for index in rows]
+        ids = [file_id for file_id in ids if file_id is not None]
+        if not ids:
+            return
+        menu = QtWidgets.QMenu(self)
+        add_action = menu.addAction(f"加入组别… ({len(ids)})")
+        if menu.exec(self._view.viewport().mapToGlobal(pos)) is add_action:
+            self._add_to_group(ids)
+
+    def _add_to_group(self, ids: list[int]) -> None:
+        groups = self._app.groups
+        names = [group.name for group in groups.groups()]
+        name, ok = QtWidgets.QInputDialog.getItem(
+            self, "加入组别", "组别名称:", names, 0, True
+        )
+        name = name.strip()
+        if not ok or not name:
+            return
+        added = groups.add_files(groups.create_group(name), ids)
+        self._app.event_bus.publish("groups.changed", {"name": name, "added": added})
+
+    def _schedule_refresh(self) -> None:
+        self._refresh_timer.start()
+
+    def _apply_filter(self) -> None:
+        self._model.set_filter(self._filter.text())
+
+    def _update_count(self) -> None:
+        # A LIKE filter over every row can take a while; count on a worker.
+        if self._count_handle is not None and not self._count_handle.future.done():
+            self._count_handle.cancel()
+        filter_text = self._model.filter_text
+        handle = self._app.tasks.submit(
+            "统计文件数", self._model.count, filter_text, priority=PRIORITY_USER
+        )
+        self._count_handle = handle
+
+        def done(future) -> None:
+            if not future.cancelled() and future.exception() is None:
+                self.counted.emit(filter_text, future.result())
+
+        handle.future.add_done_callback(done)
+
+    def _show_count(self, filter_text: str, count: int) -> None:
+        if filter_text == self._model.filter_text:
+            self._count.setText(f"共 {count} 个文件")
+
+
+def _runs(rows: list[int]) -> list[tuple[int, int]]:
+    runs: list[tuple[int, int]] = []
+    for row in rows:
+        if runs and runs[-1][1] == row - 1:
+            runs[-1] = (runs[-1][0], row)
+        else:
+            runs.append((row, row))
+    return runs
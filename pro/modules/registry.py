@@ -1,8 +1,46 @@
 from __future__ import annotations
 
-from .downloader import DownloaderModule
-from .mod_manager import ModManagerModule
+import importlib
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class ModuleEntry:
+    module_id: str
+    name: str
+    target: str
+    tabs: tuple[str, ...] = ()
+    eager: bool = False
+
+    def load(self) -> object:
+        module_name, _, attribute = self.target.partition(":")
+        return getattr(importlib.import_module(module_name), attribute)()
+
+
+# Modules are imported only when one of their tabs is first opened, or right
+# after startup for ``eager`` ones that contribute docks.
+MODULE_ENTRIES = (
+    ModuleEntry(
+        module_id="downloader",
+        name="Downloader",
+        target="pro.modules.downloader:DownloaderModule",
+        tabs=("Downloader",),
+    ),
+    ModuleEntry(
+        module_id="mod_manager",
+        name="Mod Manager",
+        target="pro.modules.mod_manager:ModManagerModule",
+        tabs=("ModManager",),
+        eager=True,
+    ),
+    ModuleEntry(
+        module_id="version_converter",
+        name="Version Converter",
+        target="pro.modules.version_converter:VersionConverterModule",
+        tabs=("VersionConverter",),
+    ),
+)
 
 
 def load_modules() -> list[object]:
-    return [DownloaderModule(), ModManagerModule()]
+    return [entry.load() for entry in MODULE_ENTRIES]
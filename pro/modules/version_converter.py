@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+
+from PySide6 import QtCore, QtWidgets
+
+from ..core.task_service import PRIORITY_USER, TaskHandle
+from ..core.tray_converter import (
+    ConvertOptions,
+    ConvertSummary,
+    VersionConverter,
+    detect_version,
+    parse_hex_version,
+)
+from .base import ModuleMeta
+
+# At most this many per-file problems are written to the log.
+MAX_LOGGED_PROBLEMS = 50
+
+
+class VersionConverterView(QtWidgets.QWidget):
+    # Emitted from the worker thread; Qt queues it onto the GUI thread.
+    finished = QtCore.Signal(object)
+
+    def __init__(self, app: object) -> None:
+        super().__init__()
+        self._app = app
+        self._converter = VersionConverter(app.tasks)
+        self._handle: TaskHandle | None = None
+        settings = app.settings
+
+        self._source = QtWidgets.QLineEdit(settings.get("tray_converter.source") or "")
+        self._output = QtWidgets.QLineEdit(settings.get("tray_converter.output") or "")
+        self._version = QtWidgets.QLineEdit(settings.get("tray_converter.version") or "00002BC0")
+        self._version.setPlaceholderText("00002BC0")
+        self._reference = QtWidgets.QLineEdit()
+        self._reference.setPlaceholderText("可选：目标版本游戏保存的 .trayitem")
+        self._recursive = QtWidgets.QCheckBox("包含子目录")
+        self._recursive.setChecked(True)
+        self._copy_associated = QtWidgets.QCheckBox("复制同组文件")
+        self._copy_associated.setChecked(True)
+        self._overwrite = QtWidgets.QCheckBox("覆盖已存在的输出")
+        self._dry_run = QtWidgets.QCheckBox("仅检测，不写入")
+        self._start = QtWidgets.QPushButton("开始转换")
+        self._start.clicked.connect(self._start_conversion)
+        self._cancel = QtWidgets.QPushButton("取消")
+        self._cancel.setEnabled(False)
+        self._cancel.clicked.connect(self._cancel_conversion)
+        self._progress = QtWidgets.QProgressBar()
+        self._status = QtWidgets.QLabel()
+        self._timer = QtCore.QTimer(self)
+        self._timer.setInterval(200)
+        self._timer.timeout.connect(self._poll)
+        self.finished.connect(self._on_finished)
+
+        form = QtWidgets.QFormLayout()
+        form.addRow("Tray 目录:", self._path_row(self._source, directory=True))
+        form.addRow("输出目录:", self._path_row(self._output, directory=True))
+        form.addRow("目标版本 (hex):", self._version)
+        form.addRow("参考文件:", self._path_row(self._reference, directory=False))
+        options = QtWidgets.QHBoxLayout()
+        for box in (self._recursive, self._copy_associated, self._overwrite, self._dry_run):
+            options.addWidget(box)
+        options.addStretch(1)
+        buttons = QtWidgets.QHBoxLayout()
+        buttons.addWidget(self._start)
+        buttons.addWidget(self._cancel)
+        buttons.addWidget(self._progress, 1)
+        layout = QtWidgets.QVBoxLayout(self)
+        layout.addLayout(form)
+        layout.addLayout(options)
+        layout.addLayout(buttons)
+        layout.addWidget(self._status)
+        layout.addStretch(1)
+
+    def _path_row(self, edit: QtWidgets.QLineEdit, directory: bool) -> QtWidgets.QWidget:
+        browse = QtWidgets.QPushButton("浏览…")
+        browse.clicked.connect(lambda: self._choose(edit, directory))
+        row = QtWidgets.QWidget()
+        layout = QtWidgets.QHBoxLayout(row)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(edit, 1)
+        layout.addWidget(browse)
+        return row
+
+    def _choose(self, edit: QtWidgets.QLineEdit, directory: bool) -> None:
+        if directory:
+            path = QtWidgets.QFileDialog.getExistingDirectory(self, "选择目录", edit.text())
+        else:
+            path, _ = QtWidgets.QFileDialog.getOpenFileName(
+                self, "选择参考文件", edit.text(), "Tray 文件 (*.trayitem)"
+            )
+        if path:
+            edit.setText(path)
+
+    def _start_conversion(self) -> None:
+        if self._handle is not None and not self._handle.future.done():
+            return
+        source = self._source.text().strip()
+        output = self._output.text().strip() or source
+        if not source or not Path(source).is_dir():
+            self._status.setText("请选择存在的 Tray 目录。")
+            return
+        ref_path = None
+        try:
+            reference = self._reference.text().strip()
+            if reference:
+                found = detect_version(Path(reference))
+                version, ref_path = found.value, found.path
+                self._version.setText(f"{version:08X}")
+            else:
+                version = parse_hex_version(self._version.text())
+        except (OSError, ValueError) as exc:
+            self._status.setText(str(exc))
+            return
+        options = ConvertOptions(
+            recursive=self._recursive.isChecked(),
+            copy_associated=self._copy_associated.isChecked(),
+            # Converting into the source directory always rewrites the originals.
+            overwrite=self._overwrite.isChecked() or Path(output) == Path(source),
+            dry_run=self._dry_run.isChecked(),
+        )
+        settings = self._app.settings
+        settings.set("tray_converter.source", source)
+        settings.set("tray_converter.output", output)
+        settings.set("tray_converter.version", f"{version:08X}")
+        settings.save()
+
+        handle = self._app.tasks.submit_with_context(
+            "Tray 版本转换",
+            self._converter.convert,
+            Path(source),
+            Path(output),
+            version,
+            options,
+            ref_path,
+            priority=PRIORITY_USER,
+        )
+        self._handle = handle
+        handle.future.add_done_callback(lambda _: self.finished.emit(handle))
+        self._start.setEnabled(False)
+        self._cancel.setEnabled(True)
+        self._progress.setRange(0, 0)
+        self._status.setText(f"转换到 0x{version:08X}…")
+        self._timer.start()
+
+    def _cancel_conversion(self) -> None:
+        if self._handle is not None:
+            self._handle.cancel()
+
+    def _poll(self) -> None:
+        progress = self._handle.progress if self._handle is not None else None
+        if progress is not None and progress.total:
+            self._progress.setRange(0, progress.total)
+            self._progress.setValue(progress.done)
+            self._status.setText(progress.describe())
+
+    def _on_finished(self, handle: TaskHandle) -> None:
+        self._timer.stop()
+        self._start.setEnabled(True)
+        self._cancel.setEnabled(False)
+        self._progress.setRange(0, 1)
+        self._progress.setValue(1)
+        log = self._app.log
+        if handle.future.cancelled():
+            self._status.setText("已取消。")
+            return
+        try:
+            summary: ConvertSummary = handle.future.result()
+        except Exception as exc:  # noqa: BLE001
+            self._status.setText(f"转换失败: {exc}")
+            log.error(f"Tray 版本转换失败: {exc}")
+            return
+        message = (
+            f"共 {summary.total} · 已修改 {summary.patched} · 无需修改 {summary.same}"
+            f" · 跳过 {summary.skipped} · 失败 {summary.errors}"
+        )
+        if summary.cancelled:
+            message += "（已取消）"
+        self._status.setText(message)
+        log.info(f"Tray 版本转换: {message}")
+        for problem in summary.problems[:MAX_LOGGED_PROBLEMS]:
+            log.warning(f"  {problem.name}: {problem.detail}")
+        if len(summary.problems) > MAX_LOGGED_PROBLEMS:
+            log.warning(f"  …另有 {len(summary.problems) - MAX_LOGGED_PROBLEMS} 个问题未列出")
+
+
+@dataclass(frozen=True)
+class VersionConverterModule:
+    meta: ModuleMeta = ModuleMeta(
+        module_id="version_converter",
+        name="Version Converter",
+        version="0.1.0",
+    )
+
+    def register_actions(self, app: object) -> None:
+        return None
+
+    def create_docks(self, app: object) -> list[QtWidgets.QDockWidget]:
+        return []
+
+    def create_tabs(self, app: object) -> list[QtWidgets.QWidget]:
+        tab = VersionConverterView(app)
+        tab.setObjectName("VersionConverter")
+        return [tab]
+
+    def subscribe_events(self, bus: object) -> None:
+        return None
@@ -1,8 +1,53 @@
 from __future__ import annotations
 
-from PySide6 import QtWidgets
+from PySide6 import QtCore, QtGui, QtWidgets
 
-from ..core.log_service import LogEntry, LogService
+from ..core.log_service import LEVELS, LogEntry, LogService, filter_entries
+
+FLUSH_INTERVAL_MS = 200
+LEVEL_LABELS = {"INFO": "全部", "WARN": "警告及以上", "ERROR": "仅错误"}
+LEVEL_COLORS = {"WARN": QtGui.QColor("#b36b00"), "ERROR": QtGui.QColor("#c0392b")}
+
+
+class LogModel(QtCore.QAbstractListModel):
+    """Shows the matching entries of the log buffer, appended in batches."""
+
+    def __init__(self, capacity: int, parent: QtCore.QObject | None = None) -> None:
+        super().__init__(parent)
+        self._capacity = capacity
+        self._entries: list[LogEntry] = []
+
+    def rowCount(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._entries)
+
+    def data(self, index: QtCore.QModelIndex, role: int = QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        entry = self._entries[index.row()]
+        if role == QtCore.Qt.DisplayRole:
+            return entry.format()
+        if role == QtCore.Qt.ForegroundRole:
+            return LEVEL_COLORS.get(entry.level)
+        return None
+
+    def reset(self, entries: list[LogEntry]) -> None:
+        self.beginResetModel()
+        self._entries = entries[-self._capacity :]
+        self.endResetModel()
+
+    def extend(self, entries: list[LogEntry]) -> None:
+        if not entries:
+            return
+        entries = entries[-self._capacity :]
+        overflow = len(self._entries) + len(entries) - self._capacity
+        if overflow > 0:
+            self.beginRemoveRows(QtCore.QModelIndex(), 0, overflow - 1)
+            del self._entries[:overflow]
+            self.endRemoveRows()
+        first = len(self._entries)
+        self.beginInsertRows(QtCore.QModelIndex(), first, first + len(entries) - 1)
+        self._entries.extend(entries)
+        self.endInsertRows()
 
 
 class LogDock(QtWidgets.QDockWidget):
@@ -10,13 +55,63 @@ class LogDock(QtWidgets.QDockWidget):
         super().__init__("日志")
         self.setObjectName("LogDock")
         self._log_service = log_service
-        self._list = QtWidgets.QListWidget()
-        self._list.setAlternatingRowColors(True)
-        self.setWidget(self._list)
-        self._log_service.add_listener(self._append)
-        for entry in self._log_service.entries():
-            self._append(entry)
-
-    def _append(self, entry: LogEntry) -> None:
-        timestamp = entry.timestamp.strftime("%H:%M:%S")
-        self._list.addItem(f"[{timestamp}] {entry.level}: {entry.message}")
+        self._model = LogModel(log_service.capacity, self)
+        self._last_seq = 0
+
+        self._level = QtWidgets.QComboBox()
+        for level in LEVELS:
+            self._level.addItem(LEVEL_LABELS[level], level)
+        self._search = QtWidgets.QLineEdit()
+        self._search.setPlaceholderText("搜索日志")
+        self._search.setClearButtonEnabled(True)
+
+        self._view = QtWidgets.QListView()
+        self._view.setModel(self._model)
+        self._view.setAlternatingRowColors(True)
+        self._view.setUniformItemSizes(True)
+        self._view.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self._view.setSelectionMode(QtWidgets.QAbstractItemView.ExtendedSelection)
+
+        top = QtWidgets.QHBoxLayout()
+        top.setContentsMargins(0, 0, 0, 0)
+        top.addWidget(self._level)
+        top.addWidget(self._search, 1)
+        container = QtWidgets.QWidget()
+        layout = QtWidgets.QVBoxLayout(container)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addLayout(top)
+        layout.addWidget(self._view, 1)
+        self.setWidget(container)
+
+        self._search_timer = QtCore.QTimer(self)
+        self._search_timer.setSingleShot(True)
+        self._search_timer.setInterval(250)
+        self._search_timer.timeout.connect(self._rebuild)
+        self._search.textChanged.connect(self._search_timer.start)
+        self._level.currentIndexChanged.connect(self._rebuild)
+
+        # Entries are pulled on a timer, so a burst costs one insert per tick.
+        self._flush_timer = QtCore.QTimer(self)
+        self._flush_timer.timeout.connect(self._flush)
+        self._flush_timer.start(FLUSH_INTERVAL_MS)
+        self._rebuild()
+
+    def _filters(self) -> tuple[str, str]:
+        return self._level.currentData(), self._search.text().strip()
+
+    def _rebuild(self) -> None:
+        entries = self._log_service.since(0)
+        self._last_seq = entries[-1].seq if entries else 0
+        self._model.reset(filter_entries(entries, *self._filters()))
+        self._view.scrollToBottom()
+
+    def _flush(self) -> None:
+        entries = self._log_service.since(self._last_seq)
+        if not entries:
+            return
+        self._last_seq = entries[-1].seq
+        scrollbar = self._view.verticalScrollBar()
+        at_bottom = scrollbar.value() >= scrollbar.maximum() - 2
+        self._model.extend(filter_entries(entries, *self._filters()))
+        if at_bottom:
+            self._view.scrollToBottom()
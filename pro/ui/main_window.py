@@ -1,7 +1,11 @@
 from __future__ import annotations
 
 import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
 from pathlib import Path
+from typing import TYPE_CHECKING, Callable
 
 if __package__ is None:  # Allows running this file directly.
     sys.path.append(str(Path(__file__).resolve().parents[2]))
@@ -9,76 +13,323 @@ if __package__ is None:  # Allows running this file directly.
 from PySide6 import QtCore, QtGui, QtWidgets
 
 from pro.core.event_bus import EventBus
-from pro.core.file_index_service import FileIndexService, ScanSummary
 from pro.core.log_service import LogService
-from pro.core.op_log_service import OpLogService
 from pro.core.settings_service import SettingsService
-from pro.core.task_service import TaskService
-from pro.modules.registry import load_modules
+from pro.core.startup import StartupTimer
+from pro.core.task_service import (
+    LANE_DB,
+    PRIORITY_BACKGROUND,
+    PRIORITY_USER,
+    TaskHandle,
+    TaskService,
+)
+from pro.core.tracing import TRACER
+from pro.modules.registry import MODULE_ENTRIES, ModuleEntry
 from pro.ui.log_dock import LogDock
+from pro.ui.perf_dock import PerfDock
 from pro.ui.task_dock import TaskDock
+
+if TYPE_CHECKING:
+    from pro.core.download_meta_service import DownloadMetaService
+    from pro.core.download_service import DownloadService
+    from pro.core.duplicate_service import DuplicateService, DuplicateSummary
+    from pro.core.file_index_service import FileIndexService, ScanSummary
+    from pro.core.group_service import GroupService
+    from pro.core.hash_service import HashService, HashSummary
+    from pro.core.mod_meta_service import MetaRefreshSummary, ModMetaService
+    from pro.core.move_engine import MoveSummary
+    from pro.core.op_log_service import OpLogService
+    from pro.core.package_index_service import PackageIndexService, PackageIndexSummary
+    from pro.core.script_inspector import ScriptInspector, ScriptInspectSummary
+    from pro.core.search_service import SearchHit, SearchRunner
+    from pro.core.watch_service import WatchService
 from pathlib import Path
 
 from PySide6 import QtCore, QtGui, QtWidgets
 
 from ..core.event_bus import EventBus
-from ..core.file_index_service import FileIndexService, ScanSummary
 from ..core.log_service import LogService
-from ..core.op_log_service import OpLogService
 from ..core.settings_service import SettingsService
-from ..core.task_service import TaskService
-from ..modules.registry import load_modules
+from ..core.startup import StartupTimer
+from ..core.task_service import (
+    LANE_DB,
+    PRIORITY_BACKGROUND,
+    PRIORITY_USER,
+    TaskHandle,
+    TaskService,
+)
+from ..core.tracing import TRACER
+from ..modules.registry import MODULE_ENTRIES, ModuleEntry
 from .log_dock import LogDock
+from .perf_dock import PerfDock
 from .task_dock import TaskDock
 
+if TYPE_CHECKING:
+    from ..core.download_meta_service import DownloadMetaService
+    from ..core.download_service import DownloadService
+    from ..core.duplicate_service import DuplicateService, DuplicateSummary
+    from ..core.file_index_service import FileIndexService, ScanSummary
+    from ..core.group_service import GroupService
+    from ..core.hash_service import HashService, HashSummary
+    from ..core.mod_meta_service import MetaRefreshSummary, ModMetaService
+    from ..core.move_engine import MoveSummary
+    from ..core.op_log_service import OpLogService
+    from ..core.package_index_service import PackageIndexService, PackageIndexSummary
+    from ..core.script_inspector import ScriptInspector, ScriptInspectSummary
+    from ..core.search_service import SearchHit, SearchRunner
+    from ..core.watch_service import WatchService
+
+
+@dataclass(frozen=True)
+class Services:
+    """Everything that needs the database, built off the GUI thread at startup."""
+
+    file_index: FileIndexService
+    op_log: OpLogService
+    hash_service: HashService
+    duplicates: DuplicateService
+    search: SearchRunner
+    watcher: WatchService
+    groups: GroupService
+    downloads: DownloadService
+    download_meta: DownloadMetaService
+    mod_meta: ModMetaService
+    packages: PackageIndexService
+    scripts: ScriptInspector
+
+
+class _SearchBridge(QtCore.QObject):
+    results = QtCore.Signal(int, str, list)
+
+
+class _GuiDispatcher(QtCore.QObject):
+    """Runs callables posted from any thread on the GUI thread."""
+
+    call = QtCore.Signal(object)
+
+    def __init__(self, parent: QtCore.QObject | None = None) -> None:
+        super().__init__(parent)
+        # Queued even from the GUI thread, so a burst coalesces into one pass.
+        self.call.connect(self._run, QtCore.Qt.QueuedConnection)
+
+    @staticmethod
+    def _run(fn) -> None:
+        fn()
+
 
 class MainWindow(QtWidgets.QMainWindow):
+    """Main window, shown before the database is ready.
+
+    ``start`` builds the services on a worker; ``attach`` then loads the eager
+    modules and kicks off the startup scan. Other modules stay unimported until
+    their tab is first opened.
+    """
+
     def __init__(
         self,
         settings: SettingsService,
         event_bus: EventBus,
         tasks: TaskService,
         log_service: LogService,
-        file_index: FileIndexService,
-        op_log: OpLogService,
+        startup: StartupTimer | None = None,
     ) -> None:
         super().__init__()
         self._settings = settings
         self._event_bus = event_bus
         self._tasks = tasks
         self._log = log_service
-        self._file_index = file_index
-        self._op_log = op_log
+        self._startup = startup or StartupTimer()
+        self._services: Services | None = None
+        self._scan_handle: TaskHandle | None = None
+        self._hash_handle: TaskHandle | None = None
+        self._duplicates_handle: TaskHandle | None = None
+        self._move_handle: TaskHandle | None = None
+        self._meta_handle: TaskHandle | None = None
+        self._packages_handle: TaskHandle | None = None
+        self._scripts_handle: TaskHandle | None = None
+        self._search_generation = 0
+        self._search_hits: list[SearchHit] = []
+        self._search_bridge = _SearchBridge(self)
+        self._search_bridge.results.connect(self._on_search_results)
+        self._placeholders: dict[QtWidgets.QWidget, ModuleEntry] = {}
+        self._loaded_modules: set[str] = set()
         self.setWindowTitle("SimsToolbox Pro")
         self.setObjectName("MainWindow")
         self.resize(1200, 780)
 
         self._tab_widget = QtWidgets.QTabWidget()
         self._tab_widget.setMovable(True)
+        self._tab_widget.currentChanged.connect(self._on_tab_changed)
         self.setCentralWidget(self._tab_widget)
 
+        self._gui = _GuiDispatcher(self)
+        self._event_bus.set_gui_dispatcher(self._gui.call.emit)
+
         self._build_menu()
         self._build_toolbar()
         self._build_docks()
-        self._load_modules()
-        self._restore_layout()
+        self._add_placeholders()
+        geometry = self._settings.get("main_window.geometry")
+        if geometry:
+            self.restoreGeometry(bytes.fromhex(geometry))
+        state = self._settings.get("main_window.state")
+        if state:
+            # Docks from modules loaded later are placed by restoreDockWidget.
+            self.restoreState(bytes.fromhex(state))
 
-        self._status_root = QtWidgets.QLabel("根目录: 未设置")
-        self._status_scan = QtWidgets.QLabel("扫描: 未开始")
+        root = self._settings.get("mods_root")
+        self._status_root = QtWidgets.QLabel(f"根目录: {root}" if root else "根目录: 未设置")
+        self._status_scan = QtWidgets.QLabel("数据库: 加载中")
+        self._status_external = QtWidgets.QLabel("外部变更: 无")
         self.statusBar().addPermanentWidget(self._status_root)
         self.statusBar().addPermanentWidget(self._status_scan)
+        self.statusBar().addPermanentWidget(self._status_external)
 
         self._poll_timer = QtCore.QTimer(self)
         self._poll_timer.timeout.connect(self._poll_tasks)
         self._poll_timer.start(300)
 
+    def start(self, build_services) -> None:
+        """Build the services with ``build_services`` on a worker, then attach them."""
+        # The first pass of the event loop paints the window.
+        QtCore.QTimer.singleShot(0, self._on_first_paint)
+        handle = self._tasks.submit("加载数据库", build_services, priority=PRIORITY_USER)
+        self._when_done(handle, self._on_services_built)
+
+    def _on_first_paint(self) -> None:
+        interactive = self._startup.mark("首帧")
+        self._log.info(f"窗口可交互: {interactive * 1000:.0f} ms")
+
+    def _on_services_built(self, handle: TaskHandle) -> None:
+        try:
+            services: Services = handle.future.result()
+        except Exception as exc:  # noqa: BLE001
+            self._status_scan.setText("数据库: 加载失败")
+            self._log.error(f"数据库初始化失败: {exc}")
+            return
+        self.attach(services)
+
+    def attach(self, services: Services) -> None:
+        started = time.perf_counter()
+        self._services = services
+        self._file_index = services.file_index
+        self._op_log = services.op_log
+        self._hash_service = services.hash_service
+        self._duplicates = services.duplicates
+        self._search = services.search
+        self._watcher = services.watcher
+        self._groups = services.groups
+        self._downloads = services.downloads
+        self._download_meta = services.download_meta
+        self._mod_meta = services.mod_meta
+        self._packages = services.packages
+        self._scripts = services.scripts
+        self._status_scan.setText("扫描: 未开始")
+
+        from ..core.watch_service import merge_deltas
+
+        self._event_bus.subscribe(["index.updated"], self._on_index_updated, mode="gui")
+        self._event_bus.subscribe(
+            ["index.delta"],
+            lambda name, payload: self._on_index_delta(payload),
+            mode="gui",
+            coalesce=merge_deltas,
+        )
+        self._event_bus.subscribe(
+            ["index.watch_failed"],
+            lambda name, payload: self._log.error(f"外部变更同步失败: {payload['error']}"),
+            mode="gui",
+            coalesce=True,
+        )
+
+        for entry in MODULE_ENTRIES:
+            if entry.eager:
+                self._load_module(entry)
+        self._on_tab_changed(self._tab_widget.currentIndex())
+        self._startup.add("模块", time.perf_counter() - started)
+
         self._log.info("SimsToolbox Pro 已启动。")
+        self._log.info(self._startup.summary())
+        # Settle half-finished moves before a scan or the watcher reads the tree.
+        QtCore.QTimer.singleShot(0, self._check_interrupted_moves)
+
+    def _start_background_work(self) -> None:
+        root = self._settings.get("mods_root")
+        if root and self._settings.get("scan.on_startup", True):
+            self.request_scan()
+        else:
+            self.request_hashing()
+        if root:
+            self.start_watching()
+
+    @property
+    def download_meta(self) -> DownloadMetaService:
+        return self._download_meta
+
+    @property
+    def downloads(self) -> DownloadService:
+        return self._downloads
+
+    @property
+    def duplicates(self) -> DuplicateService:
+        return self._duplicates
+
+    @property
+    def event_bus(self) -> EventBus:
+        return self._event_bus
+
+    @property
+    def file_index(self) -> FileIndexService:
+        return self._file_index
+
+    @property
+    def groups(self) -> GroupService:
+        return self._groups
+
+    @property
+    def log(self) -> LogService:
+        return self._log
+
+    @property
+    def packages(self) -> PackageIndexService:
+        return self._packages
+
+    @property
+    def scripts(self) -> ScriptInspector:
+        return self._scripts
+
+    @property
+    def settings(self) -> SettingsService:
+        return self._settings
+
+    @property
+    def tasks(self) -> TaskService:
+        return self._tasks
 
     def closeEvent(self, event: QtGui.QCloseEvent) -> None:
         self._settings.set("main_window.geometry", self.saveGeometry().data().hex())
         self._settings.set("main_window.state", self.saveState().data().hex())
         self._settings.save()
+        for handle in (
+            self._scan_handle,
+            self._hash_handle,
+            self._duplicates_handle,
+            self._move_handle,
+            self._meta_handle,
+            self._packages_handle,
+            self._scripts_handle,
+        ):
+            if handle is not None:
+                handle.cancel()
+        if self._services is not None:
+            self._hash_service.resume()
+            self._search.close()
+            self._watcher.stop()
+            self._downloads.close()
+            self._mod_meta.cache.close()
+        self._event_bus.close()
         self._tasks.shutdown()
+        self._log.close()
         super().closeEvent(event)
 
     def _build_menu(self) -> None:
@@ -87,6 +338,18 @@ class MainWindow(QtWidgets.QMainWindow):
         scan_action.triggered.connect(self.request_scan)
         file_menu.addAction(scan_action)
 
+        verify_action = QtGui.QAction("完整校验扫描", self)
+        verify_action.triggered.connect(self.request_verify_scan)
+        file_menu.addAction(verify_action)
+
+        meta_action = QtGui.QAction("刷新 Mod 元数据", self)
+        meta_action.triggered.connect(self.request_meta_refresh)
+        file_menu.addAction(meta_action)
+
+        safe_mode_menu = file_menu.addMenu("安全模式")
+        safe_mode_menu.addAction("停用所有脚本 Mod", self.request_safe_mode)
+        safe_mode_menu.addAction("恢复脚本 Mod", self.request_leave_safe_mode)
+
         set_root_action = QtGui.QAction("设置 Mods 根目录", self)
         set_root_action.triggered.connect(self.choose_root)
         file_menu.addAction(set_root_action)
@@ -94,6 +357,7 @@ class MainWindow(QtWidgets.QMainWindow):
         file_menu.addAction("退出", self.close)
 
         help_menu = self.menuBar().addMenu("帮助")
+        help_menu.addAction("事件处理耗时", self._log_event_stats)
         help_menu.addAction("关于", self._show_about)
 
     def _build_toolbar(self) -> None:
@@ -102,6 +366,13 @@ class MainWindow(QtWidgets.QMainWindow):
         search = QtWidgets.QLineEdit()
         search.setPlaceholderText("全局搜索 / Command Palette (Ctrl+P)")
         search.setMinimumWidth(320)
+        self._search_model = QtCore.QStringListModel(self)
+        completer = QtWidgets.QCompleter(self._search_model, search)
+        completer.setCompletionMode(QtWidgets.QCompleter.UnfilteredPopupCompletion)
+        completer.activated[QtCore.QModelIndex].connect(self._on_search_activated)
+        search.setCompleter(completer)
+        search.textEdited.connect(self._on_search_edited)
+        self._search_box = search
         toolbar.addWidget(search)
         command_btn = QtWidgets.QPushButton("命令面板")
         toolbar.addWidget(command_btn)
@@ -110,28 +381,83 @@ class MainWindow(QtWidgets.QMainWindow):
         scan_btn.clicked.connect(self.request_scan)
         toolbar.addWidget(scan_btn)
 
+    def _on_search_edited(self, text: str) -> None:
+        if self._services is None:
+            return
+        if not text.strip():
+            self._search_generation = 0
+            self._search_model.setStringList([])
+            return
+        # Runs off the GUI thread; the bridge signal queues results back to it.
+        self._search_generation = self._search.submit(text, self._search_bridge.results.emit)
+
+    def _on_search_results(self, generation: int, text: str, hits: list) -> None:
+        if generation != self._search_generation:
+            return
+        self._search_hits = hits
+        self._search_model.setStringList(
+            [
+                f"[Mod] {hit.title} · {hit.detail}" if hit.kind == "mod" else hit.detail
+                for hit in hits
+            ]
+        )
+        if hits:
+            self._search_box.completer().complete()
+
+    def _on_search_activated(self, index: QtCore.QModelIndex) -> None:
+        if 0 <= index.row() < len(self._search_hits):
+            hit = self._search_hits[index.row()]
+            self._log.info(f"搜索结果: {hit.title} ({hit.detail})")
+
     def _build_docks(self) -> None:
         self.addDockWidget(QtCore.Qt.BottomDockWidgetArea, LogDock(self._log))
-        self.addDockWidget(QtCore.Qt.BottomDockWidgetArea, TaskDock(self._tasks))
-
-    def _load_modules(self) -> None:
-        for module in load_modules():
-            module.subscribe_events(self._event_bus)
-            for dock in module.create_docks(self):
-                self.addDockWidget(QtCore.Qt.LeftDockWidgetArea, dock)
-            for tab in module.create_tabs(self):
-                title = getattr(tab, "windowTitle", lambda: "")()
-                if not title:
-                    title = tab.objectName() or module.meta.name
-                self._tab_widget.addTab(tab, title)
+        task_dock = TaskDock(self._tasks)
+        self.addDockWidget(QtCore.Qt.BottomDockWidgetArea, task_dock)
+        perf_dock = PerfDock(TRACER, self._settings, self._log)
+        self.tabifyDockWidget(task_dock, perf_dock)
+        task_dock.raise_()
 
-    def _restore_layout(self) -> None:
-        geometry = self._settings.get("main_window.geometry")
-        if geometry:
-            self.restoreGeometry(bytes.fromhex(geometry))
-        state = self._settings.get("main_window.state")
-        if state:
-            self.restoreState(bytes.fromhex(state))
+    def _add_placeholders(self) -> None:
+        for entry in MODULE_ENTRIES:
+            for title in entry.tabs:
+                placeholder = QtWidgets.QLabel("加载中…")
+                placeholder.setAlignment(QtCore.Qt.AlignCenter)
+                self._placeholders[placeholder] = entry
+                self._tab_widget.addTab(placeholder, title)
+
+    def _on_tab_changed(self, index: int) -> None:
+        entry = self._placeholders.get(self._tab_widget.widget(index))
+        if entry is not None and self._services is not None:
+            self._load_module(entry)
+
+    def _load_module(self, entry: ModuleEntry) -> None:
+        if entry.module_id in self._loaded_modules:
+            return
+        self._loaded_modules.add(entry.module_id)
+        module = entry.load()
+        module.subscribe_events(self._event_bus)
+        for dock in module.create_docks(self):
+            self.addDockWidget(QtCore.Qt.LeftDockWidgetArea, dock)
+            self.restoreDockWidget(dock)
+        placeholders = [widget for widget, owner in self._placeholders.items() if owner is entry]
+        tabs = module.create_tabs(self)
+        current = self._tab_widget.currentWidget()
+        self._tab_widget.blockSignals(True)
+        try:
+            for placeholder, tab in zip(placeholders, tabs):
+                index = self._tab_widget.indexOf(placeholder)
+                title = self._tab_widget.tabText(index)
+                self._tab_widget.removeTab(index)
+                self._tab_widget.insertTab(index, tab, title)
+                if placeholder is current:
+                    self._tab_widget.setCurrentIndex(index)
+                del self._placeholders[placeholder]
+                placeholder.deleteLater()
+            for tab in tabs[len(placeholders) :]:
+                title = tab.windowTitle() or tab.objectName() or module.meta.name
+                self._tab_widget.addTab(tab, title)
+        finally:
+            self._tab_widget.blockSignals(False)
 
     def choose_root(self) -> None:
         path = QtWidgets.QFileDialog.getExistingDirectory(self, "选择 Mods 根目录")
@@ -141,41 +467,338 @@ class MainWindow(QtWidgets.QMainWindow):
         self._settings.save()
         self._status_root.setText(f"根目录: {path}")
         self._log.info(f"已设置 Mods 根目录: {path}")
+        self.start_watching()
+
+    def start_watching(self) -> None:
+        root = self._settings.get("mods_root")
+        # Before the services are attached, attach() starts the watcher itself.
+        if self._services is None or not root or not self._settings.get("watch.enabled", True):
+            return
+        handle = self._tasks.submit("监视 Mods 目录", self._watcher.start, Path(root))
+        self._when_done(handle, self._on_watch_started)
+
+    def _on_watch_started(self, handle: TaskHandle) -> None:
+        try:
+            handle.future.result()
+        except Exception as exc:  # noqa: BLE001
+            self._event_bus.publish("index.watch_failed", {"error": str(exc)})
+
+    def _on_index_delta(self, payload: dict) -> None:
+        added, changed, removed = payload["added"], payload["changed"], payload["removed"]
+        moved = payload["moved"]
+        stamp = datetime.now().strftime("%H:%M:%S")
+        self._status_external.setText(
+            f"外部变更: +{added} / ~{changed} / -{removed} / →{moved} ({stamp})"
+        )
+        self._log.info(
+            f"检测到外部变更: 新增 {added} · 变更 {changed} · 缺失 {removed} · 移动 {moved}"
+            f" · {payload['dir_count']} 个目录"
+        )
+        self.request_hashing()
+        self.request_duplicate_check()
 
     def request_scan(self) -> None:
+        self._start_scan("full" if self._verify_due() else "incremental")
+
+    def request_verify_scan(self) -> None:
+        self._start_scan("full")
+
+    def _verify_due(self) -> bool:
+        last_verify = self._settings.get("scan.last_verify_at")
+        if not last_verify:
+            return True
+        interval = timedelta(hours=self._settings.get("scan.verify_interval_hours", 24))
+        return datetime.now() - datetime.fromisoformat(last_verify) >= interval
+
+    def _start_scan(self, mode: str) -> None:
+        if self._services is None:
+            self._log.warning("数据库仍在加载，请稍候。")
+            return
         root = self._settings.get("mods_root")
         if not root:
             self._log.warning("请先设置 Mods 根目录。")
             QtWidgets.QMessageBox.information(self, "提示", "请先设置 Mods 根目录。")
             return
+        if self._scan_handle is not None and not self._scan_handle.future.done():
+            self._log.warning("扫描正在进行中。")
+            return
         root_path = Path(root)
-        self._log.info("开始扫描 Mods 目录...")
-        handle = self._tasks.submit("文件索引扫描", self._file_index.scan, root_path)
-        handle.future.add_done_callback(lambda _: self._on_scan_finished(handle))
+        if mode == "full":
+            self._log.info("开始完整校验扫描 Mods 目录...")
+        else:
+            self._log.info("开始增量扫描 Mods 目录...")
+        handle = self._tasks.submit_with_context(
+            "文件索引扫描", self._file_index.scan, root_path, mode=mode, priority=PRIORITY_USER
+        )
+        self._scan_handle = handle
+        self._hash_service.pause()
+        self._when_done(handle, self._on_scan_finished)
 
     def _on_scan_finished(self, handle) -> None:
+        self._hash_service.resume()
+        if handle.future.cancelled():
+            self._log.warning("扫描已取消。")
+            return
         try:
             summary: ScanSummary = handle.future.result()
         except Exception as exc:  # noqa: BLE001
             self._log.error(f"扫描失败: {exc}")
             return
+        if summary.cancelled:
+            self._log.warning(
+                f"扫描已取消，已保存部分结果: 新增 {summary.added} · 变更 {summary.changed}"
+                f" · 缺失 {summary.removed} · 移动 {summary.moved}"
+            )
+        elif summary.mode == "full":
+            self._settings.set("scan.last_verify_at", datetime.now().isoformat(timespec="seconds"))
+            self._settings.save()
         self._status_scan.setText(
             f"扫描完成: +{summary.added} / ~{summary.changed} / -{summary.removed}"
+            f" / →{summary.moved}"
         )
-        self._log.info(
-            f"扫描完成: 新增 {summary.added} · 变更 {summary.changed} · 缺失 {summary.removed}"
-        )
+        if not summary.cancelled:
+            self._log.info(
+                f"扫描完成: 新增 {summary.added} · 变更 {summary.changed} · 缺失 {summary.removed}"
+                f" · 移动 {summary.moved}"
+            )
         self._event_bus.publish(
             "index.updated",
             {
                 "added": summary.added,
                 "changed": summary.changed,
                 "removed": summary.removed,
+                "moved": summary.moved,
             },
         )
+        if not summary.cancelled:
+            self.request_hashing()
+
+    def request_hashing(self) -> None:
+        if self._hash_handle is not None and not self._hash_handle.future.done():
+            return
+        handle = self._tasks.submit_with_context(
+            "文件哈希", self._hash_service.run, priority=PRIORITY_BACKGROUND
+        )
+        self._hash_handle = handle
+        self._when_done(handle, self._on_hashing_finished)
+
+    def _on_hashing_finished(self, handle: TaskHandle) -> None:
+        if handle.future.cancelled():
+            return
+        try:
+            summary: HashSummary = handle.future.result()
+        except Exception as exc:  # noqa: BLE001
+            self._log.error(f"文件哈希失败: {exc}")
+            return
+        if summary.hashed or summary.failed:
+            self._log.info(f"文件哈希: 完成 {summary.hashed} · 失败 {summary.failed}")
+
+    def _on_index_updated(self, name: str, payload: dict) -> None:
+        self.request_duplicate_check()
+        self.request_package_index()
+        self.request_script_inspect()
+
+    def request_duplicate_check(self) -> None:
+        if self._duplicates_handle is not None and not self._duplicates_handle.future.done():
+            return
+        handle = self._tasks.submit_with_context(
+            "重复文件检测", self._duplicates.refresh, lane=LANE_DB
+        )
+        self._duplicates_handle = handle
+        self._when_done(handle, self._on_duplicate_check_finished)
+
+    def _on_duplicate_check_finished(self, handle: TaskHandle) -> None:
+        if handle.future.cancelled():
+            return
+        try:
+            summary: DuplicateSummary = handle.future.result()
+        except Exception as exc:  # noqa: BLE001
+            self._log.error(f"重复文件检测失败: {exc}")
+            return
+        if summary.checked_sizes or summary.checked_names:
+            counts = self._duplicates.counts()
+            self._log.info(
+                f"重复文件检测: 同 hash {counts.get('same_hash', 0)} 组"
+                f" · 同名不同 hash {counts.get('name_conflict', 0)} 组"
+            )
+
+    def request_package_index(self) -> None:
+        if self._packages_handle is not None and not self._packages_handle.future.done():
+            return
+        handle = self._tasks.submit_with_context(
+            "Package 资源索引", self._packages.refresh, priority=PRIORITY_BACKGROUND
+        )
+        self._packages_handle = handle
+        self._when_done(handle, self._on_package_index_finished)
+
+    def _on_package_index_finished(self, handle: TaskHandle) -> None:
+        if handle.future.cancelled():
+            return
+        try:
+            summary: PackageIndexSummary = handle.future.result()
+        except Exception as exc:  # noqa: BLE001
+            self._log.error(f"Package 资源索引失败: {exc}")
+            return
+        if summary.indexed or summary.failed or summary.removed:
+            self._log.info(
+                f"Package 资源索引: 解析 {summary.indexed} · 资源 {summary.resources}"
+                f" · 无法读取 {summary.failed} · 移除 {summary.removed}"
+            )
+
+    def request_script_inspect(self) -> None:
+        if self._scripts_handle is not None and not self._scripts_handle.future.done():
+            return
+        handle = self._tasks.submit_with_context(
+            "脚本 Mod 检查", self._scripts.refresh, priority=PRIORITY_BACKGROUND
+        )
+        self._scripts_handle = handle
+        self._when_done(handle, self._on_script_inspect_finished)
+
+    def _on_script_inspect_finished(self, handle: TaskHandle) -> None:
+        if handle.future.cancelled():
+            return
+        try:
+            summary: ScriptInspectSummary = handle.future.result()
+        except Exception as exc:  # noqa: BLE001
+            self._log.error(f"脚本 Mod 检查失败: {exc}")
+            return
+        if summary.inspected or summary.failed or summary.removed:
+            self._log.info(
+                f"脚本 Mod 检查: 读取 {summary.inspected} · 无法读取 {summary.failed}"
+                f" · 移除 {summary.removed}"
+            )
+
+    def request_meta_refresh(self) -> None:
+        if self._services is None:
+            return
+        if self._meta_handle is not None and not self._meta_handle.future.done():
+            return
+        handle = self._tasks.submit_with_context(
+            "刷新 Mod 元数据", self._mod_meta.refresh, priority=PRIORITY_BACKGROUND
+        )
+        self._meta_handle = handle
+        self._when_done(handle, self._on_meta_refreshed)
+
+    def _on_meta_refreshed(self, handle: TaskHandle) -> None:
+        if handle.future.cancelled():
+            return
+        try:
+            summary: MetaRefreshSummary = handle.future.result()
+        except Exception as exc:  # noqa: BLE001
+            self._log.error(f"刷新元数据失败: {exc}")
+            return
+        self._log.info(
+            f"刷新元数据: {summary.requested} 项 · 缓存命中 {summary.cache_hits}"
+            f" · 重新验证 {summary.revalidated} · 下载 {summary.fetched}"
+            f" · 解析 {summary.parsed} · 未变 {summary.unchanged} · 失败 {summary.failed}"
+        )
+
+    def request_group_disable(self, group_id: int) -> None:
+        root = self._settings.get("mods_root")
+        if not root:
+            QtWidgets.QMessageBox.information(self, "提示", "请先设置 Mods 根目录。")
+            return
+        self._start_moves("停用组别", self._groups.disable, group_id, Path(root))
+
+    def request_group_enable(self, group_id: int) -> None:
+        self._start_moves("启用组别", self._groups.enable, group_id)
+
+    def request_safe_mode(self) -> None:
+        root = self._settings.get("mods_root")
+        if not root or self._services is None:
+            QtWidgets.QMessageBox.information(self, "提示", "请先设置 Mods 根目录。")
+            return
+        self._start_moves("进入安全模式", self._groups.enter_safe_mode, Path(root))
+
+    def request_leave_safe_mode(self) -> None:
+        if self._services is not None:
+            self._start_moves("退出安全模式", self._groups.leave_safe_mode)
+
+    def request_move_undo(self) -> None:
+        record = self._groups.engine.last_undoable()
+        if record is None:
+            self._log.info("没有可撤销的批量移动。")
+            return
+        self._start_moves("撤销批量移动", self._groups.engine.undo, record.op_id)
+
+    def _check_interrupted_moves(self) -> None:
+        """Offer to finish an interrupted batch, then start the startup scan and watcher."""
+        interrupted = self._groups.engine.interrupted()
+        if not interrupted:
+            self._start_background_work()
+            return
+        # Only one batch moves at a time; any others are offered on the next start.
+        record = interrupted[0]
+        answer = QtWidgets.QMessageBox.question(
+            self,
+            "批量移动未完成",
+            f"上次的批量移动（{record.op_type}，共 {record.item_count} 个文件）没有完成。\n"
+            "选择“是”继续完成，选择“否”回滚到移动前的状态。",
+            QtWidgets.QMessageBox.Yes | QtWidgets.QMessageBox.No,
+        )
+        if answer == QtWidgets.QMessageBox.Yes:
+            label, fn = "继续批量移动", self._groups.engine.resume
+        else:
+            label, fn = "回滚批量移动", self._groups.engine.rollback
+        self._start_moves(label, fn, record.op_id, then=self._start_background_work)
+
+    def _start_moves(self, label: str, fn, *args, then: Callable[[], None] | None = None) -> None:
+        if self._move_handle is not None and not self._move_handle.future.done():
+            self._log.warning("已有批量移动正在进行。")
+            return
+        self._log.info(f"{label}...")
+        handle = self._tasks.submit_with_context(label, fn, *args, priority=PRIORITY_USER)
+        self._move_handle = handle
+        self._when_done(handle, lambda finished: self._on_moves_finished(finished, label, then))
+
+    def _on_moves_finished(
+        self, handle: TaskHandle, label: str, then: Callable[[], None] | None = None
+    ) -> None:
+        try:
+            self._report_moves(handle, label)
+        finally:
+            if then is not None:
+                then()
+
+    def _report_moves(self, handle: TaskHandle, label: str) -> None:
+        if handle.future.cancelled():
+            return
+        try:
+            summary: MoveSummary = handle.future.result()
+        except Exception as exc:  # noqa: BLE001
+            self._log.error(f"{label}失败: {exc}")
+            return
+        message = f"{label}: 移动 {summary.moved} · 失败 {summary.failed}"
+        if summary.cancelled:
+            self._log.warning(f"{message}（已取消，可在下次启动时继续或回滚）")
+        elif summary.failed:
+            self._log.warning(message)
+            for error in summary.errors:
+                self._log.warning(f"  {error}")
+        else:
+            self._log.info(message)
+        self._event_bus.publish(
+            "mods.moved",
+            {"op_id": summary.op_id, "moved": summary.moved, "failed": summary.failed},
+        )
+
+    def _when_done(self, handle: TaskHandle, callback) -> None:
+        # Done-callbacks fire on the worker thread; widgets are only touched on the GUI thread.
+        handle.future.add_done_callback(lambda _: self._gui.call.emit(lambda: callback(handle)))
+
+    def _log_event_stats(self) -> None:
+        for stats in self._event_bus.stats()[:10]:
+            self._log.info(
+                f"事件处理 {stats.handler} [{stats.mode}]: {stats.calls} 次"
+                f" · 合并 {stats.coalesced} · 平均 {stats.mean_ms:.1f} ms"
+                f" · 最长 {stats.max_ms:.1f} ms · 错误 {stats.errors}"
+            )
 
     def _poll_tasks(self) -> None:
         self._tasks.cleanup_finished()
+        handle = self._scan_handle
+        if handle is not None and not handle.future.done() and handle.progress is not None:
+            self._status_scan.setText(f"扫描: {handle.progress.describe()}")
 
     def _show_about(self) -> None:
         QtWidgets.QMessageBox.information(
@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+from datetime import datetime
+from pathlib import Path
+
+from PySide6 import QtCore, QtWidgets
+
+from ..core.log_service import LogService
+from ..core.settings_service import SettingsService
+from ..core.tracing import Span, Tracer
+
+SPAN_COLUMNS = ["开始 (s)", "类别", "名称", "耗时 (ms)", "线程", "详情"]
+COUNTER_COLUMNS = ["类别 / 计数", "次数", "合计 (ms)", "最长 (ms)"]
+MAX_ROWS = 500
+
+
+def _span_values(span: Span, threads: dict[int, str]) -> tuple:
+    details = ", ".join(f"{key}={value}" for key, value in span.args.items())
+    return (
+        f"{span.start:.3f}",
+        span.category,
+        span.name,
+        f"{span.duration * 1000:.2f}",
+        threads.get(span.thread_id, str(span.thread_id)),
+        details,
+    )
+
+
+class SpanModel(QtCore.QAbstractTableModel):
+    """The newest spans first, at most ``MAX_ROWS`` of them."""
+
+    def __init__(self, parent: QtCore.QObject | None = None) -> None:
+        super().__init__(parent)
+        self._values: list[tuple] = []
+
+    def rowCount(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._values)
+
+    def columnCount(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(SPAN_COLUMNS)
+
+    def headerData(
+        self,
+        section: int,
+        orientation: QtCore.Qt.Orientation,
+        role: int = QtCore.Qt.DisplayRole,
+    ):
+        if role == QtCore.Qt.DisplayRole and orientation == QtCore.Qt.Horizontal:
+            return SPAN_COLUMNS[section]
+        return None
+
+    def data(self, index: QtCore.QModelIndex, role: int = QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role in (QtCore.Qt.DisplayRole, QtCore.Qt.ToolTipRole):
+            return self._values[index.row()][index.column()]
+        return None
+
+    def prepend(self, spans: list[Span], threads: dict[int, str]) -> None:
+        if not spans:
+            return
+        values = [_span_values(span, threads) for span in reversed(spans[-MAX_ROWS:])]
+        self.beginInsertRows(QtCore.QModelIndex(), 0, len(values) - 1)
+        self._values[:0] = values
+        self.endInsertRows()
+        if len(self._values) > MAX_ROWS:
+            self.beginRemoveRows(QtCore.QModelIndex(), MAX_ROWS, len(self._values) - 1)
+            del self._values[MAX_ROWS:]
+            self.endRemoveRows()
+
+    def clear(self) -> None:
+        self.beginResetModel()
+        self._values.clear()
+        self.endResetModel()
+
+
+class PerfDock(QtWidgets.QDockWidget):
+    """Recent trace spans and per-category totals, with Chrome trace export."""
+
+    def __init__(self, tracer: Tracer, settings: SettingsService, log: LogService) -> None:
+        super().__init__("性能")
+        self.setObjectName("PerfDock")
+        self._tracer = tracer
+        self._settings = settings
+        self._log = log
+        self._last_seq = 0
+
+        self._enabled = QtWidgets.QCheckBox("记录")
+        self._enabled.setChecked(tracer.enabled)
+        self._enabled.toggled.connect(self._set_enabled)
+        self._min_ms = QtWidgets.QDoubleSpinBox()
+        self._min_ms.setPrefix("≥ ")
+        self._min_ms.setSuffix(" ms")
+        self._min_ms.setDecimals(1)
+        self._min_ms.setRange(0, 60_000)
+        self._min_ms.setValue(settings.get("tracing.min_ms", 1.0))
+        self._min_ms.valueChanged.connect(
+            lambda value: self._settings.set("tracing.min_ms", value)
+        )
+        clear_button = QtWidgets.QPushButton("清空")
+        clear_button.clicked.connect(self._clear)
+        export_button = QtWidgets.QPushButton("导出 Chrome Trace…")
+        export_button.clicked.connect(self._export)
+        toolbar = QtWidgets.QHBoxLayout()
+        toolbar.addWidget(self._enabled)
+        toolbar.addWidget(QtWidgets.QLabel("只显示"))
+        toolbar.addWidget(self._min_ms)
+        toolbar.addStretch(1)
+        toolbar.addWidget(clear_button)
+        toolbar.addWidget(export_button)
+
+        self._model = SpanModel(self)
+        self._view = QtWidgets.QTableView()
+        self._view.setModel(self._model)
+        self._view.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+        self._view.setAlternatingRowColors(True)
+        self._view.setWordWrap(False)
+        self._view.verticalHeader().setVisible(False)
+        self._view.horizontalHeader().setStretchLastSection(True)
+        self._counters = QtWidgets.QTreeWidget()
+        self._counters.setHeaderLabels(COUNTER_COLUMNS)
+        self._counters.setRootIsDecorated(False)
+        splitter = QtWidgets.QSplitter(QtCore.Qt.Horizontal)
+        splitter.addWidget(self._view)
+        splitter.addWidget(self._counters)
+        splitter.setStretchFactor(0, 3)
+        splitter.setStretchFactor(1, 1)
+
+        container = QtWidgets.QWidget()
+        layout = QtWidgets.QVBoxLayout(container)
+        layout.setContentsMargins(4, 4, 4, 4)
+        layout.addLayout(toolbar)
+        layout.addWidget(splitter, 1)
+        self.setWidget(container)
+
+        self._timer = QtCore.QTimer(self)
+        self._timer.timeout.connect(self._refresh)
+        self._timer.start(500)
+
+    def _set_enabled(self, enabled: bool) -> None:
+        self._tracer.set_enabled(enabled)
+        self._settings.set("tracing.enabled", enabled)
+        self._log.info("性能记录已开启" if enabled else "性能记录已关闭")
+
+    def _refresh(self) -> None:
+        if not self.isVisible():
+            return
+        spans = self._tracer.spans(self._last_seq)
+        if not spans:
+            return
+        self._last_seq = spans[-1].seq
+        threshold = self._min_ms.value() / 1000
+        self._model.prepend(
+            [span for span in spans if span.duration >= threshold],
+            self._tracer.thread_names(),
+        )
+        self._refresh_counters()
+
+    def _refresh_counters(self) -> None:
+        self._counters.clear()
+        for totals in self._tracer.totals():
+            QtWidgets.QTreeWidgetItem(
+                self._counters,
+                [
+                    totals.category,
+                    str(totals.count),
+                    f"{totals.total * 1000:.1f}",
+                    f"{totals.max * 1000:.1f}",
+                ],
+            )
+        for name, value in sorted(self._tracer.counters().items()):
+            QtWidgets.QTreeWidgetItem(self._counters, [name, f"{value:g}", "", ""])
+
+    def _clear(self) -> None:
+        self._tracer.clear()
+        self._model.clear()
+        self._counters.clear()
+
+    def _export(self) -> None:
+        default = f"trace-{datetime.now():%Y%m%d-%H%M%S}.json"
+        path, _ = QtWidgets.QFileDialog.getSaveFileName(
+            self, "导出 Chrome Trace", default, "Chrome Trace (*.json)"
+        )
+        if not path:
+            return
+        try:
+            count = self._tracer.export_chrome_trace(Path(path))
+        except OSError as exc:
+            QtWidgets.QMessageBox.warning(self, "导出失败", str(exc))
+            return
+        self._log.info(f"已导出 {count} 条性能记录: {path}")
@@ -2,7 +2,116 @@ from __future__ import annotations
 
 from PySide6 import QtCore, QtWidgets
 
-from ..core.task_service import TaskHandle, TaskService
+from ..core.task_service import (
+    PRIORITY_BACKGROUND,
+    PRIORITY_USER,
+    TaskHandle,
+    TaskService,
+)
+
+COLUMNS = ["#", "任务", "通道", "优先级", "状态", "进度"]
+STATUS_LABELS = {
+    "waiting": "等待依赖",
+    "queued": "排队中",
+    "running": "运行中",
+    "retrying": "等待重试",
+    "done": "完成",
+    "failed": "失败",
+    "cancelled": "已取消",
+}
+
+
+def _priority_label(priority: int) -> str:
+    if priority <= PRIORITY_USER:
+        return "用户"
+    if priority >= PRIORITY_BACKGROUND:
+        return "后台"
+    return "普通"
+
+
+def _status_label(handle: TaskHandle) -> str:
+    label = STATUS_LABELS.get(handle.status, handle.status)
+    if handle.status == "running" and handle.context.cancelled:
+        return "取消中"
+    if handle.status in ("running", "retrying") and handle.attempt > 1:
+        label += f" (第 {handle.attempt} 次)"
+    if handle.status in ("failed", "retrying") and handle.error:
+        label += f": {handle.error}"
+    return label
+
+
+def _row_values(handle: TaskHandle) -> tuple:
+    progress = handle.progress.describe() if handle.progress is not None else ""
+    return (
+        f"{handle.task_id:03d}",
+        handle.name,
+        handle.lane,
+        _priority_label(handle.priority),
+        _status_label(handle),
+        progress if handle.status == "running" else "",
+    )
+
+
+class TaskModel(QtCore.QAbstractTableModel):
+    """Mirrors ``TaskService.active_tasks`` and only touches rows that changed."""
+
+    def __init__(self, task_service: TaskService, parent: QtCore.QObject | None = None) -> None:
+        super().__init__(parent)
+        self._task_service = task_service
+        self._handles: list[TaskHandle] = []
+        self._values: list[tuple] = []
+
+    def rowCount(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._handles)
+
+    def columnCount(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def headerData(
+        self,
+        section: int,
+        orientation: QtCore.Qt.Orientation,
+        role: int = QtCore.Qt.DisplayRole,
+    ):
+        if role == QtCore.Qt.DisplayRole and orientation == QtCore.Qt.Horizontal:
+            return COLUMNS[section]
+        return None
+
+    def data(self, index: QtCore.QModelIndex, role: int = QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role in (QtCore.Qt.DisplayRole, QtCore.Qt.ToolTipRole):
+            return self._values[index.row()][index.column()]
+        return None
+
+    def handle(self, row: int) -> TaskHandle | None:
+        return self._handles[row] if 0 <= row < len(self._handles) else None
+
+    def sync(self) -> None:
+        current = {handle.task_id: handle for handle in self._task_service.active_tasks()}
+        for row in range(len(self._handles) - 1, -1, -1):
+            if self._handles[row].task_id not in current:
+                self.beginRemoveRows(QtCore.QModelIndex(), row, row)
+                del self._handles[row]
+                del self._values[row]
+                self.endRemoveRows()
+        last_column = len(COLUMNS) - 1
+        for row, handle in enumerate(self._handles):
+            values = _row_values(handle)
+            if values != self._values[row]:
+                self._values[row] = values
+                self.dataChanged.emit(self.index(row, 0), self.index(row, last_column))
+        known = {handle.task_id for handle in self._handles}
+        added = sorted(
+            (handle for task_id, handle in current.items() if task_id not in known),
+            key=lambda handle: handle.task_id,
+        )
+        if added:
+            first = len(self._handles)
+            self.beginInsertRows(QtCore.QModelIndex(), first, first + len(added) - 1)
+            self._handles.extend(added)
+            self._values.extend(_row_values(handle) for handle in added)
+            self.endInsertRows()
 
 
 class TaskDock(QtWidgets.QDockWidget):
@@ -10,28 +119,27 @@ class TaskDock(QtWidgets.QDockWidget):
         super().__init__("任务")
         self.setObjectName("TaskDock")
         self._task_service = task_service
-        self._list = QtWidgets.QListWidget()
-        self._list.setAlternatingRowColors(True)
-        self.setWidget(self._list)
-        self._task_service.add_listener(self._on_new_task)
+        self._model = TaskModel(task_service, self)
+        self._view = QtWidgets.QTableView()
+        self._view.setModel(self._model)
+        self._view.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+        self._view.setAlternatingRowColors(True)
+        self._view.setWordWrap(False)
+        self._view.verticalHeader().setVisible(False)
+        self._view.horizontalHeader().setStretchLastSection(True)
+        self._view.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
+        self._view.customContextMenuRequested.connect(self._show_menu)
+        self.setWidget(self._view)
         self._timer = QtCore.QTimer(self)
-        self._timer.timeout.connect(self._refresh)
-        self._timer.start(1000)
-
-    def _on_new_task(self, handle: TaskHandle) -> None:
-        self._list.addItem(self._format(handle))
-
-    def _refresh(self) -> None:
-        self._task_service.cleanup_finished()
-        self._list.clear()
-        for handle in self._task_service.active_tasks():
-            self._list.addItem(self._format(handle))
-
-    @staticmethod
-    def _format(handle: TaskHandle) -> str:
-        status = "running"
-        if handle.future.done():
-            status = "done"
-        elif handle.future.cancelled():
-            status = "cancelled"
-        return f"{handle.task_id:03d} · {handle.name} · {status}"
+        self._timer.timeout.connect(self._model.sync)
+        self._timer.start(500)
+
+    def _show_menu(self, pos: QtCore.QPoint) -> None:
+        handle = self._model.handle(self._view.rowAt(pos.y()))
+        if handle is None or handle.future.done():
+            return
+        menu = QtWidgets.QMenu(self)
+        cancel_action = menu.addAction("取消")
+        if menu.exec(self._view.viewport().mapToGlobal(pos)) is cancel_action:
+            handle.cancel()
+            self._model.sync()
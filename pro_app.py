@@ -1,45 +1,98 @@
 from __future__ import annotations
 
+import time
 from pathlib import Path
 
-from PySide6 import QtWidgets
+from pro.core.startup import StartupTimer
 
-from pro.core.db_service import DBService
-from pro.core.event_bus import EventBus
-from pro.core.file_index_service import FileIndexService
-from pro.core.log_service import LogService
-from pro.core.migrations import MIGRATIONS
-from pro.core.op_log_service import OpLogService
-from pro.core.settings_service import SettingsService
-from pro.core.task_service import TaskService
-from pro.ui.main_window import MainWindow
 
-
-def main() -> None:
-    app = QtWidgets.QApplication([])
-    data_dir = Path.home() / ".simstoolbox_pro"
-    settings = SettingsService(data_dir)
-    settings.load()
+def build_services(data_dir: Path, event_bus, tasks, startup: StartupTimer):
+    """Open the database and create the services that use it (runs on a worker)."""
+    started = time.perf_counter()
+    from pro.core.db_service import DBService
+    from pro.core.download_meta_service import DownloadMetaService
+    from pro.core.download_service import DownloadService
+    from pro.core.duplicate_service import DuplicateService
+    from pro.core.file_index_service import FileIndexService
+    from pro.core.group_service import GroupService
+    from pro.core.hash_service import HashService
+    from pro.core.http_cache import HttpCache
+    from pro.core.migrations import MIGRATIONS
+    from pro.core.mod_meta_service import ModMetaService
+    from pro.core.move_engine import MoveEngine
+    from pro.core.op_log_service import OpLogService
+    from pro.core.package_index_service import PackageIndexService
+    from pro.core.script_inspector import ScriptInspector
+    from pro.core.search_service import SearchRunner, SearchService
+    from pro.core.tracing import trace_db
+    from pro.core.watch_service import WatchService
+    from pro.ui.main_window import Services
 
     db = DBService(data_dir / "sims_toolbox.db", MIGRATIONS)
     db.initialize()
+    trace_db(db)
     file_index = FileIndexService(db)
     file_index.ensure_schema()
+    hash_service = HashService(db)
+    hash_service.ensure_schema()
+    duplicates = DuplicateService(db)
+    duplicates.ensure_schema()
+    search = SearchService(db)
+    search.ensure_schema()
+    op_log = OpLogService(db)
+
+    services = Services(
+        file_index=file_index,
+        op_log=op_log,
+        hash_service=hash_service,
+        duplicates=duplicates,
+        search=SearchRunner(search, db),
+        watcher=WatchService(file_index, event_bus),
+        groups=GroupService(db, MoveEngine(db, op_log, file_index)),
+        downloads=DownloadService(db, event_bus),
+        download_meta=DownloadMetaService(db),
+        mod_meta=ModMetaService(db, HttpCache(db, data_dir / "cache" / "http")),
+        packages=PackageIndexService(db, tasks),
+        scripts=ScriptInspector(db),
+    )
+    startup.add("数据库", time.perf_counter() - started)
+    return services
+
 
+def main() -> None:
+    startup = StartupTimer()
+    # Imported here so the startup timing covers them.
+    from PySide6 import QtWidgets
+
+    from pro.core.event_bus import EventBus
+    from pro.core.log_service import LogService
+    from pro.core.settings_service import SettingsService
+    from pro.core.task_service import TaskService
+    from pro.core.tracing import TRACER
+    from pro.ui.main_window import MainWindow
+
+    startup.mark("导入")
+
+    app = QtWidgets.QApplication([])
+    data_dir = Path.home() / ".simstoolbox_pro"
+    settings = SettingsService(data_dir)
+    settings.load()
+    TRACER.set_enabled(bool(settings.get("tracing.enabled", False)))
     event_bus = EventBus()
     tasks = TaskService()
-    log_service = LogService()
-    op_log = OpLogService(db)
+    log_service = LogService(log_dir=data_dir / "logs")
+    startup.mark("设置")
 
     window = MainWindow(
         settings=settings,
         event_bus=event_bus,
         tasks=tasks,
         log_service=log_service,
-        file_index=file_index,
-        op_log=op_log,
+        startup=startup,
     )
     window.show()
+    startup.mark("窗口")
+    window.start(lambda: build_services(data_dir, event_bus, tasks, startup))
     app.exec()
 
 
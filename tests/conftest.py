@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable
+
+import pytest
+
+from pro.core.db_service import DBService
+from pro.core.duplicate_service import DuplicateService
+from pro.core.file_index_service import FileIndexService
+from pro.core.hash_service import HashService
+from pro.core.migrations import MIGRATIONS
+from pro.core.move_engine import MoveEngine
+from pro.core.op_log_service import OpLogService
+from pro.core.task_service import TaskContext, TaskService
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+
+class CancelAfter(TaskContext):
+    """A context that cancels itself once progress reaches ``limit``."""
+
+    def __init__(self, limit: int) -> None:
+        super().__init__()
+        self._limit = limit
+
+    def report(self, phase: str, done: int = 0, total: int | None = None) -> None:
+        super().report(phase, done, total)
+        if done >= self._limit:
+            self.cancel()
+
+
+class LocalServer:
+    """A threaded ``http.server`` on localhost with per-path handlers.
+
+    A route is ``fn(handler)`` writing the whole response itself; ``requests``
+    records ``(path, headers)`` of every request in arrival order.
+    """
+
+    def __init__(self) -> None:
+        self.routes: dict[str, Callable[[BaseHTTPRequestHandler], None]] = {}
+        self.requests: list[tuple[str, dict[str, str]]] = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self) -> None:
+                server.requests.append((self.path, dict(self.headers)))
+                route = server.routes.get(self.path)
+                if route is None:
+                    self.send_error(404)
+                    return
+                route(self)
+
+            def log_message(self, format, *args) -> None:
+                pass
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+        )
+        self._thread.start()
+
+    def url(self, path: str) -> str:
+        return f"http://127.0.0.1:{self._httpd.server_address[1]}{path}"
+
+    def close(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+def send(
+    handler: BaseHTTPRequestHandler,
+    body: bytes = b"",
+    status: int = 200,
+    headers: dict[str, str] | None = None,
+) -> None:
+    handler.send_response(status)
+    headers = {"Content-Length": str(len(body)), **(headers or {})}
+    for key, value in headers.items():
+        handler.send_header(key, value)
+    handler.end_headers()
+    handler.wfile.write(body)
+
+
+def write_file(path: Path, data: bytes = b"x") -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    return path
+
+
+@pytest.fixture
+def db(tmp_path: Path):
+    service = DBService(tmp_path / "test.db", MIGRATIONS)
+    service.initialize()
+    yield service
+    service.close()
+
+
+@pytest.fixture
+def tasks():
+    service = TaskService(max_workers=2, cpu_workers=1)
+    yield service
+    service.shutdown()
+
+
+@pytest.fixture
+def server():
+    local = LocalServer()
+    yield local
+    local.close()
+
+
+@pytest.fixture
+def mods_root(tmp_path: Path) -> Path:
+    root = tmp_path / "Mods"
+    root.mkdir()
+    return root
+
+
+@pytest.fixture
+def file_index(db: DBService) -> FileIndexService:
+    service = FileIndexService(db)
+    service.ensure_schema()
+    HashService(db).ensure_schema()
+    DuplicateService(db).ensure_schema()
+    return service
+
+
+@pytest.fixture
+def op_log(db: DBService) -> OpLogService:
+    return OpLogService(db)
+
+
+@pytest.fixture
+def engine(db: DBService, op_log: OpLogService, file_index: FileIndexService) -> MoveEngine:
+    return MoveEngine(db, op_log, file_index, max_workers=2)
@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+
+def test_reader_is_per_thread(db):
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        other = executor.submit(db.reader).result()
+        assert executor.submit(db.reader).result() is other
+    assert db.reader() is db.reader()
+    assert db.reader() is not other
+
+
+def test_reader_closes_when_its_thread_exits(db):
+    readers = []
+    thread = threading.Thread(target=lambda: readers.append(db.reader()))
+    thread.start()
+    thread.join()
+    with pytest.raises(sqlite3.ProgrammingError):
+        readers[0].execute("SELECT 1")
+    assert db.query_one("SELECT 1")[0] == 1
+
+
+def test_close_closes_live_readers(db):
+    conn = db.reader()
+    db.close()
+    with pytest.raises(sqlite3.ProgrammingError):
+        conn.execute("SELECT 1")
+    assert db.query_one("SELECT 1")[0] == 1
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from pro.core.download_meta_service import DownloadMetaService, normalize_url
+
+from .conftest import write_file
+
+TSR = "https://www.thesimsresource.com/downloads/{item_id}"
+
+
+@pytest.fixture
+def meta(db, file_index) -> DownloadMetaService:
+    return DownloadMetaService(db)
+
+
+@pytest.mark.parametrize(
+    "url, expected",
+    [
+        ("HTTPS://Example.COM", "https://example.com/"),
+        ("https://example.com/a.package).", "https://example.com/a.package"),
+        ("https://example.com:8080/x", "https://example.com:8080/x"),
+        ("https://example.com:443/x", "https://example.com/x"),
+        ("https://example.com/x#files", "https://example.com/x"),
+        (
+            "https://example.com/x?id=3&utm_source=tw&fbclid=abc&gclid=q",
+            "https://example.com/x?id=3",
+        ),
+        ("https://example.com/x?include=1", "https://example.com/x?include=1"),
+    ],
+)
+def test_normalize_url(url: str, expected: str):
+    assert normalize_url(url) == expected
+
+
+@pytest.mark.parametrize(
+    "url",
+    [
+        "https://www.thesimsresource.com/downloads/1600123",
+        "https://thesimsresource.com/downloads/details/category/sims4-hair/title/bob/id/1600123/",
+        "http://www.thesimsresource.com/downloads/1600123?utm_campaign=x",
+    ],
+)
+def test_tsr_item_ids(meta, url: str):
+    parsed = meta.parse(url)
+    assert (parsed.kind, parsed.item_id) == ("tsr", "1600123")
+    assert parsed.url == TSR.format(item_id="1600123")
+    assert parsed.download_url.endswith("/itemId/1600123")
+
+
+def test_external_links_keep_mod_file_names(meta):
+    parsed = meta.parse("https://www.patreon.com/file?h=1&i=2")
+    assert (parsed.source, parsed.file_name) == ("patreon", None)
+    parsed = meta.parse("https://simfileshare.net/download/Hair%20Bob.package")
+    assert (parsed.source, parsed.file_name) == ("simfileshare", "Hair Bob.package")
+
+
+def test_parse_text_splits_glued_links(meta):
+    text = (
+        "发型：https://www.thesimsresource.com/downloads/1600123，"
+        "还有（https://example.com/a.package）\n"
+        "<https://www.thesimsresource.com/downloads/details/id/1600123/> "
+        "'https://www.thesimsresource.com/downloads/browse/category/sims4/'"
+        "　https://example.com/b.package."
+    )
+    batch = meta.parse_text(text)
+    assert [link.url for link in batch.links] == [
+        TSR.format(item_id="1600123"),
+        "https://example.com/a.package",
+        "https://example.com/b.package",
+    ]
+    assert (batch.repeated, batch.ignored) == (1, 1)
+
+
+def _download(db, url: str, status: str = "success", **values) -> None:
+    row = {"item_id": None, "file_name": None, "file_path": None, "sha1": None, **values}
+    with db.transaction() as conn:
+        conn.execute(
+            """
+            INSERT INTO downloads (url, item_id, file_name, file_path, sha1, status)
+            VALUES (?, ?, ?, ?, ?, ?)
+            """,
+            (url, row["item_id"], row["file_name"], row["file_path"], row["sha1"], status),
+        )
+
+
+def test_check_reports_each_state(meta, db, file_index, mods_root: Path):
+    kept = write_file(mods_root / "Renamed" / "kept_renamed.package")
+    library = write_file(mods_root / "Hair" / "Bob.package")
+    file_index.scan(mods_root)
+    with db.transaction() as conn:
+        conn.execute("UPDATE file_index SET sha1 = 'kept' WHERE abs_path = ?", (str(kept),))
+
+    links = meta.parse_text(
+        "https://www.thesimsresource.com/downloads/1 "
+        "https://www.thesimsresource.com/downloads/2 "
+        "https://www.thesimsresource.com/downloads/3 "
+        "https://example.com/bob.package "
+        "https://example.com/new.package"
+    ).links
+    downloaded, failed, removed, in_library, new = links
+    # Item 1 failed through another link but succeeded through this one.
+    _download(db, "https://mirror.example/1", "failed", item_id="1")
+    _download(db, downloaded.download_url, item_id="1", file_name="kept.package", sha1="kept")
+    _download(db, failed.download_url, "failed", item_id="2")
+    _download(db, removed.download_url, item_id="3", file_name="gone.package", sha1="gone")
+
+    statuses = meta.check(links)
+    assert [status.state for status in statuses] == [
+        "downloaded",
+        "failed",
+        "removed",
+        "in_library",
+        "new",
+    ]
+    assert statuses[0].file_path == str(kept)
+    assert statuses[3].file_path == str(library)
+    assert meta.check([]) == []
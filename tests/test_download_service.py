@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import hashlib
+from pathlib import Path
+
+import pytest
+
+from pro.core.download_service import DownloadRequest, DownloadService, _reserve_path
+from pro.core.event_bus import EventBus
+
+from .conftest import send
+
+BODY = bytes(range(256)) * 64
+
+
+@pytest.fixture
+def downloads(db, file_index):
+    bus = EventBus()
+    service = DownloadService(db, bus, retries=2, backoff=0, timeout=5)
+    yield service
+    service.close()
+    bus.close()
+
+
+def _ranged(handler) -> None:
+    """Serve BODY, honouring ``Range: bytes=N-``."""
+    offset = 0
+    value = handler.headers.get("Range")
+    if value:
+        offset = int(value.removeprefix("bytes=").rstrip("-"))
+        send(
+            handler,
+            BODY[offset:],
+            206,
+            {"Content-Range": f"bytes {offset}-{len(BODY) - 1}/{len(BODY)}"},
+        )
+        return
+    send(handler, BODY, headers={"Content-Disposition": 'attachment; filename="mod.package"'})
+
+
+def test_resumes_from_partial_file(server, downloads, tmp_path: Path):
+    server.routes["/mod"] = _ranged
+    request = DownloadRequest(server.url("/mod"), str(tmp_path / "dl"))
+    part = Path(DownloadService._part_path(request))
+    part.parent.mkdir()
+    part.write_bytes(BODY[:1000])
+
+    result = downloads.fetch(request)
+    assert result.status == "success" and result.resumed_from == 1000
+    assert Path(result.file_path).read_bytes() == BODY
+    assert result.sha1 == hashlib.sha1(BODY).hexdigest()
+    assert server.requests[0][1]["Range"] == "bytes=1000-"
+    assert not part.exists()
+
+
+def test_retries_transient_status(server, downloads, tmp_path: Path, db):
+    calls = []
+
+    def flaky(handler) -> None:
+        calls.append(handler.path)
+        if len(calls) == 1:
+            send(handler, b"busy", 503)
+        else:
+            _ranged(handler)
+
+    server.routes["/mod"] = flaky
+    result = downloads.fetch(DownloadRequest(server.url("/mod"), str(tmp_path)))
+    assert (result.status, result.attempts) == ("success", 2)
+    assert result.file_name == "mod.package"
+    row = db.query_one("SELECT status, sha1 FROM downloads WHERE url = ?", (result.url,))
+    assert tuple(row) == ("success", hashlib.sha1(BODY).hexdigest())
+
+
+def test_dropped_connection_resumes_on_retry(server, downloads, tmp_path: Path):
+    def truncated(handler) -> None:
+        if handler.headers.get("Range"):
+            _ranged(handler)
+            return
+        handler.send_response(200)
+        handler.send_header("Content-Length", str(len(BODY)))
+        handler.send_header("Connection", "close")
+        handler.end_headers()
+        handler.wfile.write(BODY[:5000])
+        handler.close_connection = True
+
+    server.routes["/mod"] = truncated
+    result = downloads.fetch(DownloadRequest(server.url("/mod"), str(tmp_path)))
+    assert (result.status, result.attempts, result.resumed_from) == ("success", 2, 5000)
+    assert Path(result.file_path).read_bytes() == BODY
+
+
+def test_client_error_is_not_retried(server, downloads, tmp_path: Path):
+    result = downloads.fetch(DownloadRequest(server.url("/missing"), str(tmp_path)))
+    assert (result.status, result.attempts) == ("failed", 1)
+    assert result.error == "HTTP 404"
+    assert len(server.requests) == 1
+
+
+def test_concurrent_downloads_of_one_name_keep_both(server, downloads, tmp_path: Path):
+    bodies = {f"/mod{i}": bytes([i]) * 4096 for i in range(6)}
+    for path, body in bodies.items():
+        server.routes[path] = lambda handler, body=body: send(
+            handler, body, headers={"Content-Disposition": 'attachment; filename="mod.package"'}
+        )
+    futures = [
+        downloads.submit(DownloadRequest(server.url(path), str(tmp_path))) for path in bodies
+    ]
+    results = [future.result(10) for future in futures]
+    assert all(result.status == "success" for result in results)
+    assert len({result.file_path for result in results}) == len(bodies)
+    assert sorted(Path(result.file_path).read_bytes() for result in results) == sorted(
+        bodies.values()
+    )
+
+
+def test_reserved_name_is_not_handed_out_twice(tmp_path: Path):
+    first = _reserve_path(str(tmp_path), "mod.package")
+    second = _reserve_path(str(tmp_path), "mod.package")
+    assert (Path(first).name, Path(second).name) == ("mod.package", "mod (1).package")
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from pro.core import duplicate_service
+from pro.core.duplicate_service import DuplicateService
+from pro.core.hash_service import PARTIAL_SPAN
+
+from .conftest import CancelAfter, write_file
+
+SIZE = PARTIAL_SPAN * 4
+
+
+@pytest.fixture
+def duplicates(db) -> DuplicateService:
+    return DuplicateService(db)
+
+
+def _pair(mods_root: Path, first: bytes, second: bytes) -> tuple[Path, Path]:
+    return (
+        write_file(mods_root / "A" / "hair.package", first),
+        write_file(mods_root / "B" / "hair.package", second),
+    )
+
+
+def _name_conflicts(duplicates: DuplicateService) -> list[str]:
+    return [group.group_key for group in duplicates.groups("name_conflict")]
+
+
+def test_different_partial_hash_skips_full_hash(mods_root, file_index, duplicates):
+    _pair(mods_root, b"a" * SIZE, b"b" * SIZE)
+    file_index.scan(mods_root)
+    summary = duplicates.refresh()
+    assert summary.full_hashed == 0
+    assert _name_conflicts(duplicates) == ["hair.package"]
+
+
+def test_same_partial_hash_falls_back_to_full_hash(mods_root, file_index, duplicates):
+    middle = SIZE // 2
+    data = bytearray(b"a" * SIZE)
+    _pair(mods_root, bytes(data), bytes(data[:middle] + b"b" + data[middle + 1 :]))
+    file_index.scan(mods_root)
+    summary = duplicates.refresh()
+    assert summary.full_hashed == 2
+    assert _name_conflicts(duplicates) == ["hair.package"]
+
+
+def test_identical_copies_are_not_a_name_conflict(mods_root, file_index, duplicates, db):
+    _pair(mods_root, b"a" * SIZE, b"a" * SIZE)
+    file_index.scan(mods_root)
+    duplicates.refresh()
+    assert _name_conflicts(duplicates) == []
+    assert len(duplicates.groups("same_hash")) == 1
+    hashed = db.query_one("SELECT COUNT(*) FROM file_index WHERE sha1_sig = quick_sig")[0]
+    assert hashed == 2
+
+
+def test_unreadable_copy_is_not_a_name_conflict(
+    mods_root, file_index, duplicates, monkeypatch
+):
+    first, _ = _pair(mods_root, b"a" * 10, b"a" * 10)
+    file_index.scan(mods_root)
+    real = duplicate_service.sha1_file
+
+    def flaky(path, *args, **kwargs):
+        if Path(path) == first:
+            raise OSError("locked")
+        return real(path, *args, **kwargs)
+
+    monkeypatch.setattr(duplicate_service, "sha1_file", flaky)
+    duplicates.refresh()
+    assert _name_conflicts(duplicates) == []
+
+
+def test_cancelled_name_pass_leaves_names_dirty(mods_root, file_index, duplicates, db):
+    _pair(mods_root, b"a" * 10, b"b" * 10)
+    file_index.scan(mods_root)
+    context = CancelAfter(0)
+    summary = duplicates.refresh(context)
+    assert summary.cancelled
+    assert _name_conflicts(duplicates) == []
+    dirty = db.query_one("SELECT COUNT(*) FROM file_index WHERE dup_sig IS NOT quick_sig")[0]
+    assert dirty == 2
+
+    duplicates.refresh()
+    assert _name_conflicts(duplicates) == ["hair.package"]
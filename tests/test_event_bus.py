@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import queue
+import threading
+
+import pytest
+
+from pro.core.event_bus import EventBus
+
+
+@pytest.fixture
+def bus():
+    events = EventBus()
+    yield events
+    events.close()
+
+
+class _Dispatcher:
+    """Collects GUI drains so a test can run them when it likes."""
+
+    def __init__(self) -> None:
+        self.pending: list = []
+
+    def __call__(self, drain) -> None:
+        self.pending.append(drain)
+
+    def run(self) -> None:
+        pending, self.pending = self.pending, []
+        for drain in pending:
+            drain()
+
+
+def _collect(received: list):
+    return lambda name, payload: received.append((name, payload))
+
+
+def test_inline_delivery_runs_in_publish(bus):
+    received: list = []
+    bus.subscribe(["a", "b"], _collect(received))
+    bus.publish("a", {"n": 1})
+    bus.publish("b", {"n": 2})
+    bus.publish("c", {"n": 3})
+    assert received == [("a", {"n": 1}), ("b", {"n": 2})]
+
+
+def test_gui_delivery_falls_back_to_inline_without_dispatcher(bus):
+    received: list = []
+    bus.subscribe(["a"], _collect(received), mode="gui", coalesce=True)
+    bus.publish("a", {"n": 1})
+    assert received == [("a", {"n": 1})]
+
+
+def test_gui_delivery_coalesces_to_latest(bus):
+    dispatcher = _Dispatcher()
+    bus.set_gui_dispatcher(dispatcher)
+    received: list = []
+    bus.subscribe(["a", "b"], _collect(received), mode="gui", coalesce=True)
+    for n in range(3):
+        bus.publish("a", {"n": n})
+    bus.publish("b", {"n": 9})
+    assert len(dispatcher.pending) == 1 and received == []
+    dispatcher.run()
+    assert received == [("a", {"n": 2}), ("b", {"n": 9})]
+    (stats,) = bus.stats()
+    assert (stats.calls, stats.coalesced) == (2, 2)
+
+
+def test_reducer_folds_a_burst(bus):
+    dispatcher = _Dispatcher()
+    bus.set_gui_dispatcher(dispatcher)
+    received: list = []
+    bus.subscribe(
+        ["a"],
+        _collect(received),
+        mode="gui",
+        coalesce=lambda old, new: {"n": old["n"] + new["n"]},
+    )
+    for n in (1, 2, 3):
+        bus.publish("a", {"n": n})
+    dispatcher.run()
+    bus.publish("a", {"n": 10})
+    dispatcher.run()
+    assert received == [("a", {"n": 6}), ("a", {"n": 10})]
+
+
+def test_worker_delivery_keeps_publish_order(bus):
+    received: queue.Queue = queue.Queue()
+    threads = set()
+
+    def handler(name, payload) -> None:
+        threads.add(threading.current_thread().name)
+        received.put(payload["n"])
+
+    bus.subscribe(["a"], handler, mode="worker")
+    for n in range(20):
+        bus.publish("a", {"n": n})
+    assert [received.get(timeout=5) for _ in range(20)] == list(range(20))
+    assert all(name.startswith("event-bus") for name in threads)
+
+
+def test_unsubscribed_handler_gets_nothing_pending(bus):
+    dispatcher = _Dispatcher()
+    bus.set_gui_dispatcher(dispatcher)
+    received: list = []
+    subscription = bus.subscribe(["a"], _collect(received), mode="gui")
+    bus.publish("a", {"n": 1})
+    bus.unsubscribe(subscription)
+    bus.publish("a", {"n": 2})
+    dispatcher.run()
+    assert received == []
+    assert bus.stats() == []
+
+
+def test_stats_record_errors_and_order_by_total(bus):
+    def failing(name, payload) -> None:
+        raise RuntimeError("boom")
+
+    def slow(name, payload) -> None:
+        threading.Event().wait(0.01)
+
+    bus.subscribe(["a"], slow)
+    bus.subscribe(["a"], failing)
+    with pytest.raises(RuntimeError):
+        bus.publish("a", {})
+    slowest, failed = bus.stats()
+    assert slowest.handler.endswith("slow") and slowest.calls == 1
+    assert (failed.calls, failed.errors) == (1, 1)
+    assert failed.last_error == "a: RuntimeError('boom')"
+
+
+def test_rejects_bad_subscriptions(bus):
+    with pytest.raises(ValueError):
+        bus.subscribe(["a"], _collect([]), mode="elsewhere")
+    with pytest.raises(ValueError):
+        bus.subscribe(["a"], _collect([]), coalesce=True)
+
+
+def test_publish_after_close_drops_worker_deliveries():
+    bus = EventBus()
+    worker: list = []
+    inline: list = []
+    bus.subscribe(["a"], _collect(worker), mode="worker")
+    bus.subscribe(["a"], _collect(inline))
+    bus.close()
+    pool = {thread for thread in threading.enumerate() if thread.name.startswith("event-bus")}
+    bus.publish("a", {"n": 1})
+    assert inline == [("a", {"n": 1})]
+    started = {thread for thread in threading.enumerate() if thread.name.startswith("event-bus")}
+    assert started <= pool
+    assert worker == []
@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+import pytest
+
+from pro.core.duplicate_service import DuplicateService
+from pro.core.file_index_service import PAGE_COLUMNS
+from pro.core.hash_service import partial_sha1
+
+from .conftest import write_file
+
+
+@pytest.fixture
+def tree(mods_root: Path) -> dict[str, Path]:
+    return {
+        "hair": write_file(mods_root / "Hair" / "bob.package"),
+        "cas": write_file(mods_root / "CAS" / "Tops" / "shirt.package"),
+    }
+
+
+def _status(db, path: Path) -> str | None:
+    row = db.query_one("SELECT status FROM file_index WHERE abs_path = ?", (str(path),))
+    return row[0] if row else None
+
+
+def test_incremental_scan_picks_up_added_and_removed_files(file_index, mods_root, tree, db):
+    file_index.scan(mods_root)
+    added = write_file(mods_root / "CAS" / "Tops" / "dress.package")
+    tree["hair"].unlink()
+
+    summary = file_index.scan(mods_root, mode="incremental")
+    assert (summary.added, summary.removed, summary.changed) == (1, 1, 0)
+    assert _status(db, added) == "normal"
+    assert _status(db, tree["hair"]) == "missing"
+
+
+def test_incremental_scan_skips_untouched_directories(file_index, mods_root, tree, db):
+    file_index.scan(mods_root)
+    # Rewriting a file in place leaves its directory's mtime alone.
+    tree["hair"].write_bytes(b"longer")
+    os.utime(tree["hair"], (1_000_000_000, 1_000_000_000))
+
+    summary = file_index.scan(mods_root, mode="incremental")
+    assert (summary.added, summary.changed, summary.removed) == (0, 0, 0)
+    summary = file_index.scan(mods_root, mode="incremental", dirs={str(tree["hair"].parent)})
+    assert summary.changed == 1
+    assert _status(db, tree["hair"]) == "changed"
+
+
+def test_incremental_scan_drops_removed_directory(file_index, mods_root, tree, db):
+    file_index.scan(mods_root)
+    tree["cas"].unlink()
+    tree["cas"].parent.rmdir()
+
+    summary = file_index.scan(mods_root, mode="incremental")
+    assert summary.removed == 1
+    dirs = [row[0] for row in db.query("SELECT path FROM dir_index")]
+    assert str(tree["cas"].parent) not in dirs
+    assert str(mods_root / "CAS") in dirs
+
+
+def _row(db, path: Path):
+    return db.query_one("SELECT id, sha1, status FROM file_index WHERE abs_path = ?", (str(path),))
+
+
+def _copy_away(source: Path, target: Path) -> None:
+    """Move by copy and delete, so the inode changes but size and mtime do not."""
+    target.parent.mkdir(parents=True, exist_ok=True)
+    target.write_bytes(source.read_bytes())
+    stat = source.stat()
+    os.utime(target, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    source.unlink()
+
+
+def test_rename_keeps_row_and_hash(file_index, mods_root, tree, db):
+    file_index.scan(mods_root)
+    before = _row(db, tree["hair"])
+    with db.transaction() as conn:
+        conn.execute("UPDATE file_index SET sha1 = 'abc' WHERE id = ?", (before["id"],))
+    target = mods_root / "CAS" / "bob_renamed.package"
+    tree["hair"].rename(target)
+
+    summary = file_index.scan(mods_root, mode="incremental")
+    assert (summary.moved, summary.added, summary.removed) == (1, 0, 0)
+    after = _row(db, target)
+    assert (after["id"], after["sha1"], after["status"]) == (before["id"], "abc", "normal")
+    assert _row(db, tree["hair"]) is None
+
+
+def test_copy_and_delete_with_same_name_is_a_move(file_index, mods_root, tree, db):
+    file_index.scan(mods_root)
+    before = _row(db, tree["hair"])
+    target = mods_root / "Archive" / "bob.package"
+    _copy_away(tree["hair"], target)
+
+    summary = file_index.scan(mods_root)
+    assert (summary.moved, summary.added, summary.removed) == (1, 0, 0)
+    assert _row(db, target)["id"] == before["id"]
+
+
+def test_copy_and_delete_is_confirmed_by_partial_hash(file_index, mods_root, tree, db):
+    file_index.scan(mods_root)
+    before = _row(db, tree["hair"])
+    with db.transaction() as conn:
+        conn.execute(
+            "UPDATE file_index SET partial_hash = ?, partial_sig = quick_sig WHERE id = ?",
+            (partial_sha1(str(tree["hair"])), before["id"]),
+        )
+    target = mods_root / "Archive" / "renamed.package"
+    _copy_away(tree["hair"], target)
+
+    summary = file_index.scan(mods_root)
+    assert summary.moved == 1
+    assert _row(db, target)["id"] == before["id"]
+
+
+def test_ambiguous_candidates_are_not_moves(file_index, mods_root, tree, db):
+    stat = tree["hair"].stat()
+    os.utime(tree["cas"], ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    file_index.scan(mods_root)
+    target = mods_root / "Archive" / "other.package"
+    _copy_away(tree["hair"], target)
+    tree["cas"].unlink()
+
+    summary = file_index.scan(mods_root)
+    assert (summary.moved, summary.added, summary.removed) == (0, 1, 2)
+
+
+def test_rename_is_rechecked_for_name_conflicts(file_index, mods_root, db):
+    write_file(mods_root / "A" / "hair.package", b"a")
+    second = write_file(mods_root / "B" / "hair.package", b"b")
+    file_index.scan(mods_root)
+    duplicates = DuplicateService(db)
+    duplicates.refresh()
+    assert [group.group_key for group in duplicates.groups("name_conflict")] == ["hair.package"]
+
+    second.rename(second.with_name("other.package"))
+    assert file_index.scan(mods_root, mode="incremental").moved == 1
+    summary = duplicates.refresh()
+    assert summary.checked_names == 2
+    assert duplicates.groups("name_conflict") == []
+
+
+@pytest.mark.parametrize("sort", ["file_name", "size"])
+@pytest.mark.parametrize("descending", [False, True])
+def test_keyset_pages_match_a_single_query(file_index, mods_root, sort, descending):
+    for i in range(7):
+        name = "Same.package" if i % 2 else f"mod{i}.package"
+        write_file(mods_root / f"D{i}" / name, b"x" * (i % 3 + 1))
+    file_index.scan(mods_root)
+    everything = file_index.page(sort, descending, limit=100)
+    column = PAGE_COLUMNS.index(sort)
+
+    paged: list[tuple] = []
+    after = None
+    while True:
+        rows = file_index.page(sort, descending, after=after, limit=2)
+        if not rows:
+            break
+        paged.extend(rows)
+        after = (rows[-1][column], rows[-1][0])
+    assert paged == everything
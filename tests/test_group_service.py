@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import zipfile
+from pathlib import Path
+
+import pytest
+
+from pro.core import move_engine
+from pro.core.group_service import SAFE_MODE_DIR, GroupService, parking_root
+from pro.core.script_inspector import ScriptInspector
+
+from .conftest import CancelAfter, write_file
+
+
+def _script(path: Path) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("mymod/main.pyc", b"\0" * 16)
+    return path
+
+
+@pytest.fixture
+def groups(db, engine) -> GroupService:
+    return GroupService(db, engine)
+
+
+@pytest.fixture
+def scripts(mods_root: Path, file_index, db) -> list[Path]:
+    paths = [_script(mods_root / f"Creator{i}" / f"mod{i}.ts4script") for i in range(4)]
+    write_file(mods_root / "Creator0" / "hair.package")
+    file_index.scan(mods_root)
+    ScriptInspector(db).refresh()
+    return paths
+
+
+def _disabled_reasons(db) -> list[str]:
+    return [row[0] for row in db.query("SELECT reason FROM disabled_map")]
+
+
+def test_safe_mode_round_trip(mods_root, scripts, groups, db):
+    summary = groups.enter_safe_mode(mods_root)
+    assert (summary.moved, summary.failed) == (len(scripts), 0)
+    assert not any(path.exists() for path in scripts)
+    assert (mods_root / "Creator0" / "hair.package").exists()
+    assert (parking_root(mods_root) / SAFE_MODE_DIR / "Creator0" / "mod0.ts4script").exists()
+    assert _disabled_reasons(db) == ["safe_mode"] * len(scripts)
+
+    summary = groups.leave_safe_mode()
+    assert summary.moved == len(scripts)
+    assert all(path.exists() for path in scripts)
+    assert _disabled_reasons(db) == []
+
+
+def test_interrupted_safe_mode_is_resumable(mods_root, scripts, groups, engine, monkeypatch):
+    monkeypatch.setattr(move_engine, "FLUSH_SIZE", 1)
+    summary = groups.enter_safe_mode(mods_root, context=CancelAfter(1))
+    assert summary.cancelled and summary.moved == 1
+
+    (record,) = engine.interrupted()
+    assert record.op_id == summary.op_id and record.op_type == "safe_mode"
+    resumed = engine.resume(record.op_id)
+    assert (resumed.moved, resumed.failed) == (len(scripts) - 1, 0)
+    assert not any(path.exists() for path in scripts)
+    assert engine.interrupted() == []
+
+
+def test_interrupted_safe_mode_can_be_rolled_back(mods_root, scripts, groups, engine, monkeypatch):
+    monkeypatch.setattr(move_engine, "FLUSH_SIZE", 1)
+    summary = groups.enter_safe_mode(mods_root, context=CancelAfter(2))
+    assert summary.moved == 2
+    engine.rollback(summary.op_id)
+    assert all(path.exists() for path in scripts)
+    assert engine.interrupted() == []
+
+
+def test_safe_mode_is_undoable(mods_root, scripts, groups, engine, db):
+    summary = groups.enter_safe_mode(mods_root)
+    record = engine.last_undoable()
+    assert record is not None and record.op_id == summary.op_id
+    engine.undo(record.op_id)
+    assert all(path.exists() for path in scripts)
+    assert _disabled_reasons(db) == []
@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from pro.core import hash_service
+from pro.core.hash_service import HashService
+
+from .conftest import write_file
+
+
+@pytest.fixture
+def hashes(db) -> HashService:
+    return HashService(db, bytes_per_sec=None)
+
+
+def test_failed_file_is_retried_next_run(mods_root, file_index, hashes, monkeypatch):
+    locked = write_file(mods_root / "locked.package", b"a")
+    write_file(mods_root / "open.package", b"b")
+    file_index.scan(mods_root)
+    real = hash_service.sha1_file
+
+    def flaky(path, *args, **kwargs):
+        if Path(path) == locked:
+            raise OSError("locked")
+        return real(path, *args, **kwargs)
+
+    monkeypatch.setattr(hash_service, "sha1_file", flaky)
+    summary = hashes.run()
+    assert (summary.hashed, summary.failed) == (1, 1)
+    assert hashes.pending_count() == 1
+
+    monkeypatch.setattr(hash_service, "sha1_file", real)
+    summary = hashes.run()
+    assert (summary.hashed, summary.failed) == (1, 0)
+    assert hashes.pending_count() == 0
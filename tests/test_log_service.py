@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from pro.core.log_service import LOG_FILE_NAME, LogService
+
+
+def _messages(entries) -> list[str]:
+    return [entry.message for entry in entries]
+
+
+def test_since_returns_only_newer_entries():
+    log = LogService(capacity=10)
+    for n in range(4):
+        log.info(f"m{n}")
+    assert _messages(log.since(2)) == ["m2", "m3"]
+    assert log.since(4) == []
+    assert log.since(99) == []
+
+
+def test_since_after_eviction_returns_what_is_left():
+    log = LogService(capacity=5)
+    for n in range(12):
+        log.warning(f"m{n}")
+    kept = [f"m{n}" for n in range(7, 12)]
+    assert _messages(log.since(0)) == kept
+    # Entries up to seq 7 were dropped; the caller gets everything still buffered.
+    assert _messages(log.since(3)) == kept
+    assert _messages(log.since(7)) == kept
+    assert _messages(log.since(9)) == ["m9", "m10", "m11"]
+    assert [entry.seq for entry in log.since(10)] == [11, 12]
+
+
+def _session(log_dir: Path, message: str, max_bytes: int, backups: int) -> None:
+    """One writer lifetime, so each message reaches the disk as its own batch."""
+    log = LogService(log_dir=log_dir, max_bytes=max_bytes, backups=backups)
+    log.info(message)
+    log.close()
+
+
+def _files(log_dir: Path) -> dict[str, str]:
+    return {
+        path.name: path.read_text(encoding="utf-8").split(" ", 2)[2].strip()
+        for path in sorted(log_dir.iterdir())
+    }
+
+
+def test_rotates_at_max_bytes_keeping_backups(tmp_path: Path):
+    for n in range(4):
+        _session(tmp_path, f"message {n} " + "x" * 60, max_bytes=100, backups=2)
+    files = _files(tmp_path)
+    assert sorted(files) == [LOG_FILE_NAME, f"{LOG_FILE_NAME}.1", f"{LOG_FILE_NAME}.2"]
+    assert files[LOG_FILE_NAME].startswith("message 3")
+    assert files[f"{LOG_FILE_NAME}.1"].startswith("message 2")
+    assert files[f"{LOG_FILE_NAME}.2"].startswith("message 1")
+
+
+def test_appends_below_max_bytes(tmp_path: Path):
+    for n in range(3):
+        _session(tmp_path, f"m{n}", max_bytes=10_000, backups=2)
+    lines = (tmp_path / LOG_FILE_NAME).read_text(encoding="utf-8").splitlines()
+    assert [line.split(" ", 2)[1:] for line in lines] == [["INFO", f"m{n}"] for n in range(3)]
+    assert [path.name for path in tmp_path.iterdir()] == [LOG_FILE_NAME]
+
+
+def test_rotation_without_backups_truncates(tmp_path: Path):
+    for n in range(3):
+        _session(tmp_path, f"message {n} " + "x" * 60, max_bytes=100, backups=0)
+    assert sorted(_files(tmp_path).items()) == [(LOG_FILE_NAME, "message 2 " + "x" * 60)]
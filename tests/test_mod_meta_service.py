@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+
+from pro.core.http_cache import HttpCache
+from pro.core.mod_meta_service import ModMetaService
+from pro.core.task_service import TaskContext
+
+from .conftest import REPO_ROOT, send
+
+PAGE = (REPO_ROOT / "tests" / "fixtures" / "tsr_details.html").read_bytes()
+ETAG = '"v1"'
+
+
+def _page(handler) -> None:
+    if handler.headers.get("If-None-Match") == ETAG:
+        send(handler, status=304, headers={"ETag": ETAG})
+        return
+    send(handler, PAGE, headers={"ETag": ETAG, "Content-Type": "text/html"})
+
+
+@pytest.fixture
+def cache(db, tmp_path: Path):
+    service = HttpCache(db, tmp_path / "cache", timeout=5)
+    yield service
+    service.close()
+
+
+@pytest.fixture
+def meta(db, cache, server) -> ModMetaService:
+    server.routes["/downloads/1600123"] = _page
+    return ModMetaService(db, cache, page_url=server.url("/downloads/{item_id}"))
+
+
+def test_cache_serves_fresh_and_revalidates_stale(cache, server):
+    server.routes["/page"] = _page
+    url = server.url("/page")
+    assert cache.get(url).source == "network"
+    assert cache.get(url).source == "cache"
+    assert len(server.requests) == 1
+
+    response = cache.get(url, max_age=0)
+    assert (response.source, response.body) == ("revalidated", PAGE)
+    assert server.requests[-1][1]["If-None-Match"] == ETAG
+    stats = cache.stats()
+    assert (stats.fetched, stats.hits, stats.revalidated) == (1, 1, 1)
+
+
+def test_cache_falls_back_to_stale_copy_on_server_error(cache, server):
+    server.routes["/page"] = _page
+    url = server.url("/page")
+    cache.get(url)
+    server.routes["/page"] = lambda handler: send(handler, b"busy", 503)
+    response = cache.get(url, max_age=0)
+    assert (response.source, response.body) == ("stale", PAGE)
+
+
+def test_refresh_parses_page_once(meta, db):
+    summary = meta.refresh(["1600123"])
+    assert (summary.fetched, summary.parsed, summary.failed) == (1, 1, 0)
+    row = db.query_one("SELECT * FROM mod_meta WHERE item_id = '1600123'")
+    assert (row["title"], row["creator"], row["file_size"]) == ("Wavy Bob Hair", "Alesso", 2048)
+    assert json.loads(row["required_links_json"])[0]["item_id"] == "1600100"
+
+    summary = meta.refresh(["1600123"], max_age=0)
+    assert (summary.revalidated, summary.parsed, summary.unchanged) == (1, 0, 1)
+
+
+def test_refresh_counts_unparseable_page_as_failed(meta, server):
+    server.routes["/downloads/42"] = lambda handler: send(handler, b"<html></html>")
+    summary = meta.refresh(["42"])
+    assert (summary.fetched, summary.parsed, summary.failed) == (1, 0, 1)
+
+
+def test_cancel_stops_within_a_page(db, cache, server):
+    context = TaskContext()
+    served = []
+
+    def page(handler) -> None:
+        served.append(handler.path)
+        if len(served) == 2:
+            context.cancel()
+        send(handler, PAGE.replace(b"1600123", handler.path.rsplit("/", 1)[1].encode()))
+
+    for item_id in range(1, 21):
+        server.routes[f"/downloads/{item_id}"] = page
+    meta = ModMetaService(db, cache, page_url=server.url("/downloads/{item_id}"), max_workers=1)
+    summary = meta.refresh([str(item_id) for item_id in range(1, 21)], context=context)
+    assert summary.cancelled
+    assert len(served) < 5
+    stored = db.query_one("SELECT COUNT(*) FROM mod_meta")[0]
+    assert stored == summary.parsed >= 1
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from pro.core import move_engine
+from pro.core.move_engine import MoveItem
+
+from .conftest import CancelAfter, write_file
+
+
+@pytest.fixture
+def items(mods_root: Path, file_index, db) -> list[MoveItem]:
+    for i in range(4):
+        write_file(mods_root / "Hair" / f"hair{i}.package")
+    file_index.scan(mods_root)
+    parked = mods_root.parent / "Parked"
+    return [
+        MoveItem(row["id"], row["abs_path"], str(parked / "Hair" / row["file_name"]), "disable")
+        for row in db.query("SELECT id, abs_path, file_name FROM file_index ORDER BY id")
+    ]
+
+
+def _where(items: list[MoveItem]) -> list[str]:
+    """Per item, "src" or "dst" for where the file is, "?" if not exactly one exists."""
+    states = {(True, False): "src", (False, True): "dst"}
+    return [
+        states.get((Path(item.src).exists(), Path(item.dst).exists()), "?") for item in items
+    ]
+
+
+def _index_status(db) -> list[str]:
+    return [row[0] for row in db.query("SELECT status FROM file_index ORDER BY id")]
+
+
+def test_run_moves_and_journals_every_item(engine, items, db, op_log):
+    summary = engine.run("disable", items)
+    assert (summary.moved, summary.failed, summary.cancelled) == (4, 0, False)
+    assert _where(items) == ["dst"] * 4
+    assert _index_status(db) == ["disabled"] * 4
+    assert db.query_one("SELECT COUNT(*) FROM disabled_map")[0] == 4
+    assert op_log.get(summary.op_id).status == "done"
+
+
+def test_missing_source_marks_batch_partial(engine, items, op_log):
+    Path(items[0].src).unlink()
+    summary = engine.run("disable", items)
+    assert (summary.moved, summary.failed) == (3, 1)
+    assert op_log.get(summary.op_id).status == "partial"
+
+
+@pytest.fixture
+def interrupted(engine, items, monkeypatch):
+    monkeypatch.setattr(move_engine, "FLUSH_SIZE", 1)
+    summary = engine.run("disable", items, context=CancelAfter(2))
+    assert summary.cancelled and summary.moved == 2
+    return summary
+
+
+def test_interrupted_batch_resumes(engine, items, interrupted, db, op_log):
+    assert [record.op_id for record in engine.interrupted()] == [interrupted.op_id]
+    # The process died after this rename but before its chunk was journaled.
+    Path(items[2].src).rename(items[2].dst)
+
+    summary = engine.resume(interrupted.op_id)
+    assert (summary.moved, summary.failed) == (2, 0)
+    assert _where(items) == ["dst"] * 4
+    assert _index_status(db) == ["disabled"] * 4
+    assert op_log.get(interrupted.op_id).status == "done"
+    assert engine.interrupted() == []
+
+
+def test_interrupted_batch_rolls_back(engine, items, interrupted, db, op_log):
+    Path(items[2].src).rename(items[2].dst)
+
+    summary = engine.rollback(interrupted.op_id)
+    assert (summary.moved, summary.failed) == (3, 0)
+    assert _where(items) == ["src"] * 4
+    assert _index_status(db) == ["normal"] * 4
+    assert db.query_one("SELECT COUNT(*) FROM disabled_map")[0] == 0
+    assert op_log.get(interrupted.op_id).status == "rolled_back"
+    assert engine.interrupted() == []
+    # A rollback is not offered for undo; that would redo the interrupted batch.
+    assert engine.last_undoable() is None
+
+
+def test_undo_restores_finished_batch(engine, items, db, op_log):
+    first = engine.run("disable", items)
+    assert engine.last_undoable().op_id == first.op_id
+
+    summary = engine.undo(first.op_id)
+    assert summary.moved == 4
+    assert _where(items) == ["src"] * 4
+    assert _index_status(db) == ["normal"] * 4
+    assert op_log.get(first.op_id).status == "undone"
+    assert engine.last_undoable().op_id == summary.op_id
+
+
+@pytest.fixture
+def interrupted_enable(engine, items, file_index, mods_root, monkeypatch):
+    engine.run("disable", items)
+    monkeypatch.setattr(move_engine, "FLUSH_SIZE", 1)
+    enable = [item.reversed() for item in items]
+    summary = engine.run("enable", enable, context=CancelAfter(2))
+    assert summary.cancelled and summary.moved == 2
+    # Moved back before the interruption, then picked up by a scan as a new file.
+    Path(enable[2].src).rename(enable[2].dst)
+    file_index.scan(mods_root)
+    return summary
+
+
+def _index_paths(db) -> list[tuple[int, str, str]]:
+    return [tuple(row) for row in db.query("SELECT id, abs_path, status FROM file_index")]
+
+
+def test_interrupted_enable_resumes_after_scan(engine, items, interrupted_enable, db):
+    summary = engine.resume(interrupted_enable.op_id)
+    assert (summary.moved, summary.failed) == (2, 0)
+    assert _where(items) == ["src"] * 4
+    assert sorted(_index_paths(db)) == [(item.file_id, item.src, "normal") for item in items]
+
+
+def test_interrupted_enable_rolls_back_after_scan(engine, items, interrupted_enable, db):
+    summary = engine.rollback(interrupted_enable.op_id)
+    assert (summary.moved, summary.failed) == (3, 0)
+    assert _where(items) == ["dst"] * 4
+    assert sorted(_index_paths(db)) == [(item.file_id, item.dst, "disabled") for item in items]
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import pytest
+
+
+def test_batch_writes_operation_and_items(op_log):
+    with op_log.batch("disable", {"group": 1}) as batch:
+        batch.add({"path": "a"})
+        batch.extend([{"path": "b"}, {"path": "c"}], status="pending")
+    record = op_log.get(batch.op_id)
+    assert (record.op_type, record.payload, record.status, record.item_count) == (
+        "disable",
+        {"group": 1},
+        "done",
+        3,
+    )
+    items = op_log.items(batch.op_id)
+    assert [(item.seq, item.payload["path"], item.status) for item in items] == [
+        (0, "a", "done"),
+        (1, "b", "pending"),
+        (2, "c", "pending"),
+    ]
+
+
+def test_batch_records_nothing_if_the_block_raises(op_log):
+    with pytest.raises(RuntimeError):
+        with op_log.batch("disable") as batch:
+            batch.add({"path": "a"})
+            raise RuntimeError("stop")
+    assert batch.op_id is None
+    assert op_log.recent() == []
+
+
+def test_set_status_updates_operation_and_items(op_log):
+    op_id = op_log.record_batch(
+        "enable", {}, [{"n": n} for n in range(4)], status="running", item_status="pending"
+    )
+    op_log.set_status(op_id, "running", [(0, "done"), (2, "failed")])
+    op_log.set_status(op_id, "partial")
+    assert op_log.get(op_id).status == "partial"
+    assert [item.status for item in op_log.items(op_id)] == ["done", "pending", "failed", "pending"]
+    assert [item.seq for item in op_log.items(op_id, status="pending")] == [1, 3]
+
+
+def test_items_pages_by_seq_with_status_filter(op_log):
+    op_id = op_log.record_batch("disable", {}, [{"n": n} for n in range(10)], item_status="done")
+    op_log.set_status(op_id, "done", [(seq, "failed") for seq in range(0, 10, 3)])
+    first = op_log.items(op_id, limit=4)
+    assert [item.seq for item in first] == [0, 1, 2, 3]
+    second = op_log.items(op_id, after_seq=first[-1].seq, limit=4)
+    assert [item.seq for item in second] == [4, 5, 6, 7]
+    assert op_log.items(op_id, after_seq=9) == []
+    failed = op_log.items(op_id, status="failed", limit=2)
+    assert [item.seq for item in failed] == [0, 3]
+    assert [item.seq for item in op_log.items(op_id, after_seq=3, status="failed")] == [6, 9]
+
+
+def test_iter_items_crosses_page_boundaries(op_log):
+    count = 2500
+    op_id = op_log.record_batch("disable", {}, ({"n": n} for n in range(count)))
+    op_log.set_status(op_id, "done", [(999, "failed"), (1000, "failed"), (2499, "failed")])
+    assert [item.payload["n"] for item in op_log.iter_items(op_id)] == list(range(count))
+    assert [item.seq for item in op_log.iter_items(op_id, status="failed")] == [999, 1000, 2499]
+    other = op_log.record_batch("enable", {}, [{"n": 0}])
+    assert [item.op_id for item in op_log.iter_items(other)] == [other]
+
+
+def test_recent_pages_newest_first(op_log):
+    ids = [op_log.record(f"op{n}", {"n": n}) for n in range(5)]
+    first = op_log.recent(limit=2)
+    assert [record.op_id for record in first] == [ids[4], ids[3]]
+    second = op_log.recent(limit=2, before_id=first[-1].op_id)
+    assert [record.op_id for record in second] == [ids[2], ids[1]]
+    assert [record.op_id for record in op_log.recent(before_id=ids[0])] == []
+    assert op_log.get(ids[-1] + 100) is None
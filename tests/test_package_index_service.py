@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import os
+import struct
+from pathlib import Path
+
+import pytest
+
+from pro.core.package_index_service import (
+    COMPRESSION_DELETED,
+    CONSTANT_GROUP,
+    CONSTANT_INSTANCE_HIGH,
+    CONSTANT_TYPE,
+    HEADER,
+    IGNORED_TYPES,
+    PackageFormatError,
+    PackageIndexService,
+    read_package_keys,
+)
+
+from .conftest import write_file
+
+CAS_PART = 0x034AEECB
+TUNING = 0x62E94D38
+HIGH_INSTANCE = 0x8000_0000_0000_0001
+
+
+def _package(
+    keys: list[tuple[int, int, int]],
+    flags: int = 0,
+    deleted: frozenset[int] = frozenset(),
+    legacy_position: bool = False,
+) -> bytes:
+    """A DBPF v2 package with an index of ``keys`` and no resource data.
+
+    With a constant-key ``flags`` bit set, that word is taken from the first key.
+    """
+    index = struct.pack("<I", flags)
+    first_type, first_group, first_instance = keys[0]
+    constants = (first_type, first_group, first_instance >> 32)
+    for bit, value in zip((CONSTANT_TYPE, CONSTANT_GROUP, CONSTANT_INSTANCE_HIGH), constants):
+        if flags & bit:
+            index += struct.pack("<I", value)
+    for number, (res_type, group, instance) in enumerate(keys):
+        words = [res_type, group, instance >> 32]
+        varying = [
+            word
+            for word, bit in zip(words, (CONSTANT_TYPE, CONSTANT_GROUP, CONSTANT_INSTANCE_HIGH))
+            if not flags & bit
+        ]
+        compression = COMPRESSION_DELETED if number in deleted else 0x5A42
+        index += struct.pack(
+            "<" + "I" * len(varying) + "IIIIHH",
+            *varying, instance & 0xFFFFFFFF, 0, 0, 0, compression, 1,
+        )
+    position = HEADER.size
+    header = HEADER.pack(
+        b"DBPF",
+        2,
+        1,
+        len(keys),
+        position if legacy_position else 0,
+        len(index),
+        3,
+        0 if legacy_position else position,
+    )
+    return header + index
+
+
+def _read(tmp_path: Path, data: bytes) -> list[tuple[int, int, int]]:
+    return read_package_keys(str(write_file(tmp_path / "test.package", data)))
+
+
+def test_reads_varying_keys(tmp_path: Path):
+    keys = [(TUNING, 0, 42), (CAS_PART, 0x80000000, 7 << 32 | 9)]
+    assert _read(tmp_path, _package(keys)) == sorted(keys)
+
+
+@pytest.mark.parametrize("flags", [CONSTANT_TYPE, CONSTANT_GROUP, CONSTANT_INSTANCE_HIGH, 0x7])
+def test_reads_constant_key_words(tmp_path: Path, flags: int):
+    keys = [(CAS_PART, 0, 5 << 32 | 1), (CAS_PART, 0, 5 << 32 | 2)]
+    assert _read(tmp_path, _package(keys, flags)) == keys
+
+
+def test_reads_legacy_index_position(tmp_path: Path):
+    keys = [(TUNING, 0, 1)]
+    assert _read(tmp_path, _package(keys, legacy_position=True)) == keys
+
+
+def test_skips_deleted_entries(tmp_path: Path):
+    keys = [(TUNING, 0, 1), (TUNING, 0, 2), (TUNING, 0, 3)]
+    assert _read(tmp_path, _package(keys, deleted=frozenset({1}))) == [keys[0], keys[2]]
+
+
+def test_folds_high_instances_to_signed(tmp_path: Path):
+    (key,) = _read(tmp_path, _package([(TUNING, 0, HIGH_INSTANCE)]))
+    assert key == (TUNING, 0, HIGH_INSTANCE - (1 << 64))
+
+
+@pytest.mark.parametrize(
+    "data, message",
+    [
+        (b"DBPF", "文件过小"),
+        (b"XXXX" + bytes(HEADER.size - 4), "DBPF 文件头"),
+        (_package([(TUNING, 0, 1), (TUNING, 0, 2)])[:-10], "超出文件范围"),
+    ],
+)
+def test_rejects_broken_packages(tmp_path: Path, data: bytes, message: str):
+    with pytest.raises(PackageFormatError, match=message):
+        _read(tmp_path, data)
+
+
+@pytest.fixture
+def packages(db, file_index, tasks) -> PackageIndexService:
+    return PackageIndexService(db, tasks)
+
+
+def test_refresh_indexes_changed_packages_only(packages, file_index, mods_root: Path, db):
+    first = write_file(mods_root / "a.package", _package([(TUNING, 0, 1), (TUNING, 0, 2)]))
+    write_file(mods_root / "broken.package", b"DBPF")
+    write_file(mods_root / "readme.txt")
+    file_index.scan(mods_root)
+
+    summary = packages.refresh()
+    assert (summary.indexed, summary.failed, summary.resources) == (1, 1, 2)
+    assert packages.pending_count() == 0
+    summary = packages.refresh()
+    assert (summary.indexed, summary.failed) == (0, 0)
+
+    first.write_bytes(_package([(TUNING, 0, 3)]))
+    os.utime(first, (1_000_000_000, 1_000_000_000))
+    file_index.scan(mods_root)
+    summary = packages.refresh()
+    assert (summary.indexed, summary.resources) == (1, 1)
+    rows = db.query("SELECT res_instance FROM package_resources")
+    assert [row[0] for row in rows] == [3]
+
+    first.unlink()
+    file_index.scan(mods_root)
+    assert packages.refresh().removed == 1
+
+
+def test_conflicts_pair_packages_sharing_keys(packages, file_index, mods_root: Path):
+    shared = [(CAS_PART, 0, 1), (CAS_PART, 0, 2)]
+    name_map = (IGNORED_TYPES[0], 0, 99)
+    write_file(mods_root / "a.package", _package([*shared, name_map, (TUNING, 0, 5)]))
+    write_file(mods_root / "b.package", _package([*shared, name_map]))
+    write_file(mods_root / "c.package", _package([name_map, (TUNING, 0, 6)]))
+    file_index.scan(mods_root)
+    packages.refresh()
+
+    (conflict,) = packages.conflicts()
+    assert (Path(conflict.path_a).name, Path(conflict.path_b).name) == ("a.package", "b.package")
+    assert (conflict.shared, conflict.types) == (2, (f"{CAS_PART:08X}",))
+
+
+def test_conflicts_skip_byte_identical_copies(packages, file_index, mods_root: Path, db):
+    data = _package([(CAS_PART, 0, 1)])
+    write_file(mods_root / "a.package", data)
+    write_file(mods_root / "copy" / "a.package", data)
+    file_index.scan(mods_root)
+    with db.transaction() as conn:
+        conn.execute("UPDATE file_index SET sha1 = 'same'")
+    packages.refresh()
+    assert packages.conflicts() == []
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import queue
+import threading
+from pathlib import Path
+
+import pytest
+
+from pro.core.search_service import SearchHit, SearchRunner, SearchService
+
+from .conftest import write_file
+
+
+@pytest.fixture
+def search(db, file_index) -> SearchService:
+    service = SearchService(db)
+    service.ensure_schema()
+    return service
+
+
+def _files(search: SearchService, text: str) -> list[str]:
+    return [hit.title for hit in search.search(text) if hit.kind == "file"]
+
+
+def _rename(db, old: str, new: str) -> None:
+    with db.transaction() as conn:
+        conn.execute(
+            """
+            UPDATE file_index SET file_name = ?, rel_path = replace(rel_path, ?, ?)
+            WHERE file_name = ?
+            """,
+            (new, old, new, old),
+        )
+
+
+def test_triggers_follow_insert_rename_and_delete(search, file_index, mods_root: Path, db):
+    write_file(mods_root / "Hair" / "WavyBob.package")
+    write_file(mods_root / "Tops" / "shirt.package")
+    file_index.scan(mods_root)
+    # Prefix index for short tokens, trigram index for substrings.
+    assert _files(search, "wa") == ["WavyBob.package"]
+    assert _files(search, "vybo") == (["WavyBob.package"] if search.has_trigram else [])
+    assert _files(search, "hair") == ["WavyBob.package"]
+
+    _rename(db, "WavyBob.package", "CurlyPixie.package")
+    assert _files(search, "wa") == []
+    assert _files(search, "wavybob") == []
+    assert _files(search, "cu") == ["CurlyPixie.package"]
+    assert _files(search, "pixie") == ["CurlyPixie.package"]
+
+    with db.transaction() as conn:
+        conn.execute("DELETE FROM file_index WHERE file_name = 'CurlyPixie.package'")
+    assert _files(search, "pixie") == []
+    assert _files(search, "cu") == []
+    assert _files(search, "shirt") == ["shirt.package"]
+
+
+def test_missing_files_are_not_found(search, file_index, mods_root: Path):
+    gone = write_file(mods_root / "bob.package")
+    file_index.scan(mods_root)
+    gone.unlink()
+    file_index.scan(mods_root)
+    assert _files(search, "bob") == []
+
+
+def test_meta_search_matches_title_and_creator(search, db):
+    with db.transaction() as conn:
+        conn.execute(
+            "INSERT INTO mod_meta (item_id, title, creator) VALUES ('1', 'Wavy Bob', 'Alesso')"
+        )
+    hits = search.search("ales")
+    assert [(hit.kind, hit.title, hit.detail) for hit in hits] == [("mod", "Wavy Bob", "Alesso")]
+
+
+def test_ensure_schema_rebuilds_out_of_step_index(db, file_index, mods_root: Path):
+    write_file(mods_root / "bob.package")
+    file_index.scan(mods_root)
+    search = SearchService(db)
+    search.ensure_schema()
+    assert _files(search, "bob") == ["bob.package"]
+
+    with db.transaction() as conn:
+        conn.execute("DROP TRIGGER file_search_ai")
+        conn.execute("DROP TRIGGER file_search_tri_ai")
+    write_file(mods_root / "pixie.package")
+    file_index.scan(mods_root)
+    assert _files(search, "pi") == []
+    search.ensure_schema()
+    assert _files(search, "pi") == ["pixie.package"]
+    assert _files(search, "pixie") == ["pixie.package"]
+
+
+def test_empty_query_finds_nothing(search):
+    assert search.search("  ,;  ") == []
+
+
+class _GatedSearch:
+    """Blocks the search for ``gated`` until ``release`` is set."""
+
+    def __init__(self, gated: str) -> None:
+        self.gated = gated
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def search(self, text: str, limit: int, conn=None) -> list[SearchHit]:
+        if text == self.gated:
+            self.started.set()
+            self.release.wait(5)
+        return [SearchHit("file", 1, text, "")]
+
+
+def test_runner_delivers_only_the_newest_query(db):
+    gated = _GatedSearch("ha")
+    runner = SearchRunner(gated, db)
+    results: queue.Queue = queue.Queue()
+    try:
+        runner.submit("ha", lambda generation, text, hits: results.put(text))
+        assert gated.started.wait(5)
+        runner.submit("hai", lambda generation, text, hits: results.put(text))
+        latest = runner.submit("hair", lambda generation, text, hits: results.put(text))
+        gated.release.set()
+        assert results.get(timeout=5) == "hair"
+        assert latest == 3
+        assert results.empty()
+    finally:
+        runner.close()
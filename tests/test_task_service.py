@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+import threading
+
+
+def _blocking(started: threading.Event, release: threading.Event):
+    def run(context=None):
+        started.set()
+        while not release.wait(0.01):
+            if context is not None and context.cancelled:
+                return "stopped"
+        return "finished"
+
+    return run
+
+
+def test_cancel_running_task_with_context(tasks):
+    started, release = threading.Event(), threading.Event()
+    handle = tasks.submit_with_context("cooperative", _blocking(started, release))
+    assert started.wait(5)
+    assert handle.cancel()
+    assert handle.future.result(5) == "stopped"
+
+
+def test_cancel_running_task_without_context_is_advisory(tasks):
+    started, release = threading.Event(), threading.Event()
+    handle = tasks.submit("plain", _blocking(started, release))
+    assert started.wait(5)
+    assert not handle.cancel()
+    release.set()
+    assert handle.future.result(5) == "finished"
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import sys
+import types
+import zipfile
+from pathlib import Path
+
+import pytest
+
+from pro.core.tray_converter import (
+    MMAP_THRESHOLD,
+    ConvertOptions,
+    convert_files,
+    encode_varint,
+    find_version,
+)
+
+from .conftest import REPO_ROOT
+
+REFERENCE_ZIP = REPO_ROOT / "SimsToolbox.zip"
+REFERENCE_MODULE = "modules/tray_converter/service.py"
+OPTIONS = ConvertOptions(copy_associated=False)
+
+
+def _key(number: int, wire_type: int) -> bytes:
+    return encode_varint(number << 3 | wire_type)
+
+
+def _bytes_field(number: int, data: bytes) -> bytes:
+    return _key(number, 2) + encode_varint(len(data)) + data
+
+
+def _trayitem(version: int, padding: int = 0, header: bool = True) -> bytes:
+    """A two-level message with the version gate in the nested one."""
+    inner = (
+        _key(1, 0) + encode_varint(7)
+        + _key(2, 0) + encode_varint(version)
+        + _bytes_field(3, b"\x00" * padding)
+    )
+    payload = _key(1, 0) + encode_varint(3) + _bytes_field(4, inner) + _bytes_field(5, b"name")
+    if not header:
+        return payload
+    return (0).to_bytes(4, "little") + len(payload).to_bytes(4, "little") + payload
+
+
+@pytest.fixture(scope="module")
+def reference():
+    if not REFERENCE_ZIP.exists():
+        pytest.skip("reference converter not available")
+    with zipfile.ZipFile(REFERENCE_ZIP) as archive:
+        source = archive.read(REFERENCE_MODULE).decode("utf-8")
+    module = types.ModuleType("reference_tray_converter")
+    sys.modules[module.__name__] = module
+    try:
+        exec(compile(source, REFERENCE_MODULE, "exec"), module.__dict__)
+        yield module
+    finally:
+        sys.modules.pop(module.__name__, None)
+
+
+def _convert(tmp_path: Path, data: bytes, version: int) -> tuple[str, bytes]:
+    source = tmp_path / "in" / "0x00000001!0x0000000000000abc.trayitem"
+    source.parent.mkdir(parents=True, exist_ok=True)
+    source.write_bytes(data)
+    out_dir = tmp_path / "out"
+    (outcome,) = convert_files(([str(source)], str(out_dir), version, OPTIONS, None))
+    assert not list(out_dir.glob("*.tmp"))
+    return outcome.kind, (out_dir / source.name).read_bytes()
+
+
+def _reference_convert(reference, tmp_path: Path, data: bytes, version: int) -> bytes:
+    source = tmp_path / "ref_in" / "item.trayitem"
+    source.parent.mkdir(parents=True, exist_ok=True)
+    source.write_bytes(data)
+    out_dir = tmp_path / "ref_out"
+    options = reference.ConvertOptions(copy_associated=False, workers=1)
+    result = reference.convert_batch(source.parent, out_dir, version, options)
+    assert result.errors == 0
+    return (out_dir / source.name).read_bytes()
+
+
+@pytest.mark.parametrize("padding", [16, MMAP_THRESHOLD * 2], ids=["small", "mmap"])
+@pytest.mark.parametrize("version", [0x2BC0, 0x2BC1], ids=["same", "same-length"])
+def test_same_length_output_matches_reference(tmp_path, reference, padding, version):
+    data = _trayitem(0x2BC0, padding)
+    kind, converted = _convert(tmp_path, data, version)
+    assert kind == ("same" if version == 0x2BC0 else "patch")
+    assert converted == _reference_convert(reference, tmp_path, data, version)
+
+
+@pytest.mark.parametrize("padding", [16, MMAP_THRESHOLD * 2], ids=["small", "mmap"])
+def test_longer_version_matches_reference_without_header(tmp_path, reference, padding):
+    data = _trayitem(0x2BC0, padding, header=False)
+    kind, converted = _convert(tmp_path, data, 0x4100)
+    assert kind == "patch"
+    assert converted == _reference_convert(reference, tmp_path, data, 0x4100)
+
+
+def test_longer_version_keeps_header_length_in_step(tmp_path, reference):
+    data = _trayitem(0x2BC0, 16)
+    _, converted = _convert(tmp_path, data, 0x4100)
+    # The reference leaves the header stale; the payload itself must still match.
+    expected = _reference_convert(reference, tmp_path, data, 0x4100)
+    assert converted[8:] == expected[8:]
+    assert int.from_bytes(converted[4:8], "little") == len(converted) - 8
+    assert find_version(converted, 8).value == 0x4100
+
+
+def test_large_file_patched_to_another_directory(tmp_path):
+    # Regression: slices of the mmap'd view used to keep the mmap from closing.
+    data = _trayitem(0x2BC0, MMAP_THRESHOLD * 2)
+    kind, converted = _convert(tmp_path, data, 0x2BC1)
+    assert kind == "patch"
+    assert len(converted) == len(data)
+    assert find_version(converted, 8).value == 0x2BC1
+
+
+def test_failing_file_does_not_abort_chunk(tmp_path):
+    good = tmp_path / "in" / "good.trayitem"
+    good.parent.mkdir()
+    good.write_bytes(_trayitem(0x2BC0))
+    missing = tmp_path / "in" / "gone.trayitem"
+    outcomes = convert_files(
+        ([str(missing), str(good)], str(tmp_path / "out"), 0x2BC1, OPTIONS, None)
+    )
+    assert [outcome.kind for outcome in outcomes] == ["error", "patch"]
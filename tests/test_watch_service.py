@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import os
+import queue
+import time
+from pathlib import Path
+
+import pytest
+
+from pro.core.event_bus import EventBus
+from pro.core.watch_service import PollingBackend, WatchService
+
+from .conftest import write_file
+
+
+def _read_until(backend: PollingBackend, timeout: float = 2.0) -> set[str]:
+    deadline = time.monotonic() + timeout
+    dirty: set[str] = set()
+    while not dirty and time.monotonic() < deadline:
+        dirty = backend.read(0.1)
+    return dirty
+
+
+@pytest.fixture
+def polling(mods_root: Path):
+    (mods_root / "Hair").mkdir()
+    backend = PollingBackend(interval=0.02)
+    backend.start(str(mods_root))
+    yield backend
+    backend.close()
+
+
+def test_polling_sees_new_file(polling, mods_root: Path):
+    write_file(mods_root / "Hair" / "bob.package")
+    assert _read_until(polling) == {str(mods_root / "Hair")}
+
+
+def test_polling_sees_new_directory_tree(polling, mods_root: Path):
+    write_file(mods_root / "Hair" / "Creator" / "bob.package")
+    assert _read_until(polling) == {str(mods_root / "Hair"), str(mods_root / "Hair" / "Creator")}
+
+
+def test_polling_sees_removed_directory(polling, mods_root: Path):
+    os.rmdir(mods_root / "Hair")
+    assert str(mods_root) in _read_until(polling)
+    assert polling.read(0.1) == set()
+
+
+@pytest.fixture
+def bus():
+    events = EventBus()
+    yield events
+    events.close()
+
+
+@pytest.fixture
+def watcher(file_index, bus):
+    service = WatchService(file_index, bus, debounce=0.05, max_delay=0.5, backend="polling")
+    yield service
+    service.stop()
+
+
+def test_watcher_indexes_changes_as_deltas(watcher, bus, file_index, mods_root: Path, db):
+    old = write_file(mods_root / "Hair" / "old.package")
+    file_index.scan(mods_root)
+    deltas: queue.Queue = queue.Queue()
+    bus.subscribe(["index.delta"], lambda name, payload: deltas.put(payload))
+    watcher.start(mods_root)
+    assert watcher.backend_name == "polling"
+
+    write_file(mods_root / "Hair" / "new.package")
+    old.unlink()
+    added = removed = 0
+    dirs: set[str] = set()
+    while (added, removed) != (1, 1):
+        delta = deltas.get(timeout=5)
+        added += delta["added"]
+        removed += delta["removed"]
+        dirs.update(delta["dirs"])
+    assert dirs == {str(mods_root / "Hair")}
+    rows = db.query("SELECT file_name FROM file_index WHERE status != 'missing'")
+    assert [row[0] for row in rows] == ["new.package"]